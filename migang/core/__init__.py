@@ -1,3 +1,6 @@
+# 最先导入以最先注册启动钩子，在其他钩子创建线程前fork绘图进程；
+# isort会将其移到后面，因此跳过
+from .utils import process_pool  # noqa isort: skip
 from .message import broadcast  # noqa
 from .rules import GroupTaskChecker  # noqa
 from .utils.task_operation import check_task  # noqa
@@ -18,6 +21,7 @@ from .utils.config_operation import (  # noqa
 )
 from .manager import (  # noqa
     CDItem,
+    CDMode,
     TaskItem,
     CheckType,
     CountItem,
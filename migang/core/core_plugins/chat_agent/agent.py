@@ -6,8 +6,7 @@ from nonebot.typing import T_State
 from nonebot.matcher import Matcher
 from nonebot.adapters.onebot.v11 import Bot, GroupMessageEvent
 
-from migang.core.models import ChatGPTChatHistory
-
+from .history import chat_history_writer
 from .config import sync_get_agent_config
 from .intent_judge import chat_intent_judge
 from .dialog_window import dialog_window_manager
@@ -85,13 +84,13 @@ async def pre_check(event: GroupMessageEvent, bot: Bot, state: T_State) -> bool:
         state["refresh_dialog_window"] = True
         state["window_was_active"] = window_was_active
     else:
-        await ChatGPTChatHistory(
+        await chat_history_writer.append(
             user_id=event.user_id,
             group_id=event.group_id,
             target_id=event.self_id if triggered else None,
             message=record_msg,
             is_bot=False,  # 用户消息
-        ).save()
+        )
     return triggered
 
 
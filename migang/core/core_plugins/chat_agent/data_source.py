@@ -11,10 +11,10 @@ from nonebot.adapters.onebot.v11 import Bot, Message, MessageSegment, GroupMessa
 
 from migang.core.permission import BLACK
 from migang.core.utils import http_utils
-from migang.core.models import ChatGPTChatHistory
 from migang.core.manager import permission_manager
 
 from .utils import serialize_message
+from .history import chat_history_writer
 from .config import sync_get_agent_config
 from .dialog_window import dialog_window_manager
 
@@ -63,13 +63,13 @@ async def hello(
         )
     )
     reply_message = Message(result) + MessageSegment.image(random.choice(hello_img))
-    await ChatGPTChatHistory(
+    await chat_history_writer.append(
         user_id=event.user_id,
         group_id=event.group_id,
         target_id=event.self_id,
         message=await serialize_message(event.message, bot=bot),
         is_bot=False,
-    ).save()
+    )
     return reply_message
 
 
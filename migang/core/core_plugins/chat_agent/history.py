@@ -0,0 +1,278 @@
+from __future__ import annotations
+
+import time
+import asyncio
+from datetime import datetime
+from dataclasses import field, dataclass
+from collections import OrderedDict, deque
+
+from tortoise import timezone
+from nonebot.log import logger
+from langchain_core.messages import BaseMessage
+from nonebot.adapters.onebot.v11 import Message
+
+from migang.core.database import pre_close_db
+from migang.core.models import ChatGPTChatHistory
+
+from .utils import deserialize_message, deserialize_langchain_messages
+
+# 攒够一批或等待超时后统一写入
+_BATCH_SIZE = 64
+_FLUSH_INTERVAL = 2.0
+# 队列满时 append 会等待写入，避免数据库跟不上时无限堆积
+_QUEUE_SIZE = 2048
+# 每个会话默认缓存的消息条数，请求更多时会重新从数据库载入
+_CONTEXT_SIZE = 32
+# 最多缓存的会话数与消息总数，超出时淘汰最久未访问的会话
+_MAX_CONTEXTS = 512
+_MAX_ENTRIES = 16384
+
+
+@dataclass(slots=True)
+class HistoryEntry:
+    """缓存中的一条对话记录，消息只反序列化一次"""
+
+    user_id: int
+    group_id: int | None
+    target_id: int | None
+    message: object
+    time: datetime
+    is_bot: bool = False
+    _parsed: Message | list[BaseMessage] | None = field(default=None, repr=False)
+
+    @classmethod
+    def from_record(cls, record: ChatGPTChatHistory) -> HistoryEntry:
+        return cls(
+            user_id=record.user_id,
+            group_id=record.group_id,
+            target_id=record.target_id,
+            message=record.message,
+            time=record.time,
+            is_bot=record.is_bot,
+        )
+
+    @property
+    def key(self) -> tuple[int, datetime, bool]:
+        return (self.user_id, self.time, self.is_bot)
+
+    def langchain_messages(self) -> list[BaseMessage]:
+        """返回副本，调用方可以随意修改"""
+        if self._parsed is None:
+            self._parsed = deserialize_langchain_messages(self.message)
+        return [message.model_copy() for message in self._parsed]
+
+    def onebot_message(self) -> Message:
+        """返回副本，调用方可以随意修改"""
+        if self._parsed is None:
+            self._parsed = deserialize_message(self.message)
+        return Message(self._parsed)
+
+
+@dataclass(slots=True)
+class _Context:
+    entries: deque[HistoryEntry]
+    loaded: bool = False
+
+
+class ChatHistoryWriter:
+    """批量异步写入 ChatGPTChatHistory，并在内存中为每个会话保留最近的消息"""
+
+    def __init__(
+        self,
+        batch_size: int = _BATCH_SIZE,
+        flush_interval: float = _FLUSH_INTERVAL,
+        queue_size: int = _QUEUE_SIZE,
+        context_size: int = _CONTEXT_SIZE,
+        max_contexts: int = _MAX_CONTEXTS,
+        max_entries: int = _MAX_ENTRIES,
+    ) -> None:
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._queue: asyncio.Queue[ChatGPTChatHistory] | None = None
+        self._queue_size = queue_size
+        self._pending: list[ChatGPTChatHistory] = []
+        """已入队但尚未写入数据库的记录，按时间顺序
+        """
+        self._worker: asyncio.Task | None = None
+        self._write_lock = asyncio.Lock()
+
+        self._context_size = context_size
+        self._max_contexts = max_contexts
+        self._max_entries = max_entries
+        self._contexts: OrderedDict[tuple[str, int], _Context] = OrderedDict()
+        """按最近访问排序的会话缓存，群聊为 ("group", group_id)，私聊为 ("private", user_id)
+        """
+        self._entry_count = 0
+
+    def _ensure_worker(self) -> asyncio.Queue[ChatGPTChatHistory]:
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self._queue_size)
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run())
+        return self._queue
+
+    @staticmethod
+    def _context_key(group_id: int | None, user_id: int | None) -> tuple[str, int]:
+        if group_id:
+            return ("group", group_id)
+        return ("private", user_id)
+
+    async def append(
+        self,
+        user_id: int,
+        group_id: int | None,
+        message: object,
+        target_id: int | None = None,
+        is_bot: bool = False,
+    ) -> ChatGPTChatHistory:
+        """记录一条消息，立即返回，由后台任务批量写入"""
+        record = ChatGPTChatHistory(
+            user_id=user_id,
+            group_id=group_id,
+            target_id=target_id,
+            message=message,
+            is_bot=is_bot,
+            time=timezone.now(),
+        )
+        # 只更新已缓存的会话，未缓存的会话在首次读取时再载入
+        if context := self._contexts.get(self._context_key(group_id, user_id)):
+            self._push(context, HistoryEntry.from_record(record))
+        queue = self._ensure_worker()
+        self._pending.append(record)
+        await queue.put(record)
+        return record
+
+    def _push(self, context: _Context, entry: HistoryEntry) -> None:
+        if len(context.entries) == context.entries.maxlen:
+            self._entry_count -= 1
+        context.entries.append(entry)
+        self._entry_count += 1
+        self._evict()
+
+    def _evict(self) -> None:
+        while self._contexts and (
+            len(self._contexts) > self._max_contexts
+            or self._entry_count > self._max_entries
+        ):
+            _, context = self._contexts.popitem(last=False)
+            self._entry_count -= len(context.entries)
+
+    async def _run(self) -> None:
+        queue = self._queue
+        while True:
+            batch = [await queue.get()]
+            deadline = time.monotonic() + self._flush_interval
+            while len(batch) < self._batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            await self._write(batch)
+            for _ in batch:
+                queue.task_done()
+
+    async def _write(self, batch: list[ChatGPTChatHistory]) -> None:
+        async with self._write_lock:
+            try:
+                # bulk_create 不会触发 pre_save 信号，手动执行以清理消息中的非法字符
+                for record in batch:
+                    await record._pre_save()
+                await ChatGPTChatHistory.bulk_create(batch)
+            except Exception as e:
+                logger.error(f"批量写入对话记录失败，丢弃 {len(batch)} 条: {e}")
+            written = set(map(id, batch))
+            self._pending = [r for r in self._pending if id(r) not in written]
+
+    async def flush(self) -> None:
+        """立即写入全部未落库的记录"""
+        if self._worker is not None:
+            if not self._worker.done() and self._queue is not None:
+                # 等后台任务写完已取出的批次再停止，中途取消会使同一批记录被重复写入
+                await self._queue.join()
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            except Exception as e:
+                logger.error(f"对话记录写入任务异常: {e}")
+            self._worker = None
+        if self._queue is not None:
+            while not self._queue.empty():
+                self._queue.get_nowait()
+                self._queue.task_done()
+        if self._pending:
+            await self._write(list(self._pending))
+
+    def pending(
+        self, group_id: int | None = None, user_id: int | None = None
+    ) -> list[ChatGPTChatHistory]:
+        """获取尚未落库的记录，group_id 为 0 时表示私聊"""
+        if group_id:
+            return [r for r in self._pending if r.group_id == group_id]
+        return [r for r in self._pending if r.user_id == user_id and r.group_id == 0]
+
+    async def _load(
+        self, group_id: int | None, user_id: int | None, size: int
+    ) -> _Context:
+        key = self._context_key(group_id, user_id)
+        if (old := self._contexts.pop(key, None)) is not None:
+            self._entry_count -= len(old.entries)
+        # 先占位，载入期间新写入的消息会直接进入缓存
+        context = self._contexts[key] = _Context(entries=deque(maxlen=size))
+        if group_id:
+            query = ChatGPTChatHistory.filter(group_id=group_id)
+        else:
+            query = ChatGPTChatHistory.filter(user_id=user_id, group_id=0)
+        rows = await query.order_by("-time").limit(size)
+        entries = {
+            entry.key: entry for entry in map(HistoryEntry.from_record, reversed(rows))
+        }
+        # 正在写入的记录可能已经出现在查询结果中
+        for entry in map(
+            HistoryEntry.from_record, self.pending(group_id=group_id, user_id=user_id)
+        ):
+            entries.setdefault(entry.key, entry)
+        for entry in context.entries:
+            entries.setdefault(entry.key, entry)
+        merged = sorted(entries.values(), key=lambda entry: entry.time)
+
+        # 载入期间可能已被淘汰，此时结果只用于本次读取
+        tracked = self._contexts.get(key) is context
+        if tracked:
+            self._entry_count -= len(context.entries)
+        context.entries.clear()
+        context.entries.extend(merged[-size:])
+        context.loaded = True
+        if tracked:
+            self._entry_count += len(context.entries)
+            self._contexts.move_to_end(key)
+            self._evict()
+        return context
+
+    async def get_recent(
+        self, group_id: int | None = None, user_id: int | None = None, limit: int = 12
+    ) -> list[HistoryEntry]:
+        """获取最近 limit 条记录（按时间从旧到新），首次访问时从数据库载入，之后只读内存"""
+        if limit <= 0:
+            return []
+        key = self._context_key(group_id, user_id)
+        context = self._contexts.get(key)
+        if context is None or not context.loaded or context.entries.maxlen < limit:
+            context = await self._load(
+                group_id, user_id, max(limit, self._context_size)
+            )
+        else:
+            self._contexts.move_to_end(key)
+        return list(context.entries)[-limit:]
+
+
+chat_history_writer = ChatHistoryWriter()
+
+
+@pre_close_db
+async def _() -> None:
+    await chat_history_writer.flush()
@@ -1,26 +1,26 @@
 from __future__ import annotations
 
 import re
+from typing import TYPE_CHECKING
 from dataclasses import dataclass
 
 import ujson
 from nonebot.log import logger
-from langchain_openai import ChatOpenAI
 from langchain_core.messages import AIMessage
 from nonebot.adapters.onebot.v11 import Bot, GroupMessageEvent
 
-from migang.core.models import ChatGPTChatHistory
-
 from .settings import ChatAgentSettings
+from .history import HistoryEntry, chat_history_writer
 from .utils import (
     get_user_name,
     uniform_message,
-    deserialize_message,
     message_content_to_text,
     is_langchain_message_payload,
-    deserialize_langchain_messages,
 )
 
+if TYPE_CHECKING:
+    from langchain_openai import ChatOpenAI
+
 _JSON_BLOCK_RE = re.compile(r"\{.*\}", re.DOTALL)
 
 
@@ -118,6 +118,9 @@ class ChatIntentJudge:
         if base_url:
             kwargs["base_url"] = base_url
 
+        # langchain_openai导入较慢，首次使用时导入
+        from langchain_openai import ChatOpenAI
+
         self._llm = ChatOpenAI(**kwargs)
         self._llm_signature = signature
         return self._llm
@@ -137,19 +140,17 @@ class ChatIntentJudge:
         bot: Bot,
         limit: int,
     ) -> str:
-        rows = (
-            await ChatGPTChatHistory.filter(group_id=event.group_id)
-            .order_by("-time")
-            .limit(limit)
+        rows = await chat_history_writer.get_recent(
+            group_id=event.group_id, limit=limit
         )
         if not rows:
             return "无"
 
         lines: list[str] = []
         last_bot_text = "无"
-        for row in reversed(rows):
-            if getattr(row, "is_bot", False):
-                bot_text = self._extract_bot_text(row.message)
+        for row in rows:
+            if row.is_bot:
+                bot_text = self._extract_bot_text(row)
                 if bot_text:
                     lines.append(f"[BOT] 机器人: {bot_text}")
                     last_bot_text = bot_text
@@ -157,7 +158,7 @@ class ChatIntentJudge:
 
             try:
                 user_text = await uniform_message(
-                    deserialize_message(row.message),
+                    row.onebot_message(),
                     group_id=row.group_id,
                     bot=bot,
                 )
@@ -174,9 +175,10 @@ class ChatIntentJudge:
             return "无"
         return f"最近一条机器人消息: {last_bot_text}\n" + "\n".join(lines)
 
-    def _extract_bot_text(self, payload: object) -> str:
+    def _extract_bot_text(self, row: HistoryEntry) -> str:
+        payload = row.message
         if is_langchain_message_payload(payload):
-            messages = deserialize_langchain_messages(payload)
+            messages = row.langchain_messages()
             collected: list[str] = []
             for message in messages:
                 if isinstance(message, AIMessage):
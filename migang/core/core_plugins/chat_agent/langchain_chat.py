@@ -8,11 +8,11 @@ from langgraph.prebuilt import create_react_agent
 from langchain_core.messages import AIMessage, HumanMessage
 from nonebot.adapters.onebot.v11 import Bot, GroupMessageEvent
 
-from migang.core.models import ChatGPTChatHistory
 from migang.core.utils.langchain_tool import search_plugin_tool
 
 from .prompt import build_chat_prompt
 from .settings import ChatAgentSettings
+from .history import chat_history_writer
 from .image_intent import (
     is_explicit_image_tool_query,
     is_general_image_understanding_query,
@@ -28,7 +28,6 @@ from .utils import (
     message_to_model_content,
     is_langchain_message_payload,
     serialize_langchain_messages,
-    deserialize_langchain_messages,
 )
 
 
@@ -139,26 +138,22 @@ class LangChainChatBot:
         # 解析 thread_id
         if thread_id.startswith("group-"):
             group_id = int(thread_id.split("-")[1])
-            chat_histories = (
-                await ChatGPTChatHistory.filter(group_id=group_id)
-                .order_by("-time")
-                .limit(self.memory_short_length)
+            chat_histories = await chat_history_writer.get_recent(
+                group_id=group_id, limit=self.memory_short_length
             )
         elif thread_id.startswith("private-"):
             user_id = int(thread_id.split("-")[1])
-            chat_histories = (
-                await ChatGPTChatHistory.filter(user_id=user_id, group_id=0)
-                .order_by("-time")
-                .limit(self.memory_short_length)
+            chat_histories = await chat_history_writer.get_recent(
+                user_id=user_id, limit=self.memory_short_length
             )
         else:
             chat_histories = []
 
-        for chat in reversed(chat_histories):
+        for chat in chat_histories:
             if chat.target_id:  # 机器人回复
-                if getattr(chat, "is_bot", False):
+                if chat.is_bot:
                     if is_langchain_message_payload(chat.message):
-                        stored_messages = deserialize_langchain_messages(chat.message)
+                        stored_messages = chat.langchain_messages()
                         if not self.multimodal_enabled:
                             stored_messages = self._messages_to_text_only(
                                 stored_messages
@@ -166,7 +161,7 @@ class LangChainChatBot:
                         messages.extend(stored_messages)
                     else:
                         message_content = await message_to_model_content(
-                            deserialize_message(chat.message),
+                            chat.onebot_message(),
                             group_id=chat.group_id,
                             bot=bot,
                             prefix_text="",
@@ -178,7 +173,7 @@ class LangChainChatBot:
                         bot=bot, group_id=chat.group_id, user_id=chat.user_id
                     )
                     message_content = await message_to_model_content(
-                        deserialize_message(chat.message),
+                        chat.onebot_message(),
                         group_id=chat.group_id,
                         bot=bot,
                         prefix_text=f"{user_name}: ",
@@ -190,7 +185,7 @@ class LangChainChatBot:
                     bot=bot, group_id=chat.group_id, user_id=chat.user_id
                 )
                 message_content = await message_to_model_content(
-                    deserialize_message(chat.message),
+                    chat.onebot_message(),
                     group_id=chat.group_id,
                     bot=bot,
                     multimodal_enabled=self.multimodal_enabled,
@@ -374,21 +369,21 @@ class LangChainChatBot:
                     )
 
                 # 记录用户发言
-                await ChatGPTChatHistory(
+                await chat_history_writer.append(
                     user_id=event.user_id,
                     group_id=getattr(event, "group_id", 0),
                     target_id=event.self_id,
                     message=trigger_text,
                     is_bot=False,
-                ).save()
+                )
                 # 记录回复
-                await ChatGPTChatHistory(
+                await chat_history_writer.append(
                     user_id=event.self_id,
                     group_id=getattr(event, "group_id", 0),
                     target_id=event.user_id,
                     message=serialize_langchain_messages(new_messages),
                     is_bot=True,  # 机器人消息
-                ).save()
+                )
 
                 # 成功完成，退出重试循环
                 return
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import re
+import heapq
 from difflib import SequenceMatcher
 from typing import Iterable, Optional
 from dataclasses import field, dataclass
@@ -79,6 +80,40 @@ class PluginIndexEntry:
         return None
 
 
+@dataclass(slots=True)
+class _SearchDocument:
+    """refresh 时为每个插件预先计算好的检索数据"""
+
+    order: int
+    primary_names: list[str]
+    command_texts: list[str]
+    usage: str
+    category: str
+    matchers: list[SequenceMatcher]
+    """seq2 固定为候选文本，查询时只需 set_seq1，复用对候选文本的预处理
+    """
+    candidate_lengths: list[int]
+
+    def fuzzy_bound(self, query_length: int) -> float:
+        """SequenceMatcher.ratio 的上界，只依赖长度"""
+        return max(
+            (
+                2.0 * min(query_length, length) / (query_length + length)
+                for length in self.candidate_lengths
+            ),
+            default=0.0,
+        )
+
+    def fuzzy_ratio(self, normalized_query: str) -> float:
+        best = 0.0
+        for matcher in self.matchers:
+            matcher.set_seq1(normalized_query)
+            if matcher.real_quick_ratio() <= best or matcher.quick_ratio() <= best:
+                continue
+            best = max(best, matcher.ratio())
+        return best
+
+
 @dataclass(slots=True)
 class PluginAvailability:
     available: bool
@@ -96,6 +131,13 @@ class PluginIndex:
     def __init__(self) -> None:
         self._entries: dict[str, PluginIndexEntry] = {}
         self._plugin_signature: tuple[str, ...] = ()
+        self._documents: dict[str, _SearchDocument] = {}
+        self._keyword_index: dict[str, list[str]] = {}
+        """关键词（含 n-gram）到插件名的倒排索引
+        """
+        self._name_index: dict[str, str] = {}
+        """规范化后的插件名、显示名与别名到插件名的映射
+        """
 
     def _get_signature(self) -> tuple[str, ...]:
         return tuple(sorted(plugin.name for plugin in get_plugin_list()))
@@ -179,6 +221,43 @@ class PluginIndex:
 
         self._entries = entries
         self._plugin_signature = signature
+        self._build_search_index()
+
+    def _build_search_index(self) -> None:
+        documents: dict[str, _SearchDocument] = {}
+        keyword_index: dict[str, list[str]] = {}
+        name_index: dict[str, str] = {}
+        for order, entry in enumerate(self._entries.values()):
+            primary_names = [
+                self._normalize_text(name)
+                for name in [entry.plugin_name, entry.display_name, *entry.aliases]
+                if name
+            ]
+            command_texts = [
+                self._normalize_text(command.expression or command.example)
+                for command in entry.commands
+            ]
+            candidates = [
+                self._normalize_text(candidate)
+                for candidate in [entry.searchable_text, *primary_names, *command_texts]
+                if candidate
+            ]
+            documents[entry.plugin_name] = _SearchDocument(
+                order=order,
+                primary_names=primary_names,
+                command_texts=command_texts,
+                usage=self._normalize_text(entry.usage),
+                category=self._normalize_text(entry.category),
+                matchers=[SequenceMatcher(None, "", text) for text in candidates],
+                candidate_lengths=[len(text) for text in candidates],
+            )
+            for keyword in entry.keywords:
+                keyword_index.setdefault(keyword, []).append(entry.plugin_name)
+            for name in [entry.plugin_name, entry.display_name, *entry.aliases]:
+                name_index.setdefault(self._normalize_text(name), entry.plugin_name)
+        self._documents = documents
+        self._keyword_index = keyword_index
+        self._name_index = name_index
 
     def all_entries(self) -> list[PluginIndexEntry]:
         self.refresh()
@@ -205,13 +284,8 @@ class PluginIndex:
             return None
         self.refresh()
         normalized = self._normalize_text(name_or_alias)
-        for entry in self._entries.values():
-            if normalized == self._normalize_text(entry.plugin_name):
-                return entry
-            if normalized == self._normalize_text(entry.display_name):
-                return entry
-            if normalized in {self._normalize_text(alias) for alias in entry.aliases}:
-                return entry
+        if (plugin_name := self._name_index.get(normalized)) is not None:
+            return self._entries[plugin_name]
         plugin_name = plugin_manager.get_plugin_name(name_or_alias)
         if plugin_name:
             return self._entries.get(plugin_name)
@@ -239,25 +313,51 @@ class PluginIndex:
         if not normalized_query:
             return []
 
-        query_keywords = self._keywords_from_text(query)
-        scored: list[PluginSearchMatch] = []
-        for entry in self._entries.values():
-            score = self._score_entry(entry, normalized_query, query_keywords)
+        if limit <= 0:
+            return []
+
+        # 关键词重合数由倒排索引统计，不再逐个插件求交集
+        overlaps: dict[str, int] = {}
+        for keyword in self._keywords_from_text(query):
+            for plugin_name in self._keyword_index.get(keyword, ()):
+                overlaps[plugin_name] = overlaps.get(plugin_name, 0) + 1
+
+        # 先算出不含模糊匹配的分数与模糊匹配的上界，按上界从高到低精确打分，
+        # 上界已不可能进入前 limit 名时提前结束，结果与逐个打分完全一致
+        query_length = len(normalized_query)
+        candidates = []
+        for plugin_name, document in self._documents.items():
+            base = self._score_document(
+                document, normalized_query, overlaps.get(plugin_name, 0)
+            )
+            bound = base + document.fuzzy_bound(query_length) * 20 + 1
+            candidates.append((bound, base, document.order, plugin_name))
+        candidates.sort(key=lambda item: (-item[0], item[2]))
+
+        top: list[tuple[float, int, PluginSearchMatch]] = []
+        for bound, base, order, plugin_name in candidates:
+            if len(top) >= limit and bound < top[0][0]:
+                break
+            document = self._documents[plugin_name]
+            score = base + document.fuzzy_ratio(normalized_query) * 20
             if score <= 0:
                 continue
-            availability = self.get_availability(entry.plugin_name, event)
+            availability = self.get_availability(plugin_name, event)
             if availability.available:
                 score += 1
-            scored.append(
-                PluginSearchMatch(
-                    entry=entry,
-                    score=score,
-                    availability=availability,
-                )
+            match = PluginSearchMatch(
+                entry=self._entries[plugin_name],
+                score=score,
+                availability=availability,
             )
+            # 同分时先出现的插件排在前面，与稳定排序保持一致
+            item = (score, -order, match)
+            if len(top) < limit:
+                heapq.heappush(top, item)
+            elif item[:2] > top[0][:2]:
+                heapq.heapreplace(top, item)
 
-        scored.sort(key=lambda item: item.score, reverse=True)
-        return scored[:limit]
+        return [match for _, _, match in sorted(top, key=lambda i: i[:2], reverse=True)]
 
     def get_availability(
         self, plugin_name: str, event: Optional[MessageEvent]
@@ -547,17 +647,12 @@ class PluginIndex:
             keywords.update(self._keywords_from_text(text))
         return keywords
 
-    def _score_entry(
-        self, entry: PluginIndexEntry, normalized_query: str, query_keywords: set[str]
+    def _score_document(
+        self, document: _SearchDocument, normalized_query: str, overlap: int
     ) -> float:
+        """除模糊匹配外的分数"""
         score = 0.0
-        primary_names = [entry.plugin_name, entry.display_name, *entry.aliases]
-        primary_names = [self._normalize_text(name) for name in primary_names if name]
-        command_texts = [
-            self._normalize_text(command.expression or command.example)
-            for command in entry.commands
-        ]
-
+        primary_names = document.primary_names
         if normalized_query in primary_names:
             score += 100
         if any(normalized_query and normalized_query in name for name in primary_names):
@@ -566,30 +661,14 @@ class PluginIndex:
             score += 24
         if any(
             normalized_query and normalized_query in command_text
-            for command_text in command_texts
+            for command_text in document.command_texts
         ):
             score += 16
-        if normalized_query in self._normalize_text(entry.usage):
+        if normalized_query in document.usage:
             score += 12
-        if normalized_query in self._normalize_text(entry.category):
+        if normalized_query in document.category:
             score += 6
-
-        if query_keywords:
-            overlap = query_keywords & entry.keywords
-            score += len(overlap) * 3
-
-        candidates = [entry.searchable_text, *primary_names, *command_texts]
-        fuzzy = max(
-            (
-                SequenceMatcher(
-                    None, normalized_query, self._normalize_text(candidate)
-                ).ratio()
-                for candidate in candidates
-                if candidate
-            ),
-            default=0.0,
-        )
-        score += fuzzy * 20
+        score += overlap * 3
         return score
 
     def _normalize_usage_text(self, usage: str) -> str:
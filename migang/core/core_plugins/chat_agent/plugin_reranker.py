@@ -2,15 +2,17 @@ from __future__ import annotations
 
 import re
 import json
-from typing import Iterable
+from typing import TYPE_CHECKING, Iterable
 
 from nonebot.log import logger
-from langchain_openai import ChatOpenAI
 from langchain_core.messages import HumanMessage, SystemMessage
 
 from .settings import ChatAgentSettings
 from .plugin_index import PluginSearchMatch
 
+if TYPE_CHECKING:
+    from langchain_openai import ChatOpenAI
+
 _JSON_BLOCK_RE = re.compile(r"\{.*\}", re.DOTALL)
 
 
@@ -119,6 +121,9 @@ class PluginReranker:
         if settings.api_base:
             kwargs["base_url"] = settings.api_base
 
+        # langchain_openai导入较慢，首次使用时导入
+        from langchain_openai import ChatOpenAI
+
         self._llm = ChatOpenAI(**kwargs)
         self._llm_signature = signature
         return self._llm
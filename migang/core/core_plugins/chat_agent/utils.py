@@ -9,7 +9,6 @@ from typing import Any, Dict, List, Tuple
 from urllib.parse import unquote, urlparse
 
 import anyio
-import httpx
 from aiocache import cached
 from nonebot.log import logger
 from langchain_core.messages import BaseMessage, messages_to_dict, messages_from_dict
@@ -22,6 +21,7 @@ from nonebot.adapters.onebot.v11 import (
 )
 
 from migang.core import get_config
+from migang.utils.http import http_client
 from migang.core.models import ChatGPTChatHistory
 from migang.core.exception import ConfigNoExistError
 
@@ -138,7 +138,7 @@ async def _resolve_image_file_uri(seg: MessageSegment, bot: Bot | None = None) -
 
     if url_value:
         try:
-            async with httpx.AsyncClient(timeout=15) as client:
+            async with http_client(timeout=15) as client:
                 response = await client.get(url_value)
                 response.raise_for_status()
                 mime_type = response.headers.get("content-type", "image/png").split(
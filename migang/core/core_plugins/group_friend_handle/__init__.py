@@ -31,7 +31,7 @@ from migang.core.manager import request_manager, group_bot_manager, permission_m
 from .data_source import build_request_img
 
 require("nonebot_plugin_htmlrender")
-from nonebot_plugin_htmlrender import md_to_pic
+from migang.utils.render import md_to_pic
 
 __plugin_meta__ = PluginMetadata(
     name="好友与群邀请退群等事件处理",
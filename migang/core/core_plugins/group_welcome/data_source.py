@@ -8,13 +8,15 @@ import aiofiles
 from pydantic import TypeAdapter
 from nonebot.adapters.onebot.v11 import Message, MessageSegment
 
+from migang.utils.http import http_client
+
 data_dir = Path("data/group_welcome")
 data_dir.mkdir(parents=True, exist_ok=True)
 
 
 # https://github.com/noneplugin/nonebot-plugin-chatrecorder
 async def cache_file(msg: Message):
-    async with httpx.AsyncClient() as client:
+    async with http_client() as client:
         await asyncio.gather(
             *[cache_image_url(seg, client) for seg in msg if seg.type == "image"]
         )
@@ -3,10 +3,8 @@
 
 import re
 from io import BytesIO
-from pathlib import Path
 from typing import Set, List, Union
 
-import anyio
 from pil_utils import text2image
 from nonebot.params import CommandArg
 from nonebot.plugin import PluginMetadata
@@ -35,15 +33,7 @@ from nonebot.adapters.onebot.v11 import (
 from migang.core.manager import user_manager, group_manager, plugin_manager
 
 from .web import create_help_token
-from .data_source import (
-    USER_HELP_PATH,
-    GROUP_HELP_PATH,
-    GROUP_TASK_PATH,
-    draw_usage,
-    get_help_image,
-    get_task_image,
-    get_plugin_help,
-)
+from .data_source import draw_usage, get_help_image, get_task_image, get_plugin_help
 
 require("nonebot_plugin_htmlrender")
 
@@ -78,14 +68,11 @@ async def _(bot: Bot, event: MessageEvent, args: Message = CommandArg()):
     """
     args = args.extract_plain_text()
     if not args:
-        image_file: Path
         group_id, user_id = None, None
         if isinstance(event, GroupMessageEvent):
             group_id = event.group_id
-            image_file = GROUP_HELP_PATH / f"{group_id}.png"
         elif isinstance(event, PrivateMessageEvent):
             user_id = event.user_id
-            image_file = USER_HELP_PATH / f"{user_id }.png"
 
         # 生成可访问网页的临时 token
         token = create_help_token(
@@ -105,9 +92,6 @@ async def _(bot: Bot, event: MessageEvent, args: Message = CommandArg()):
             base = ""
         url = f"{base}/help?t={token}"
 
-        if image_file.exists():
-            await simple_help.send(MessageSegment.image(image_file))
-            await simple_help.finish(f"帮助网页：{url}")
         img = await get_help_image(
             group_id=group_id,
             user_id=user_id,
@@ -121,8 +105,6 @@ async def _(bot: Bot, event: MessageEvent, args: Message = CommandArg()):
         )
         await simple_help.send(MessageSegment.image(img))
         await simple_help.send(f"帮助网页：{url}")
-        async with await anyio.open_file(image_file, "wb") as f:
-            await f.write(img)
     else:
         if help_ := get_plugin_help(args):
             await simple_help.send(await draw_usage(help_))
@@ -132,13 +114,8 @@ async def _(bot: Bot, event: MessageEvent, args: Message = CommandArg()):
 
 @task_help.handle()
 async def _(event: GroupMessageEvent):
-    image_file = GROUP_TASK_PATH / f"{event.group_id}.png"
-    if image_file.exists():
-        await task_help.finish(MessageSegment.image(image_file))
     img = await get_task_image(event.group_id)
     await task_help.send(MessageSegment.image(img))
-    async with await anyio.open_file(image_file, "wb") as f:
-        await f.write(img)
 
 
 @command_list.handle()
@@ -12,7 +12,7 @@ from nonebot.utils import run_sync
 from pil_utils import BuildImage, text2image
 from nonebot.adapters.onebot.v11 import MessageSegment
 
-from migang.core.path import DATA_PATH
+from migang.core.utils.render_cache import render_cache
 from migang.core.manager import (
     PluginType,
     PluginManager,
@@ -23,20 +23,7 @@ from migang.core.manager import (
 )
 
 require("nonebot_plugin_htmlrender")
-from nonebot_plugin_htmlrender import md_to_pic, html_to_pic, template_to_pic
-
-USER_HELP_PATH = DATA_PATH / "core" / "help" / "user_help_image"
-GROUP_HELP_PATH = DATA_PATH / "core" / "help" / "group_help_image"
-GROUP_TASK_PATH = DATA_PATH / "core" / "help" / "group_task_image"
-USER_HELP_PATH.mkdir(exist_ok=True, parents=True)
-GROUP_HELP_PATH.mkdir(exist_ok=True, parents=True)
-GROUP_TASK_PATH.mkdir(exist_ok=True, parents=True)
-for img in GROUP_HELP_PATH.iterdir():
-    img.unlink()
-for img in USER_HELP_PATH.iterdir():
-    img.unlink()
-for img in GROUP_TASK_PATH.iterdir():
-    img.unlink()
+from migang.utils.render import md_to_pic, html_to_pic, template_to_pic
 
 TEMPLATE_PATH = Path(__file__).parent / "template"
 
@@ -127,6 +114,12 @@ async def draw_usage(usage: str) -> Optional[MessageSegment]:
 
 async def build_usage_png(usage: str) -> bytes:
     """将使用说明渲染为 PNG 字节，供图片与网页复用"""
+    return await render_cache.get(
+        render_cache.key("usage", usage), lambda: _render_usage_png(usage)
+    )
+
+
+async def _render_usage_png(usage: str) -> bytes:
     help_img = text2image(
         text=usage,
         fontname="Yozai",
@@ -240,7 +233,7 @@ async def build_usage_png(usage: str) -> bytes:
             fontname="HONOR Sans CN",
             fontsize=40,
         )
-        return bk.save_png()
+        return bk.save_png().getvalue()
 
     return await _draw()
 
@@ -370,11 +363,25 @@ def get_help_menu_context(
 async def _build_html_image(
     group_id: Optional[int], user_id: Optional[int], super_user: bool = False
 ) -> bytes:
-    """生成帮助图片（基于模板上下文）"""
+    """生成帮助图片（基于模板上下文），内容不变时复用上次的渲染结果"""
     ctx = get_help_menu_context(
         group_id=group_id, user_id=user_id, super_user=super_user
     )
-    pic = await template_to_pic(
+    # 颜色每次随机，不影响内容，不参与key
+    key = render_cache.key(
+        "help_menu",
+        ctx["group"],
+        ctx["column_count"],
+        [
+            (menu["name"], [(item.plugin_name, item.status) for item in menu["items"]])
+            for menu in ctx["plugin_list"]
+        ],
+    )
+    return await render_cache.get(key, lambda: _render_help_menu(ctx), tag=group_id)
+
+
+async def _render_help_menu(ctx: Dict) -> bytes:
+    return await template_to_pic(
         template_path=TEMPLATE_PATH / "menu",
         template_name="migang_menu.html",
         templates=ctx,
@@ -385,7 +392,6 @@ async def _build_html_image(
         },
         device_scale_factor=None,
     )
-    return pic
 
 
 class TaskMenuItem(BaseModel):
@@ -395,7 +401,7 @@ class TaskMenuItem(BaseModel):
 
 
 async def get_task_image(group_id: int) -> bytes:
-    """生成群被动图片
+    """生成群被动图片，内容不变时复用上次的渲染结果
 
     Args:
         group_id (int): _description_
@@ -416,7 +422,17 @@ async def get_task_image(group_id: int) -> bytes:
             ),
         )
         task_list.append(item)
-    pic = await template_to_pic(
+    key = render_cache.key(
+        "task_menu",
+        [(item.name, item.group_status, item.global_status) for item in task_list],
+    )
+    return await render_cache.get(
+        key, lambda: _render_task_menu(task_list), tag=group_id
+    )
+
+
+async def _render_task_menu(task_list: List[TaskMenuItem]) -> bytes:
+    return await template_to_pic(
         template_path=TEMPLATE_PATH / "task_menu",
         template_name="task_menu.html",
         templates={"task_list": task_list},
@@ -427,4 +443,3 @@ async def get_task_image(group_id: int) -> bytes:
         },
         device_scale_factor=None,
     )
-    return pic
@@ -1,6 +1,7 @@
 from . import (  # noqa
     api_hook,
     orm_hook,
+    latency_hook,
     event_pre_hook,
     group_event_hook,
     poke_notify_hook,
@@ -1,35 +1,139 @@
 import asyncio
+import hashlib
+from base64 import b64encode
+from collections import OrderedDict
 from urllib.parse import unquote, urlparse
-from typing import Any, Dict, Iterable, Optional
+from typing import Any, Dict, Tuple, Iterable, Optional
 
 import anyio
+from nonebot import get_driver
 from nonebot.adapters import Bot
+from nonebot.matcher import current_matcher
 from nonebot.adapters.onebot.v11 import Message, MessageSegment
 
-from migang.core.models import UserProperty
-
-
-async def _local_to_bytes(path: str) -> bytes:
-    async with await anyio.open_file(unquote(urlparse(path).path), "rb") as f:
-        return await f.read()
-
-
-async def _gen_new_seg(type_: str, path: str) -> MessageSegment:
-    if type_ == "image":
-        return MessageSegment.image(await _local_to_bytes(path=path))
-    elif type_ == "record":
-        return MessageSegment.record(await _local_to_bytes(path=path))
+from migang.core.manager import nickname_manager
+from migang.core.utils.latency import latency_recorder
+
+# OneBot实现与bot在同一文件系统时可直接发送file://路径
+_PASSTHROUGH: bool = getattr(get_driver().config, "onebot_local_file", False)
+# 编码后内容的缓存上限，超过单条上限的文件不缓存
+_CACHE_SIZE = 64 * 1024 * 1024
+_CACHE_ITEM_SIZE = 8 * 1024 * 1024
+# 同时读取的文件数
+_READ_CONCURRENCY = 8
+
+_SEND_API = {"send_msg", "send_group_msg", "send_private_msg"}
+_FORWARD_API = {
+    "send_forward_msg",
+    "send_group_forward_msg",
+    "send_private_forward_msg",
+}
+
+
+class _MediaCache:
+    """以文件内容的哈希为key缓存base64编码结果，同一文件只读取与编码一次"""
+
+    def __init__(self, max_size: int, max_item_size: int, concurrency: int) -> None:
+        self.__max_size = max_size
+        self.__max_item_size = max_item_size
+        self.__size = 0
+        self.__payload: OrderedDict[str, str] = OrderedDict()
+        """{内容哈希: base64://...}，按最近使用排序
+        """
+        self.__digest: Dict[Tuple[str, int, int], str] = {}
+        """{(路径, 修改时间, 大小): 内容哈希}，文件变化后自然失效
+        """
+        self.__loading: Dict[Tuple[str, int, int], asyncio.Future] = {}
+        """正在读取的文件，重复请求等待同一次读取
+        """
+        self.__semaphore = asyncio.Semaphore(concurrency)
+
+    async def get(self, file: str) -> str:
+        """获取file://对应的base64://内容
+
+        Args:
+            file (str): file://路径
+
+        Returns:
+            str: base64://内容
+        """
+        path = unquote(urlparse(file).path)
+        stat = await anyio.Path(path).stat()
+        key = (path, stat.st_mtime_ns, stat.st_size)
+        if (digest := self.__digest.get(key)) and (
+            payload := self.__payload.get(digest)
+        ):
+            self.__payload.move_to_end(digest)
+            return payload
+        if future := self.__loading.get(key):
+            return await asyncio.shield(future)
+        future = self.__loading[key] = asyncio.get_running_loop().create_future()
+        try:
+            payload = await self.__load(key)
+        except BaseException as e:
+            # 读取的任务被取消时，等待者得到普通的异常而不是随之取消
+            future.set_exception(
+                e if isinstance(e, Exception) else RuntimeError("读取已被取消")
+            )
+            # 没有等待者时避免未取出异常的警告
+            future.exception()
+            raise
+        else:
+            future.set_result(payload)
+            return payload
+        finally:
+            del self.__loading[key]
+
+    async def __load(self, key: Tuple[str, int, int]) -> str:
+        async with self.__semaphore:
+            async with await anyio.open_file(key[0], "rb") as f:
+                data = await f.read()
+        digest = hashlib.blake2b(data, digest_size=16).hexdigest()
+        self.__digest[key] = digest
+        if payload := self.__payload.get(digest):
+            # 不同路径的相同内容
+            self.__payload.move_to_end(digest)
+            return payload
+        payload = f"base64://{b64encode(data).decode()}"
+        if len(payload) <= self.__max_item_size:
+            self.__payload[digest] = payload
+            self.__size += len(payload)
+            self.__evict()
+        return payload
+
+    def __evict(self) -> None:
+        while self.__size > self.__max_size:
+            _, payload = self.__payload.popitem(last=False)
+            self.__size -= len(payload)
+        if len(self.__digest) > 4 * len(self.__payload) + 64:
+            # 清理指向已淘汰内容的索引
+            self.__digest = {
+                key: digest
+                for key, digest in self.__digest.items()
+                if digest in self.__payload
+            }
+
+
+_media_cache = _MediaCache(
+    max_size=_CACHE_SIZE,
+    max_item_size=_CACHE_ITEM_SIZE,
+    concurrency=_READ_CONCURRENCY,
+)
+
+
+async def _gen_new_seg(type_: str, data: Dict[str, Any]) -> MessageSegment:
+    return MessageSegment(type_, {**data, "file": await _media_cache.get(data["file"])})
 
 
 async def _replace_res(
-    raw_message: Message, index: int, type_: str, data: MessageSegment
+    raw_message: Message, index: int, type_: str, data: Dict[str, Any]
 ) -> None:
-    raw_message[index] = await _gen_new_seg(type_, data["file"])
+    raw_message[index] = await _gen_new_seg(type_, data)
 
 
 # 当content为MessageSegment时替换整个content
 async def _replace_node(node: MessageSegment, data: MessageSegment) -> None:
-    node.data["content"] = await _gen_new_seg(data.type, data.data["file"])
+    node.data["content"] = await _gen_new_seg(data.type, data.data)
 
 
 def _is_need_process(seg: MessageSegment) -> bool:
@@ -49,30 +153,18 @@ async def handle_api_result(
     if result is None:
         return
     # 将昵称用昵称系统替换，保留群员卡片
-    if (
-        (api == "get_group_member_info" or api == "get_stranger_info")
-        and (
-            name := await UserProperty.filter(user_id=data["user_id"])
-            .first()
-            .values_list("nickname")
-        )
-        and (name[0] is not None)
+    if (api == "get_group_member_info" or api == "get_stranger_info") and (
+        name := await nickname_manager.get_nickname(user_id=int(data["user_id"]))
     ):
-        result["nickname"] = name[0]
+        result["nickname"] = name
 
 
-@Bot.on_calling_api
-async def _(
-    bot: Bot,
-    api: str,
-    data: Dict[str, Any],
-):
-    # 将本地文件转换成byte后发出
-    if api == "send_msg" or api == "send_group_msg" or api == "send_private_msg":
+async def _replace_local_media(api: str, data: Dict[str, Any]) -> None:
+    if api in _SEND_API:
         if isinstance(data["message"], MessageSegment):
             if _is_need_process(data["message"]):
                 data["message"] = await _gen_new_seg(
-                    data["message"].type, data["message"].data["file"]
+                    data["message"].type, data["message"].data
                 )
         elif isinstance(data["message"], str):
             pass
@@ -84,11 +176,7 @@ async def _(
                     if _is_need_process(seg)
                 ]
             )
-    elif (
-        api == "send_forward_msg"
-        or api == "send_group_forward_msg"
-        or api == "send_private_forward_msg"
-    ):
+    else:
         tasks = []
         for msg in data["messages"]:
             if isinstance(msg, dict):
@@ -104,3 +192,17 @@ async def _(
                     if _is_need_process(seg)
                 ]
         await asyncio.gather(*tasks)
+
+
+@Bot.on_calling_api
+async def _(
+    bot: Bot,
+    api: str,
+    data: Dict[str, Any],
+):
+    # 将本地文件转换成base64后发出
+    if _PASSTHROUGH or (api not in _SEND_API and api not in _FORWARD_API):
+        return
+    matcher = current_matcher.get(None)
+    with latency_recorder.timer("api_media", matcher.plugin_name if matcher else None):
+        await _replace_local_media(api, data)
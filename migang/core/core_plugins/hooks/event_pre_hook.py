@@ -15,10 +15,12 @@ from nonebot.adapters.onebot.v11 import (
 )
 
 from migang.core.manager import group_bot_manager
+from migang.core.utils.latency import latency_recorder
 
 
 # 群聊环境下群机器人检查
 @event_preprocessor
+@latency_recorder.timed("event_preprocessor")
 async def _(
     event: Union[
         GroupAdminNoticeEvent,
@@ -37,6 +39,7 @@ async def _(
 
 # 群聊环境下群机器人检查
 @event_preprocessor
+@latency_recorder.timed("event_preprocessor")
 async def _(
     bot: Bot,
     event: GroupMessageEvent,
@@ -58,6 +61,7 @@ async def _(
 
 # 过滤掉所有转发的消息
 @event_preprocessor
+@latency_recorder.timed("event_preprocessor")
 async def _(event: MessageEvent):
     if event.message and event.message[0].type == "forward":
         raise IgnoredException("拒绝处理转发消息")
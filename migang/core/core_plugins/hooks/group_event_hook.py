@@ -12,7 +12,8 @@ from nonebot.adapters.onebot.v11 import (
     GroupIncreaseNoticeEvent,
 )
 
-from migang.core.manager import user_manager, group_manager, group_bot_manager
+from migang.core.utils.latency import latency_recorder
+from migang.core.manager import AccessDecision, user_manager, group_manager
 
 from .utils import check_event
 
@@ -20,6 +21,7 @@ _ignore_plugins = set(["switch_bot"])
 
 
 @run_preprocessor
+@latency_recorder.timed("run_preprocessor")
 async def _(
     matcher: Matcher,
     event: Union[
@@ -33,13 +35,14 @@ async def _(
 ):
     if matcher.plugin_name in _ignore_plugins:
         return
-    if not group_manager.check_group_plugin_status(
-        plugin_name=matcher.plugin_name, group_id=event.group_id
-    ):
+    # 群状态与个人权限合并为一次查表
+    decision = group_manager.check_plugin_access(
+        plugin_name=matcher.plugin_name,
+        group_id=event.group_id,
+        user_permission=user_manager.get_user_permission(user_id=event.user_id),
+    )
+    if decision is AccessDecision.group_denied:
         raise IgnoredException("群插件不可用")
-    # 检测个人权限
-    if not user_manager.check_user_plugin_status(
-        plugin_name=matcher.plugin_name, user_id=event.user_id
-    ):
+    if decision is AccessDecision.user_denied:
         raise IgnoredException("个人权限不足")
     await check_event(matcher=matcher, event=event)
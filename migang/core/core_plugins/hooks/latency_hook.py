@@ -0,0 +1,23 @@
+"""记录matcher从通过前置检查到处理完成的耗时
+"""
+from typing import Optional
+from time import perf_counter
+
+from nonebot.typing import T_State
+from nonebot.matcher import Matcher
+from nonebot.message import run_preprocessor, run_postprocessor
+
+from migang.core.utils.latency import latency_recorder
+
+_START_KEY = "_migang_latency_start"
+
+
+@run_preprocessor
+async def _(state: T_State):
+    state[_START_KEY] = perf_counter()
+
+
+@run_postprocessor
+async def _(matcher: Matcher, exception: Optional[Exception]):
+    if (start := matcher.state.get(_START_KEY)) is not None:
+        latency_recorder.record("matcher", matcher.plugin_name, perf_counter() - start)
@@ -5,22 +5,29 @@ from nonebot.message import run_preprocessor
 from nonebot.exception import IgnoredException
 from nonebot.adapters.onebot.v11 import PokeNotifyEvent
 
-from migang.core.manager import user_manager, group_manager
+from migang.core.utils.latency import latency_recorder
+from migang.core.manager import AccessDecision, user_manager, group_manager
 
 from .utils import check_event
 
 
 @run_preprocessor
+@latency_recorder.timed("run_preprocessor")
 async def _(
     matcher: Matcher,
     event: PokeNotifyEvent,
 ):
     if event.group_id is not None:
-        if not group_manager.check_group_plugin_status(
-            plugin_name=matcher.plugin_name, group_id=event.group_id
-        ):
+        decision = group_manager.check_plugin_access(
+            plugin_name=matcher.plugin_name,
+            group_id=event.group_id,
+            user_permission=user_manager.get_user_permission(user_id=event.user_id),
+        )
+        if decision is AccessDecision.group_denied:
             raise IgnoredException("群插件不可用")
-    if not user_manager.check_user_plugin_status(
+        if decision is AccessDecision.user_denied:
+            raise IgnoredException("个人权限不足或插件未启用")
+    elif not user_manager.check_user_plugin_status(
         plugin_name=matcher.plugin_name, user_id=event.user_id
     ):
         raise IgnoredException("个人权限不足或插件未启用")
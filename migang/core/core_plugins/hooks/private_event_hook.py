@@ -6,11 +6,13 @@ from nonebot.exception import IgnoredException
 from nonebot.adapters.onebot.v11 import PrivateMessageEvent, FriendRecallNoticeEvent
 
 from migang.core.manager import user_manager
+from migang.core.utils.latency import latency_recorder
 
 from .utils import check_event
 
 
 @run_preprocessor
+@latency_recorder.timed("run_preprocessor")
 async def _(
     matcher: Matcher,
     event: Union[
@@ -2,11 +2,13 @@
 """
 
 import asyncio
+from typing import Any, List, Callable, Awaitable
 
 from nonebot import logger, get_driver
 from nonebot.utils import run_sync, is_coroutine_callable
 
 from migang.core.utils import config_operation
+from migang.core.utils.startup_profile import startup_profiler
 
 from .ssl_fix import *
 from .init_font import load_font
@@ -18,38 +20,45 @@ from .init_plugin_count import init_plugin_count
 from .init_plugin_config import init_plugin_config
 
 
+async def _stage(name: str, factory: Callable[[], Awaitable[Any]]) -> Any:
+    # 在阶段内创建协程与任务，其中的文件读写才会计入该阶段
+    with startup_profiler.stage(name):
+        return await factory()
+
+
+def _run_funcs(funcs: List[Callable]) -> Awaitable[List[Any]]:
+    return asyncio.gather(
+        *[func() if is_coroutine_callable(func) else run_sync(func)() for func in funcs]
+    )
+
+
 @get_driver().on_startup
 async def _():
     # 执行初始化前的函数
-    cors = [
-        func() if is_coroutine_callable(func) else run_sync(func)()
-        for func in config_operation._pre_init_manager_func
-    ]
-    if cors:
+    if funcs := config_operation._pre_init_manager_func:
         try:
-            await asyncio.gather(*cors)
+            await _stage("pre_init_manager", lambda: _run_funcs(funcs))
         except Exception as e:
             logger.error(f"执行初始化前的函数出错：{e}")
 
     await asyncio.gather(
         *[
-            init_plugin_info(),
-            init_plugin_config(),
-            init_plugin_count(),
-            init_plugin_task(),
-            load_font(),
+            _stage("init_plugin_info", init_plugin_info),
+            _stage("init_plugin_config", init_plugin_config),
+            _stage("init_plugin_count", init_plugin_count),
+            _stage("init_plugin_task", init_plugin_task),
+            _stage("load_font", load_font),
         ]
     )
-    init_plugin_cd()
-    check_command()
+    with startup_profiler.stage("init_plugin_cd"):
+        init_plugin_cd()
+    with startup_profiler.stage("check_command"):
+        check_command()
 
     # 执行初始化后的函数
-    cors = [
-        func() if is_coroutine_callable(func) else run_sync(func)()
-        for func in config_operation._post_init_manager_func
-    ]
-    if cors:
+    if funcs := config_operation._post_init_manager_func:
         try:
-            await asyncio.gather(*cors)
+            await _stage("post_init_manager", lambda: _run_funcs(funcs))
         except Exception as e:
             logger.error(f"执行初始化后的函数出错：{e}")
+    startup_profiler.finish()
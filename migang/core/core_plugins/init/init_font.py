@@ -1,13 +1,21 @@
-from matplotlib import font_manager
+from nonebot.utils import run_sync
 
 from migang.core import FONT_PATH
 
 
-async def load_font():
+@run_sync
+def _load_font():
+    # matplotlib导入较慢，仅在此处使用，在线程中导入以免阻塞启动
+    from matplotlib import font_manager
+
     # 一次性加载字体文件夹下的所有字体
     for font in font_manager.findSystemFonts((FONT_PATH,)):
         font_manager.fontManager.addfont(font)
 
+
+async def load_font():
+    await _load_font()
+
     # 生成字体文件与字体名的索引，方便寻找
     # font_index_path = FONT_PATH / "font_index.json"  # 字体文件和字体名的对应，方便找
     # font_index = await async_load_data(font_index_path)
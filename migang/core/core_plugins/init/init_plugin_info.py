@@ -1,5 +1,5 @@
 import asyncio
-from typing import Any, Dict, Iterable, Optional
+from typing import Any, Dict, List, Iterable, Optional
 
 import aiohttp
 from nonebot.log import logger
@@ -38,6 +38,8 @@ async def init_plugin_info():
     )
     custom_usage_modified = False
     custom_usage = await async_load_data(CUSTOM_USAGE_FILE)
+    added_names: List[str] = []
+    add_cors = []
 
     for plugin in plugins:
         if plugin.metadata and plugin.metadata.type == "library":
@@ -133,27 +135,34 @@ async def init_plugin_info():
             else:
                 group_permission = perm
 
-        if await plugin_manager.add(
-            plugin_name=plugin_name,
-            name=name,
-            aliases=plugin.module.__getattribute__("__plugin_aliases__")
-            if hasattr(plugin.module, "__plugin_aliases__")
-            else [],
-            author=author,
-            version=version,
-            category=plugin.module.__getattribute__("__plugin_category__")
-            if hasattr(plugin.module, "__plugin_category__")
-            else "功能",
-            usage=usage,
-            default_status=plugin.module.__getattribute__("__default_status__")
-            if hasattr(plugin.module, "__default_status__")
-            else True,
-            hidden=hidden,
-            group_permission=group_permission,
-            user_permission=user_permission,
-            always_on=always_on,
-            plugin_type=plugin_type,
-        ):
+        added_names.append(plugin_name)
+        add_cors.append(
+            plugin_manager.add(
+                plugin_name=plugin_name,
+                name=name,
+                aliases=plugin.module.__getattribute__("__plugin_aliases__")
+                if hasattr(plugin.module, "__plugin_aliases__")
+                else [],
+                author=author,
+                version=version,
+                category=plugin.module.__getattribute__("__plugin_category__")
+                if hasattr(plugin.module, "__plugin_category__")
+                else "功能",
+                usage=usage,
+                default_status=plugin.module.__getattribute__("__default_status__")
+                if hasattr(plugin.module, "__default_status__")
+                else True,
+                hidden=hidden,
+                group_permission=group_permission,
+                user_permission=user_permission,
+                always_on=always_on,
+                plugin_type=plugin_type,
+            )
+        )
+
+    # 新插件需要写入文件，并发执行
+    for plugin_name, added in zip(added_names, await asyncio.gather(*add_cors)):
+        if added:
             logger.info(f"已将插件 {plugin_name} 加入插件控制")
 
     for i, e in enumerate(await plugin_manager.init()):
@@ -1,3 +1,4 @@
+import asyncio
 from typing import Iterable
 
 from nonebot.log import logger
@@ -11,6 +12,8 @@ from .utils import get_plugin_list
 async def init_plugin_task():
     plugins = get_plugin_list()
     count = 0
+    added_plugins = []
+    add_cors = []
     for plugin in plugins:
         if not hasattr(plugin.module, "__plugin_task__"):
             continue
@@ -28,9 +31,17 @@ async def init_plugin_task():
             for item in task_items:
                 if item.permission is None:
                     item.permission = permission
-            await task_manager.add(task_items)
         except Exception as e:
             logger.error(f"无法将插件 {plugin.name} 中的任务加入任务控制：{e}")
+            continue
+        added_plugins.append(plugin)
+        add_cors.append(task_manager.add(task_items))
+    # 新任务需要写入文件，并发执行
+    for plugin, e in zip(
+        added_plugins, await asyncio.gather(*add_cors, return_exceptions=True)
+    ):
+        if e:
+            logger.error(f"无法将插件 {plugin.name} 中的任务加入任务控制：{e}")
     for i, e in enumerate(await task_manager.init()):
         if e:
             logger.error(f"无法将插件 {plugins[i].name} 中的任务加入任务控制：{e}")
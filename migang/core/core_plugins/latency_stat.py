@@ -0,0 +1,81 @@
+import ujson as json
+from nonebot.params import CommandArg
+from nonebot.permission import SUPERUSER
+from nonebot import get_driver, on_command
+from nonebot.plugin import PluginMetadata
+from nonebot.adapters.onebot.v11 import Message
+
+from migang.core.path import DATA_PATH
+from migang.utils.render import render_pool
+from migang.core.utils.latency import latency_recorder
+from migang.core.utils.startup_profile import startup_profiler
+from migang.core.utils.file_operation import async_atomic_write
+
+__plugin_hidden__ = True
+__plugin_always_on__ = True
+__plugin_meta__ = PluginMetadata(
+    name="耗时统计_",
+    description="查看事件处理各阶段的耗时",
+    usage="""
+usage：
+    统计event_preprocessor，run_preprocessor，cd，count，nickname，matcher，api_media，render_wait，render各阶段耗时
+    指令：
+        耗时统计 [插件名/阶段名]
+        耗时统计 重置
+        耗时统计 渲染：查看渲染页面池的排队情况
+        耗时统计 启动：查看启动时各插件的导入耗时与初始化各阶段的耗时
+    完整数据同时写入data/core/latency.json
+""".strip(),
+    type="application",
+    supported_adapters={"~onebot.v11"},
+)
+
+DUMP_FILE = DATA_PATH / "core" / "latency.json"
+_SHOW_COUNT = 15
+
+latency_stat = on_command("耗时统计", permission=SUPERUSER, priority=1, block=True)
+
+
+async def dump_latency() -> None:
+    await async_atomic_write(
+        DUMP_FILE,
+        json.dumps(latency_recorder.summary(), ensure_ascii=False, indent=4),
+    )
+
+
+@latency_stat.handle()
+async def _(arg: Message = CommandArg()):
+    target = arg.extract_plain_text().strip()
+    if target == "重置":
+        latency_recorder.reset()
+        await latency_stat.finish("耗时统计已重置")
+    if target == "启动":
+        await latency_stat.finish(startup_profiler.report())
+    if target == "渲染":
+        await latency_stat.finish(
+            "\n".join(f"{k}: {v}" for k, v in render_pool.stats().items())
+        )
+    stats = latency_recorder.summary()
+    if target:
+        stats = [
+            item
+            for item in stats
+            if item["stage"] == target or item["plugin"] == target
+        ]
+    await dump_latency()
+    if not stats:
+        await latency_stat.finish("暂无数据")
+    lines = [f"{'阶段':<8} {'插件':<12} 次数 p50/p95/p99(ms)"]
+    for item in stats[:_SHOW_COUNT]:
+        lines.append(
+            f"{item['stage']:<8} {item['plugin']:<12} {item['count']} "
+            f"{item['p50'] * 1000:.1f}/{item['p95'] * 1000:.1f}/{item['p99'] * 1000:.1f}"
+        )
+    if len(stats) > _SHOW_COUNT:
+        lines.append(f"...共{len(stats)}项，完整数据见{DUMP_FILE}")
+    await latency_stat.send("\n".join(lines))
+
+
+@get_driver().on_shutdown
+async def _():
+    await dump_latency()
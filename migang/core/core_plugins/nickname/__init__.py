@@ -9,8 +9,8 @@ from nonebot.plugin import PluginMetadata
 from nonebot import on_command, on_fullmatch
 from nonebot.adapters.onebot.v11 import Bot, Message, MessageEvent
 
-from migang.core.models import UserProperty
 from migang.core import ConfigItem, get_config
+from migang.core.manager import nickname_manager
 
 __plugin_meta__ = PluginMetadata(
     name="昵称系统",
@@ -79,11 +79,7 @@ async def _(bot: Bot, event: MessageEvent, args: Message = CommandArg()):
             else:
                 ret += ch
         await set_nickname.finish(f"好哦，以后就叫你{ret}，诶，昵称太长了好像没记住...（昵称不能超过10个字）")
-    if user := await UserProperty.filter(user_id=event.user_id).first():
-        user.nickname = name
-        await user.save(update_fields=["nickname"])
-    else:
-        await UserProperty(user_id=event.user_id, nickname=name).save()
+    await nickname_manager.set_nickname(user_id=event.user_id, nickname=name)
     await set_nickname.send(
         choice(
             [
@@ -100,12 +96,7 @@ async def _(bot: Bot, event: MessageEvent, args: Message = CommandArg()):
 @query_nickname.handle()
 async def _(bot: Bot, event: MessageEvent):
     bot_nickname = list(bot.config.nickname)[0]
-    if (
-        name := await UserProperty.filter(user_id=event.user_id)
-        .first()
-        .values_list("nickname")
-    ) and name[0] != None:
-        name = name[0]
+    if name := await nickname_manager.get_nickname(user_id=event.user_id):
         await query_nickname.finish(
             choice(
                 [
@@ -127,21 +118,20 @@ async def _(bot: Bot, event: MessageEvent):
 
 @cancel_nickname.handle()
 async def _(bot: Bot, event: MessageEvent):
-    user = await UserProperty.filter(user_id=event.user_id).first()
-    if not user or not user.nickname:
+    nickname = await nickname_manager.get_nickname(user_id=event.user_id)
+    if not nickname:
         await cancel_nickname.finish("你还没有起昵称哦~", at_sender=True)
     bot_nickname = list(bot.config.nickname)[0]
     await cancel_nickname.send(
         choice(
             [
-                f"呜..{bot_nickname}睡一觉就会忘记的..和梦一样..{user.nickname}",
-                f"我知道了..{user.nickname}..",
-                f"是{bot_nickname}哪里做的不好嘛..好吧..晚安{user.nickname}",
-                f"呃，{user.nickname}，下次我绝对绝对绝对不会再忘记你！",
-                f"可..可恶！{user.nickname}！太可恶了！呜",
+                f"呜..{bot_nickname}睡一觉就会忘记的..和梦一样..{nickname}",
+                f"我知道了..{nickname}..",
+                f"是{bot_nickname}哪里做的不好嘛..好吧..晚安{nickname}",
+                f"呃，{nickname}，下次我绝对绝对绝对不会再忘记你！",
+                f"可..可恶！{nickname}！太可恶了！呜",
             ]
         )
     )
     # 睡一觉
-    user.nickname = None
-    await user.save(update_fields=["nickname"])
+    await nickname_manager.set_nickname(user_id=event.user_id, nickname=None)
@@ -5,12 +5,12 @@ from email.header import Header
 from email.mime.text import MIMEText
 from typing import Any, Dict, List, Tuple, Union, Sequence
 
-import httpx
 from nonebot.log import logger
 from nonebot import on_notice, get_driver
 from nonebot.plugin import PluginMetadata
 from nonebot.adapters.onebot.v11 import Bot, NoticeEvent
 
+from migang.utils.http import http_client
 from migang.core import ConfigItem, get_config
 
 SUBJECT_TEMPLATE_DEFAULT = "机器人 {bot_id} 离线"
@@ -153,7 +153,7 @@ async def _send_bark(config: Dict[str, Any], title: str, body: str) -> None:
         value = config.get(optional)
         if value:
             payload[optional] = value
-    async with httpx.AsyncClient(timeout=10) as client:
+    async with http_client(timeout=10) as client:
         response = await client.post(f"{server}/push", json=payload)
         response.raise_for_status()
 
@@ -172,7 +172,7 @@ async def _send_gotify(config: Dict[str, Any], title: str, body: str) -> None:
         "priority": int(config.get("priority", 5)),
     }
     headers = {"X-Gotify-Key": token}
-    async with httpx.AsyncClient(timeout=10) as client:
+    async with http_client(timeout=10) as client:
         response = await client.post(url, json=payload, headers=headers)
         response.raise_for_status()
 
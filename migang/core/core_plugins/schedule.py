@@ -7,6 +7,7 @@ require("nonebot_plugin_apscheduler")
 from nonebot_plugin_apscheduler import scheduler
 
 from migang.core import CountPeriod
+from migang.core.utils.avatar import avatar_store
 from migang.core.manager import count_manager, save_managers
 
 
@@ -40,3 +41,4 @@ async def _():
 @scheduler.scheduled_job("interval", minutes=15, jitter=120)
 async def _():
     await save_managers()
+    await avatar_store.save()
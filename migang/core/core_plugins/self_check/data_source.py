@@ -2,10 +2,11 @@ from pathlib import Path
 from datetime import datetime
 
 import psutil
-import aiohttp
 from nonebot.log import logger
 from pil_utils import BuildImage, text2image
 
+from migang.utils.http import http_session
+
 
 async def check():
     cpu = psutil.cpu_percent()
@@ -13,7 +14,7 @@ async def check():
     disk = psutil.disk_usage("/").percent
     baidu: int = 200
     google: int = 200
-    async with aiohttp.ClientSession() as client:
+    async with http_session() as client:
         try:
             await client.get("https://www.baidu.com/", timeout=2)
         except Exception as e:
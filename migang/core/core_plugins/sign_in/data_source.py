@@ -2,17 +2,20 @@ import bisect
 import random
 import secrets
 from io import BytesIO
-from typing import Tuple
+from pathlib import Path
 from decimal import Decimal
 from datetime import datetime
+from functools import lru_cache
+from typing import Tuple, Optional
 
 from nonebot.log import logger
 from pil_utils import BuildImage
-from nonebot.utils import run_sync
 from tortoise.transactions import in_transaction
 
 from migang.core.decorator import sign_in_effect
 from migang.core.utils.image import get_user_avatar
+from migang.core.utils.render_cache import RenderCache
+from migang.core.utils.process_pool import run_in_process
 from migang.core.models import SignIn, UserProperty, TransactionLog
 
 from . import effects  # noqa
@@ -25,12 +28,26 @@ from .const import (
     level2attitude,
 )
 
+_card_cache = RenderCache(max_size=16 * 1024 * 1024)
+"""签到卡片，同一用户当天重复签到时直接返回
+"""
+_backgrounds: Tuple[Path, ...] = tuple(SIGN_BACKGROUND_PATH.iterdir())
 
-async def handle_sign_in(user_id: int, user_name: str, bot_name: str):
+
+async def handle_sign_in(user_id: int, user_name: str, bot_name: str) -> bytes:
     async with in_transaction() as connection:
-        user = await SignIn.filter(user_id=user_id).using_db(connection).first()
+        # 锁定该用户的两行，同一用户的并发签到依次执行
+        user = (
+            await SignIn.filter(user_id=user_id)
+            .select_for_update()
+            .using_db(connection)
+            .first()
+        )
         user_prop = (
-            await UserProperty.filter(user_id=user_id).using_db(connection).first()
+            await UserProperty.filter(user_id=user_id)
+            .select_for_update()
+            .using_db(connection)
+            .first()
         )
         impression_diff: str
         if user and (user.time.astimezone().date() == datetime.now().date()):
@@ -116,10 +133,8 @@ async def handle_sign_in(user_id: int, user_name: str, bot_name: str):
                 impression_diff = f"{pre_impression_diff}"
             await user.save(using_db=connection)
             await user_prop.save(using_db=connection)
-    avatar = await get_user_avatar(user_id)
-    return await draw(
+    card = dict(
         bot_name=bot_name,
-        avatar=avatar,
         user_id=user_id,
         user_name=user_name,
         count=user.signin_count,
@@ -130,6 +145,16 @@ async def handle_sign_in(user_id: int, user_name: str, bot_name: str):
         time=user.time.astimezone(),
     )
 
+    async def render() -> bytes:
+        return await run_in_process(
+            draw,
+            avatar=await get_user_avatar(user_id),
+            background=random.choice(_backgrounds),
+            **card,
+        )
+
+    return await _card_cache.get(_card_cache.key(*card.items()), render)
+
 
 def get_level_and_next_impression(impression: float) -> Tuple[int, int, int]:
     """_summary_
@@ -153,10 +178,23 @@ def get_level_and_next_impression(impression: float) -> Tuple[int, int, int]:
     )
 
 
-@run_sync
+@lru_cache(maxsize=None)
+def _load_asset(
+    path: Path, size: Optional[Tuple[int, int]] = None, mode: Optional[str] = None
+) -> BuildImage:
+    """读取并缩放素材，每个进程只解码一次，使用时若需修改需先copy"""
+    img = BuildImage.open(path)
+    if mode:
+        img = img.convert(mode)
+    if size:
+        img = img.resize(size)
+    return img
+
+
 def draw(
     bot_name: str,
     avatar: bytes,
+    background: Path,
     user_id: int,
     user_name: str,
     count: int,
@@ -167,10 +205,8 @@ def draw(
     time: datetime,
 ):
     avatar_img = BuildImage.open(BytesIO(avatar)).resize((102, 102)).circle()
-    avatar_border = (
-        BuildImage.open(SIGN_BORDER_PATH / "ava_border_01.png")
-        .convert("RGBA")
-        .resize((140, 140))
+    avatar_border = _load_asset(
+        SIGN_BORDER_PATH / "ava_border_01.png", (140, 140), "RGBA"
     )
 
     level, next_impression, previous_impression = get_level_and_next_impression(
@@ -182,29 +218,25 @@ def draw(
         next_impression = impression
         interpolation = 0
 
-    bar_bk = BuildImage.open(SIGN_RESOURCE_PATH / "bar_white.png").convert("RGBA")
+    bar_bk = _load_asset(SIGN_RESOURCE_PATH / "bar_white.png", mode="RGBA").copy()
     ratio = 1 - (next_impression - impression) / (next_impression - previous_impression)
-    bar = BuildImage.open(SIGN_RESOURCE_PATH / "bar.png")
+    bar = _load_asset(SIGN_RESOURCE_PATH / "bar.png")
     bar_bk.paste(
         bar,
         (int(bar.width * ratio) - bar.width, 0),
         alpha=True,
     )
     bar_bk = bar_bk.resize((220, 20))
-    gift_border = BuildImage.open(SIGN_BORDER_PATH / "gift_border_02.png").resize(
-        (270, 100)
-    )
+    gift_border = _load_asset(
+        SIGN_BORDER_PATH / "gift_border_02.png", (270, 100)
+    ).copy()
     gift_border.draw_text(
         (0, 0, gift_border.width, gift_border.height),
         windfall,
         lines_align="center",
         fontname="Yozai",
     )
-    bk = (
-        BuildImage.open(random.choice(list(SIGN_BACKGROUND_PATH.iterdir())))
-        .convert("RGBA")
-        .resize((876, 424))
-    )
+    bk = _load_asset(background, (876, 424), "RGBA").copy()
     sub_bk = BuildImage.new("RGBA", (876, 274), (255, 255, 255, 190))
     sub_bk.paste(avatar_border, (25, 80), True)
     sub_bk.paste(avatar_img, (45, 99), True)
@@ -299,4 +331,4 @@ def draw(
         fontname="Yozai",
         fill=(155, 155, 155),
     )
-    return bk.save_png()
+    return bk.save_png().getvalue()
@@ -12,7 +12,7 @@ from PIL import ImageFont, ImageFilter
 
 from migang.core import FONT_PATH
 from migang.core.manager import goods_manager
-from migang.core.utils.image import get_user_avatar
+from migang.core.utils.avatar import avatar_store
 
 height = 50
 side_width = 40
@@ -63,16 +63,17 @@ async def draw_trade_window(
     Returns:
         bytes: _description_
     """
+    avatars = await avatar_store.prefetch([one_side[0], other_side[0]])
     one_side_img, other_side_img = await asyncio.gather(
         *[
             draw(
-                await get_user_avatar(one_side[0]),
+                avatars[one_side[0]],
                 one_side[1].gold,
                 one_side[1].items,
                 0,
             ),
             draw(
-                await get_user_avatar(other_side[0]),
+                avatars[other_side[0]],
                 other_side[1].gold,
                 other_side[1].items,
                 1,
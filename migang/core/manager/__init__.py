@@ -7,18 +7,21 @@ from migang.core.database import post_init_db, pre_close_db
 from .user_manager import UserManager
 from .goods_manager import GoodsManager
 from .group_manager import GroupManager
+from .access_cache import AccessDecision
 from .cd_manager import CDItem, CDManager
 from .plugin_manager import PluginManager
 from .request_manager import RequestManager
+from .nickname_manager import NicknameManager
 from .group_bot_manager import GroupBotManager
 from .task_manager import TaskItem, TaskManager
 from .permission_manager import PermissionManager
 from .count_manager import CountItem, CountManager
 from .config_manager import ConfigItem, ConfigManager
-from .data_class import CheckType, LimitType, PluginType, CountPeriod
+from .data_class import CDMode, CheckType, LimitType, PluginType, CountPeriod
 
 __all__ = [
     "CDItem",
+    "CDMode",
     "TaskItem",
     "ConfigItem",
     "CountItem",
@@ -26,6 +29,7 @@ __all__ = [
     "CheckType",
     "LimitType",
     "PluginType",
+    "AccessDecision",
     "core_data_path",
     "plugin_manager",
     "task_manager",
@@ -37,6 +41,7 @@ __all__ = [
     "request_manager",
     "permission_manager",
     "goods_manager",
+    "nickname_manager",
     "init_managers",
     "save_managers",
     "group_bot_manager",
@@ -100,15 +105,25 @@ goods_manager: GoodsManager = GoodsManager()
 """管理商店商品
 """
 
+nickname_manager: NicknameManager = NicknameManager()
+"""缓存昵称系统的昵称，设定昵称时需经由此对象写入
+"""
+
 
 @post_init_db
 async def init_managers():
     import asyncio
 
     await asyncio.gather(
-        *[group_manager.init(), user_manager.init(), goods_manager.init()]
+        *[
+            group_manager.init(),
+            user_manager.init(),
+            goods_manager.init(),
+            nickname_manager.init(),
+        ]
     )
     permission_manager.init()
+    config_manager.init()
 
 
 @pre_close_db
@@ -117,10 +132,14 @@ async def save_managers():
     import asyncio
 
     logger.debug("正在持久化数据...")
+    # 各管理器只写入有修改的部分
     await asyncio.gather(
         *[
+            plugin_manager.save(),
+            task_manager.save(),
             group_manager.save(),
             user_manager.save(),
+            config_manager.save_default_value(),
             count_manager.save(),
             permission_manager.save(),
         ]
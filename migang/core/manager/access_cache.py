@@ -0,0 +1,112 @@
+"""插件调用决策表，将群/用户调用插件的检查结果缓存下来，状态改变时由各管理器失效
+"""
+from enum import IntEnum, unique
+from typing import Dict, Tuple, Optional
+
+from migang.core.permission import Permission
+
+
+@unique
+class AccessDecision(IntEnum):
+    """run_preprocessor中的检查结果"""
+
+    allowed = 0
+    """允许调用
+    """
+    group_denied = 1
+    """群插件不可用
+    """
+    user_denied = 2
+    """个人权限不足
+    """
+
+
+class AccessCache:
+    """缓存(plugin_name, group_id, 用户权限)到检查结果的映射
+
+    群内的结果按group_id分桶，群状态改变时只需丢弃对应的桶；
+    用户权限作为key的一部分，因此用户权限改变时无需失效
+    """
+
+    def __init__(self) -> None:
+        self.__group: Dict[int, Dict[Tuple[str, Permission], AccessDecision]] = {}
+        """group_id 对应该群内(plugin_name, 用户权限)的检查结果
+        """
+        self.__private: Dict[Tuple[str, Permission], bool] = {}
+        """(plugin_name, 用户权限) 对应私聊下的检查结果
+        """
+
+    def get_group(
+        self, plugin_name: str, group_id: int, user_permission: Permission
+    ) -> Optional[AccessDecision]:
+        """获取群内的检查结果
+
+        Args:
+            plugin_name (str): 插件名
+            group_id (int): 群号
+            user_permission (Permission): 用户权限
+
+        Returns:
+            Optional[AccessDecision]: 未缓存时返回None
+        """
+        if (table := self.__group.get(group_id)) is None:
+            return None
+        return table.get((plugin_name, user_permission))
+
+    def set_group(
+        self,
+        plugin_name: str,
+        group_id: int,
+        user_permission: Permission,
+        decision: AccessDecision,
+    ) -> None:
+        """记录群内的检查结果
+
+        Args:
+            plugin_name (str): 插件名
+            group_id (int): 群号
+            user_permission (Permission): 用户权限
+            decision (AccessDecision): 检查结果
+        """
+        if (table := self.__group.get(group_id)) is None:
+            table = self.__group[group_id] = {}
+        table[(plugin_name, user_permission)] = decision
+
+    def get_private(
+        self, plugin_name: str, user_permission: Permission
+    ) -> Optional[bool]:
+        """获取不区分群的用户检查结果
+
+        Args:
+            plugin_name (str): 插件名
+            user_permission (Permission): 用户权限
+
+        Returns:
+            Optional[bool]: 未缓存时返回None
+        """
+        return self.__private.get((plugin_name, user_permission))
+
+    def set_private(
+        self, plugin_name: str, user_permission: Permission, status: bool
+    ) -> None:
+        """记录不区分群的用户检查结果
+
+        Args:
+            plugin_name (str): 插件名
+            user_permission (Permission): 用户权限
+            status (bool): 检查结果
+        """
+        self.__private[(plugin_name, user_permission)] = status
+
+    def invalidate_group(self, group_id: int) -> None:
+        """群状态或群内插件状态改变时调用
+
+        Args:
+            group_id (int): 群号
+        """
+        self.__group.pop(group_id, None)
+
+    def clear(self) -> None:
+        """插件全局状态改变时调用，清空全部结果"""
+        self.__group.clear()
+        self.__private.clear()
@@ -1,9 +1,10 @@
 from time import time
-from typing import Dict, List, Union, Callable, Iterable
+from collections import OrderedDict, deque
+from typing import Any, Dict, List, Tuple, Union, Callable, Iterable, Optional
 
 from nonebot.adapters.onebot.v11 import Event, Message, MessageEvent, PokeNotifyEvent
 
-from .data_class import CheckType, LimitType
+from .data_class import CDMode, CheckType, LimitType
 
 
 class CDItem:
@@ -15,20 +16,78 @@ class CDItem:
         hint: Union[str, Message, None] = None,
         limit_type: LimitType = LimitType.user,
         check_type: CheckType = CheckType.all,
+        count: int = 1,
+        mode: CDMode = CDMode.cooldown,
     ) -> None:
         """CDItem构造函数
 
         Args:
-            cd (Union[int, float]): 插件CD
+            cd (Union[int, float]): 插件CD，在sliding_window与token_bucket模式下为窗口长度
             hint (Union[str, Message, None]): 当还在CD冷却期时，发送的提示语. Defaults to None.
             limit_type (LimitType, optional): 限制检测CD的对象为用户或群. Defaults to LimitType.user.
             check_type (CheckType, optional): 限制检测CD的会话为私聊或群聊或全部. Defaults to CheckType.all.
+            count (int, optional): 窗口内允许的调用次数，仅sliding_window与token_bucket模式下有效. Defaults to 1.
+            mode (CDMode, optional): 限制方式. Defaults to CDMode.cooldown.
         """
 
         self.cd = cd
         self.hint = hint
         self.limit_type = limit_type
         self.check_type = check_type
+        self.count = max(count, 1)
+        self.mode = mode
+
+
+class ExpiringDict:
+    """所有项存活时间相同的字典，按最后写入时间排序，过期的项在写入时被清理，均摊O(1)"""
+
+    __slots__ = ("__ttl", "__data")
+
+    def __init__(self, ttl: float) -> None:
+        """ExpiringDict构造函数
+
+        Args:
+            ttl (float): 项在最后一次写入后的存活时间
+        """
+        self.__ttl = ttl
+        self.__data: OrderedDict[int, Tuple[float, Any]] = OrderedDict()
+        """{id: (最后写入时间, 值)}
+        """
+
+    def __len__(self) -> int:
+        return len(self.__data)
+
+    def get(self, key: int, now: float) -> Optional[Any]:
+        """获取未过期的值
+
+        Args:
+            key (int): id
+            now (float): 当前时间
+
+        Returns:
+            Optional[Any]: 若不存在或已过期，返回None
+        """
+        item = self.__data.get(key)
+        if item is None or now - item[0] > self.__ttl:
+            return None
+        return item[1]
+
+    def set(self, key: int, value: Any, now: float) -> None:
+        """写入值并清理过期项
+
+        Args:
+            key (int): id
+            value (Any): 值
+            now (float): 当前时间
+        """
+        data = self.__data
+        data[key] = (now, value)
+        data.move_to_end(key)
+        while data:
+            oldest = next(iter(data.values()))
+            if now - oldest[0] <= self.__ttl:
+                break
+            data.popitem(last=False)
 
 
 class CDManager:
@@ -42,109 +101,136 @@ class CDManager:
         class CDChecker:
             """根据不同的检测对象与会话类型生成对应的CD检测器"""
 
-            def __init__(
-                self, cd_item: CDItem, last_called: Dict[str, Dict[int, float]]
-            ) -> None:
+            def __init__(self, cd_item: CDItem) -> None:
                 """CDChecker构造函数，根据不同的检测对象与会话类型生成对应的CD检测器
 
                 Args:
                     cd_item (CDItem): cd配置项
                 """
                 self.__cd = cd_item.cd
+                self.__count = cd_item.count
                 self.hint = cd_item.hint
-                self.__last_called: Dict[int, float] = {}
-                """该检测器最后的调用时间，{id: time}
+                self.__state: ExpiringDict = ExpiringDict(ttl=cd_item.cd)
+                """该检测器的状态，{id: 状态}，状态超过cd未更新即视为不存在
+                """
+                self.__func: Callable[[Event], Optional[int]]
+                """获取事件对应id的函数，返回None则表示不检测
                 """
-                self.__func: Callable[[Event], Union[bool, float]]
-                """实际的检测函数
+                self.__update_func: Callable[[Event], Optional[int]]
+                """获取通过检测后需要更新的id的函数
                 """
                 limit_type, check_type = cd_item.limit_type, cd_item.check_type
                 if limit_type is LimitType.user:
-                    self.__last_called = last_called["user"]
+                    self.__update_func = self.__get_user
                     if check_type is CheckType.private:
-                        self.__func = self.__check_user_private
+                        self.__func = self.__get_user_private
                     elif check_type is CheckType.group:
-                        self.__func = self.__check_user_group
+                        self.__func = self.__get_user_group
                     elif check_type is CheckType.all:
-                        self.__func = self.__check_user_all
+                        self.__func = self.__get_user
+                else:
+                    self.__func = self.__update_func = self.__get_group
+                self.__remaining: Callable[[Any, float], Optional[float]]
+                self.__next_state: Callable[[Any, float], Any]
+                if cd_item.mode is CDMode.sliding_window:
+                    self.__remaining = self.__remaining_window
+                    self.__next_state = self.__next_window
+                elif cd_item.mode is CDMode.token_bucket:
+                    self.__rate = self.__count / self.__cd if self.__cd > 0 else 0
+                    self.__remaining = self.__remaining_bucket
+                    self.__next_state = self.__next_bucket
                 else:
-                    self.__last_called = last_called["group"]
-                    self.__func = self.__check_group
+                    self.__remaining = self.__remaining_cooldown
+                    self.__next_state = self.__next_cooldown
 
-            def check(self, event: Event) -> Union[bool, float]:
+            def check(self, event: Event, now: float) -> Union[bool, float]:
                 """外部可调用的检测函数
 
                 Args:
                     event (Event): 事件
+                    now (float): 当前时间
 
                 Returns:
                     Union[bool, float]: 若CD不在冷却期，返回True，反之返回剩余时间
                 """
-                return self.__func(event)
+                if (key := self.__func(event)) is None:
+                    return True
+                state = self.__state.get(key, now)
+                if state is None:
+                    return True
+                remaining = self.__remaining(state, now)
+                return True if remaining is None else remaining
 
-            def __check_user_private(self, event: Event) -> Union[bool, float]:
-                """limit_type为user，check_type为private时的具体检测函数
+            def update(self, event: Event, now: float) -> None:
+                """检测全部通过后更新状态
 
                 Args:
                     event (Event): 事件
-
-                Returns:
-                    Union[bool, float]: 若CD不在冷却期，返回True，反之返回剩余时间
+                    now (float): 当前时间
                 """
-                if not hasattr(event, "group_id"):
-                    return self.__check_user_all(event)
-                return True
+                if (key := self.__update_func(event)) is not None:
+                    self.__state.set(
+                        key, self.__next_state(self.__state.get(key, now), now), now
+                    )
 
-            def __check_user_group(self, event: Event) -> Union[bool, float]:
-                """limit_type为user，check_type为group时的具体检测函数
+            def __get_user(self, event: Event) -> Optional[int]:
+                return event.user_id
 
-                Args:
-                    event (Event): 事件
+            def __get_user_private(self, event: Event) -> Optional[int]:
+                return None if hasattr(event, "group_id") else event.user_id
 
-                Returns:
-                    Union[bool, float]: 若CD不在冷却期，返回True，反之返回剩余时间
-                """
-                if hasattr(event, "group_id"):
-                    return self.__check_user_all(event)
-                return True
+            def __get_user_group(self, event: Event) -> Optional[int]:
+                return event.user_id if hasattr(event, "group_id") else None
 
-            def __check_user_all(self, event: Event) -> Union[bool, float]:
-                """limit_type为user，check_type为all时的具体检测函数
-
-                Args:
-                    event (Event): 事件
-
-                Returns:
-                    Union[bool, float]: 若CD不在冷却期，返回True，反之返回剩余时间
-                """
-                if (
-                    (now := time()) - self.__last_called.get(event.user_id, 0)
-                ) > self.__cd:
-                    return True
-                else:
-                    return self.__cd - (now - self.__last_called.get(event.user_id, 0))
+            def __get_group(self, event: Event) -> Optional[int]:
+                return getattr(event, "group_id", None)
 
-            def __check_group(
-                self, event: Union[MessageEvent, PokeNotifyEvent]
-            ) -> Union[bool, float]:
-                """limit_type为group，check_type只能是group时的具体检测函数
+            def __remaining_cooldown(self, last: float, now: float) -> Optional[float]:
+                """state为最后调用时间"""
+                if now - last > self.__cd:
+                    return None
+                return self.__cd - (now - last)
 
-                Args:
-                    event (Union[MessageEvent, PokeNotifyEvent]): 事件
+            def __next_cooldown(self, last: Optional[float], now: float) -> float:
+                return now
 
-                Returns:
-                    Union[bool, float]: 若CD不在冷却期，返回True，反之返回剩余时间
-                """
-                if hasattr(event, "group_id"):
-                    if (
-                        (now := time()) - self.__last_called.get(event.group_id, 0)
-                    ) > self.__cd:
-                        return True
-                    else:
-                        return self.__cd - (
-                            now - self.__last_called.get(event.group_id, 0)
-                        )
-                return True
+            def __remaining_window(
+                self, calls: "deque[float]", now: float
+            ) -> Optional[float]:
+                """state为窗口内最近count次调用的时间"""
+                if len(calls) < self.__count or now - calls[0] > self.__cd:
+                    return None
+                return self.__cd - (now - calls[0])
+
+            def __next_window(
+                self, calls: Optional["deque[float]"], now: float
+            ) -> "deque[float]":
+                if calls is None:
+                    calls = deque(maxlen=self.__count)
+                calls.append(now)
+                return calls
+
+            def __bucket_tokens(self, state: Tuple[float, float], now: float) -> float:
+                tokens, last = state
+                return min(self.__count, tokens + (now - last) * self.__rate)
+
+            def __remaining_bucket(
+                self, state: Tuple[float, float], now: float
+            ) -> Optional[float]:
+                """state为(剩余令牌, 上次更新时间)"""
+                tokens = self.__bucket_tokens(state, now)
+                if tokens >= 1 or self.__rate <= 0:
+                    return None
+                return (1 - tokens) / self.__rate
+
+            def __next_bucket(
+                self, state: Optional[Tuple[float, float]], now: float
+            ) -> Tuple[float, float]:
+                # 超过cd未更新时令牌已补满
+                tokens = (
+                    self.__count if state is None else self.__bucket_tokens(state, now)
+                )
+                return (max(tokens - 1, 0), now)
 
         def __init__(self, cd_items: Union[Iterable[CDItem], CDItem]) -> None:
             """PluginCD的构造函数，获取插件中的所有CD控制项，创建对应的CDChecker并接手该插件CD的管理
@@ -152,19 +238,13 @@ class CDManager:
             Args:
                 cd_items (Union[Iterable[CDItem], CDItem]): 该插件中的CD控制项
             """
-            self.__last_called: Dict[str, Dict[int, float]] = {"group": {}, "user": {}}
-            """插件最后调用时间{"group": {}, "user": {}}
-            """
             self.__cd_checkers: List[CDManager.PluginCD.CDChecker]
             """保存该插件中的各CD检测器
             """
             if isinstance(cd_items, CDItem):
                 cd_items = (cd_items,)
             self.__cd_checkers: List[CDManager.PluginCD.CDChecker] = [
-                CDManager.PluginCD.CDChecker(
-                    cd_item=cd_item, last_called=self.__last_called
-                )
-                for cd_item in cd_items
+                CDManager.PluginCD.CDChecker(cd_item=cd_item) for cd_item in cd_items
             ]
 
         def check(
@@ -179,8 +259,9 @@ class CDManager:
             Returns:
                 Union[str, bool, None]: 若CD不在冷却期，返回True，反之返回提示语
             """
+            now = time()
             for checker in self.__cd_checkers:
-                if (ret := checker.check(event)) != True:
+                if (ret := checker.check(event, now)) != True:
                     if checker.hint != None:
                         if isinstance(checker.hint, Message):
                             return Message(
@@ -190,11 +271,9 @@ class CDManager:
                             )
                         return checker.hint.replace("[_剩余时间_]", f"{ret:.2f}")
                     return None
-            # 更新调用时间，和检测时候可能会有一点点的时间差
-            now = time()
-            if hasattr(event, "group_id"):
-                self.__last_called["group"][event.group_id] = now
-            self.__last_called["user"][event.user_id] = now
+            # 全部通过后才更新状态
+            for checker in self.__cd_checkers:
+                checker.update(event, now)
             return True
 
     def __init__(self) -> None:
@@ -1,13 +1,60 @@
+import asyncio
 from pathlib import Path
-from functools import lru_cache
-from typing import Any, Dict, Iterable, Optional
+from types import MappingProxyType
+from typing import Any, Dict, Tuple, Mapping, Iterable, Optional
 
-from async_lru import alru_cache
-from ruamel.yaml import CommentedMap
+import anyio
+import ujson as json
+from nonebot.log import logger
+from ruamel.yaml.error import YAMLError
+from ruamel.yaml import YAML, CommentedMap
 
 from migang.core.path import DATA_PATH
-from migang.core.exception import ConfigNoExistError
-from migang.core.utils.file_operation import load_data, async_load_data, async_save_data
+from migang.core.exception import FileParseError, ConfigNoExistError
+from migang.core.utils.file_operation import (
+    load_data,
+    async_load_data,
+    async_save_data,
+    async_atomic_write,
+)
+
+# 只读的配置使用safe模式，安装了ruamel.yaml.clib时由C实现解析，不保留注释
+_safe_yaml = YAML(typ="safe")
+# 检查配置文件是否被修改的间隔
+_WATCH_INTERVAL = 3
+
+_Version = Optional[Tuple[int, int]]
+"""(修改时间, 文件大小)，文件不存在时为None
+"""
+
+
+def _file_version(file: Path) -> _Version:
+    try:
+        stat = file.stat()
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _load_snapshot(file: Path) -> Tuple[_Version, Mapping[str, Any]]:
+    """读取配置文件的只读快照
+
+    Raises:
+        FileParseError: 文件解析失败或顶层不是键值对
+    """
+    version = _file_version(file)
+    if version is None:
+        return None, MappingProxyType({})
+    try:
+        with open(file, "r", encoding="utf-8") as f:
+            data = _safe_yaml.load(f)
+    except (YAMLError, UnicodeDecodeError) as e:
+        raise FileParseError(f"yaml文件 {file} 解析失败：{e}")
+    if data is None:
+        data = {}
+    if not isinstance(data, dict):
+        raise FileParseError(f"yaml文件 {file} 的顶层应为键值对")
+    return version, MappingProxyType(data)
 
 
 class ConfigItem:
@@ -52,16 +99,73 @@ class ConfigManager:
         )
         """{plugin_name: {"key": value}}
         """
+        self.__default_value_dirty: bool = False
+        """默认值与缓存文件中的是否不一致
+        """
         self.__path: Path = path
         """存储配置的路径
         """
         self.__path.mkdir(exist_ok=True, parents=True)
+        self.__snapshots: Dict[str, Tuple[_Version, Mapping[str, Any]]] = {}
+        """{plugin_name: (文件版本, 配置)}，文件修改后整体替换，读取时无需加锁
+        """
+        self.__watch_task: Optional[asyncio.Task] = None
+
+    def init(self) -> None:
+        """启动检查配置文件修改的后台任务"""
+        if self.__watch_task is None:
+            self.__watch_task = asyncio.create_task(self.__watch())
+
+    async def __watch(self) -> None:
+        """定时检查已读取的配置文件，被修改时重新读取"""
+        while True:
+            await asyncio.sleep(_WATCH_INTERVAL)
+            for plugin_name, (version, data) in list(self.__snapshots.items()):
+                file = self.__path / f"{plugin_name}.yaml"
+                current: _Version = None
+                try:
+                    if (current := _file_version(file)) == version:
+                        continue
+                    if current is None:
+                        # 编辑器保存时可能先重命名或删除文件，保留旧配置，文件重新出现时再读取
+                        self.__snapshots[plugin_name] = (None, data)
+                        continue
+                    snapshot = await anyio.to_thread.run_sync(_load_snapshot, file)
+                except Exception as e:
+                    # 可能正在编辑，保留旧配置，文件再次修改时重试
+                    logger.warning(f"配置文件 {plugin_name}.yaml 重新加载失败：{e}，继续使用修改前的配置")
+                    snapshot = (current, data)
+                else:
+                    if snapshot[0] is None:
+                        # 检查后、读取前文件被移走
+                        snapshot = (None, data)
+                    else:
+                        logger.info(f"配置文件 {plugin_name}.yaml 已重新加载")
+                self.__snapshots[plugin_name] = snapshot
 
     async def save_default_value(self):
-        await async_save_data(
-            self.__default_value, DATA_PATH / "core" / "default_value_cache.json"
+        """保存配置项默认值，与缓存文件一致时跳过"""
+        if not self.__default_value_dirty:
+            return
+        self.__default_value_dirty = False
+        await async_atomic_write(
+            DATA_PATH / "core" / "default_value_cache.json",
+            json.dumps(self.__default_value, ensure_ascii=False, indent=4),
         )
 
+    def __set_default_value(self, plugin_name: str, key: str, value: Any) -> None:
+        """设定配置项默认值，值有变化时才标记需要保存
+
+        Args:
+            plugin_name (str): 插件名或配置文件名
+            key (str): 配置项键值
+            value (Any): 默认值
+        """
+        default_value = self.__default_value.setdefault(plugin_name, {})
+        if key not in default_value or default_value[key] != value:
+            default_value[key] = value
+            self.__default_value_dirty = True
+
     async def add_config(self, plugin_name: str, config: ConfigItem) -> None:
         """添加单个配置项
 
@@ -74,9 +178,7 @@ class ConfigManager:
         file_name = self.__path / f"{plugin_name}.yaml"
         data: CommentedMap = await async_load_data(file_name)
         modified = False
-        if plugin_name not in self.__default_value:
-            self.__default_value[plugin_name] = {}
-        self.__default_value[plugin_name][config.key] = config.default_value
+        self.__set_default_value(plugin_name, config.key, config.default_value)
         if config.key in data:
             return
         modified = True
@@ -86,6 +188,7 @@ class ConfigManager:
         )
         if modified:
             await async_save_data(data, file_name)
+            self.__snapshots.pop(plugin_name, None)
 
     async def add_configs(
         self, plugin_name: str, configs: Iterable[ConfigItem]
@@ -96,8 +199,6 @@ class ConfigManager:
             plugin_name (str): 插件名或配置文件名
             configs (Iterable[ConfigItem]): 配置项
         """
-        if plugin_name not in self.__default_value:
-            self.__default_value[plugin_name] = {}
         file_name = self.__path / f"{plugin_name}.yaml"
         data: CommentedMap = await async_load_data(file_name)
         modified = False
@@ -105,7 +206,7 @@ class ConfigManager:
             if config.config_name:
                 await self.add_config(plugin_name, config)
                 continue
-            self.__default_value[plugin_name][config.key] = config.default_value
+            self.__set_default_value(plugin_name, config.key, config.default_value)
             if config.key in data:
                 continue
             modified = True
@@ -116,19 +217,18 @@ class ConfigManager:
         if modified:
             # 仅修改过才重新写入
             await async_save_data(data, file_name)
+            self.__snapshots.pop(plugin_name, None)
 
-    @alru_cache(maxsize=128)
-    async def __async_get_config(self, plugin_name: str) -> CommentedMap:
-        """读取插件名对应的配置名
-        Args:
-            plugin_name (str): 插件名或配置文件名
-
-        Returns:
-            CommentedMap: 配置，类Dict结构
-        """
-        return await async_load_data(self.__path / f"{plugin_name}.yaml")
+    def __get_item(
+        self, plugin_name: str, plugin_config: str, data: Mapping[str, Any]
+    ) -> Any:
+        if plugin_config not in data:
+            raise ConfigNoExistError(f"插件 {plugin_name} 的配置项 {plugin_config} 不存在！")
+        value = data[plugin_config]
+        if value is None and plugin_name in self.__default_value:
+            return self.__default_value[plugin_name].get(plugin_config)
+        return value
 
-    @alru_cache(maxsize=256)
     async def async_get_config_item(self, plugin_name: str, plugin_config: str) -> Any:
         """获取plugin_name对应的键值为plugin_config的配置值
 
@@ -142,24 +242,12 @@ class ConfigManager:
         Returns:
             Any: 配置值
         """
-        data = await self.__async_get_config(plugin_name)
-        if plugin_config not in data:
-            raise ConfigNoExistError(f"插件 {plugin_name} 的配置项 {plugin_config} 不存在！")
-        return (
-            data[plugin_config]
-            if data[plugin_config] is not None
-            else (
-                self.__default_value[plugin_name].get(plugin_config)
-                if plugin_name in self.__default_value
-                else None
+        if (snapshot := self.__snapshots.get(plugin_name)) is None:
+            snapshot = self.__snapshots[plugin_name] = await anyio.to_thread.run_sync(
+                _load_snapshot, self.__path / f"{plugin_name}.yaml"
             )
-        )
+        return self.__get_item(plugin_name, plugin_config, snapshot[1])
 
-    @lru_cache(maxsize=128)
-    def __sync_get_config(self, plugin_name: str) -> CommentedMap:
-        return load_data(self.__path / f"{plugin_name}.yaml")
-
-    @lru_cache(maxsize=256)
     def sync_get_config_item(self, plugin_name: str, plugin_config: str) -> Any:
         """获取plugin_name对应的键值为plugin_config的配置值
 
@@ -173,15 +261,8 @@ class ConfigManager:
         Returns:
             Any: 配置值
         """
-        data = self.__sync_get_config(plugin_name)
-        if plugin_config not in data:
-            raise ConfigNoExistError(f"插件 {plugin_name} 的配置项 {plugin_config} 不存在！")
-        return (
-            data[plugin_config]
-            if data[plugin_config] is not None
-            else (
-                self.__default_value[plugin_name].get(plugin_config)
-                if plugin_name in self.__default_value
-                else None
+        if (snapshot := self.__snapshots.get(plugin_name)) is None:
+            snapshot = self.__snapshots[plugin_name] = _load_snapshot(
+                self.__path / f"{plugin_name}.yaml"
             )
-        )
+        return self.__get_item(plugin_name, plugin_config, snapshot[1])
@@ -1,14 +1,26 @@
+import sys
+import struct
 import asyncio
+from array import array
 from pathlib import Path
-from typing import Dict, List, Union, Callable, Iterable
+from datetime import datetime
+from typing import Dict, List, Tuple, Union, Callable, Iterable
 
 import anyio
+import ujson as json
 from nonebot.log import logger
-from pydantic import BaseModel
 from nonebot.adapters.onebot.v11 import Event, Message
 
+from migang.core.utils.file_operation import async_atomic_write
+
 from .data_class import CheckType, LimitType, CountPeriod
 
+_SNAPSHOT_MAGIC = b"MGCT"
+_SNAPSHOT_VERSION = 1
+_SNAPSHOT_HEADER = struct.Struct("<4sHII")
+"""魔数，版本，用户数，群数；之后依次为用户与群的ids、counts、epochs数组（小端序）
+"""
+
 
 class CountItem:
     """__plugin_count__属性为Iterable[CountItem]或CountItem"""
@@ -37,11 +49,111 @@ class CountItem:
         self.count_period = count_period
 
 
-class Counter(BaseModel):
-    """存储单个插件计数数据的数据结构"""
+def _period_id(period: CountPeriod, now: datetime) -> int:
+    """计算now所处周期的编号，同一周期内编号相同
+
+    Args:
+        period (CountPeriod): 周期
+        now (datetime): 时间
+
+    Returns:
+        int: 周期编号
+    """
+    if period is CountPeriod.hour:
+        return now.toordinal() * 24 + now.hour
+    if period is CountPeriod.day:
+        return now.toordinal()
+    if period is CountPeriod.week:
+        return now.toordinal() - now.weekday()
+    if period is CountPeriod.month:
+        return now.year * 12 + now.month
+    return now.year
+
+
+class Counter:
+    """存储单个插件计数数据的数据结构，以数组紧凑存储
 
-    user: Dict[int, List[int]] = {}
-    group: Dict[int, List[int]] = {}
+    每个对象在每个周期下记录计数与计数所属的周期编号，周期编号与当前不符时视为0，
+    因此重置时只需修改当前周期编号，无需遍历所有对象
+    """
+
+    __slots__ = ("slot", "ids", "counts", "epochs", "current")
+
+    _PERIODS = len(CountPeriod)
+
+    def __init__(self, current: List[int]) -> None:
+        """Counter构造函数
+
+        Args:
+            current (List[int]): 各周期当前的编号，由CountManager共享
+        """
+        self.slot: Dict[int, int] = {}
+        """对象id到数组下标的映射
+        """
+        self.ids: array = array("q")
+        self.counts: array = array("I")
+        self.epochs: array = array("i")
+        self.current: List[int] = current
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __get_slot(self, key: int) -> int:
+        slot = self.slot.get(key)
+        if slot is None:
+            slot = self.slot[key] = len(self.ids)
+            self.ids.append(key)
+            self.counts.extend([0] * self._PERIODS)
+            self.epochs.extend(self.current)
+        return slot
+
+    def get(self, key: int, period: int) -> int:
+        """获取key在period周期内的计数
+
+        Args:
+            key (int): user_id或group_id
+            period (int): 周期下标
+
+        Returns:
+            int: 计数
+        """
+        slot = self.slot.get(key)
+        if slot is None:
+            return 0
+        idx = slot * self._PERIODS + period
+        if self.epochs[idx] != self.current[period]:
+            return 0
+        return self.counts[idx]
+
+    def incr(self, key: int, period: int) -> None:
+        """key在period周期内的计数+1，过期的计数会先被清零
+
+        Args:
+            key (int): user_id或group_id
+            period (int): 周期下标
+        """
+        idx = self.__get_slot(key) * self._PERIODS + period
+        if self.epochs[idx] != self.current[period]:
+            self.epochs[idx] = self.current[period]
+            self.counts[idx] = 1
+        else:
+            self.counts[idx] += 1
+
+    def load(self, ids: array, counts: array, epochs: array) -> None:
+        """载入快照"""
+        self.ids, self.counts, self.epochs = ids, counts, epochs
+        self.slot = {key: i for i, key in enumerate(ids)}
+
+    def load_legacy(self, data: Dict[str, List[int]]) -> None:
+        """载入旧版json格式的计数，视为当前周期内的计数"""
+        for key, counts in data.items():
+            slot = self.__get_slot(int(key)) * self._PERIODS
+            for period, count in enumerate(counts[: self._PERIODS]):
+                self.counts[slot + period] = count
+
+    def dump(self) -> Tuple[bytes, bytes, bytes]:
+        """导出快照"""
+        return self.ids.tobytes(), self.counts.tobytes(), self.epochs.tobytes()
 
 
 class CountManager:
@@ -53,19 +165,20 @@ class CountManager:
         class CountChecker:
             """根据不同的检测对象与会话类型生成对应的调用计数检测器"""
 
-            def __init__(self, data: Counter, count_item: CountItem) -> None:
+            def __init__(
+                self, user: Counter, group: Counter, count_item: CountItem
+            ) -> None:
                 """CountChecker构造函数，根据不同的检测对象与会话类型生成对应的调用计数检测器
 
                 Args:
-                    data (Counter): 插件所属的数据
+                    user (Counter): 插件所属的用户计数
+                    group (Counter): 插件所属的群计数
                     count_item (CountItem): 调用次数配置项
                 """
                 limit_type, check_type = count_item.limit_type, count_item.check_type
                 self.hint = count_item.hint
                 self.__count_limit = count_item.count
-                self.__data: Dict[int, List[int]] = (
-                    data.user if limit_type == LimitType.user else data.group
-                )
+                self.__data: Counter = user if limit_type == LimitType.user else group
                 self.__idx: int = count_item.count_period._value_
                 self.__func: Callable[[Event]]
                 self.__update_func: Callable[[Event]]
@@ -100,18 +213,6 @@ class CountManager:
                 """
                 self.__update_func(event)
 
-            def __get_user(self, user_id: int) -> List[int]:
-                user = self.__data.get(user_id)
-                if user is None:
-                    user = self.__data[user_id] = [0] * 5
-                return user
-
-            def __get_group(self, group_id: int) -> List[int]:
-                group = self.__data.get(group_id)
-                if group is None:
-                    group = self.__data[group_id] = [0] * 5
-                return group
-
             def __update_user(self, event: Event) -> None:
                 """更新用户计数
 
@@ -119,7 +220,7 @@ class CountManager:
                     event (Event): 事件
                 """
                 if hasattr(event, "user_id"):
-                    self.__get_user(user_id=event.user_id)[self.__idx] += 1
+                    self.__data.incr(event.user_id, self.__idx)
 
             def __update_group(self, event: Event) -> None:
                 """更新群计数
@@ -128,7 +229,7 @@ class CountManager:
                     event (Event): 事件
                 """
                 if hasattr(event, "group_id"):
-                    self.__get_group(group_id=event.group_id)[self.__idx] += 1
+                    self.__data.incr(event.group_id, self.__idx)
 
             def __check_user_private(self, event: Event) -> bool:
                 """limit_type为user，check_type为private时的具体检测函数
@@ -166,10 +267,7 @@ class CountManager:
                     bool: 若未达到调用上限，返回True
                 """
                 if hasattr(event, "user_id"):
-                    if (
-                        self.__get_user(user_id=event.user_id)[self.__idx]
-                        < self.__count_limit
-                    ):
+                    if self.__data.get(event.user_id, self.__idx) < self.__count_limit:
                         return True
                     return False
                 return True
@@ -184,21 +282,20 @@ class CountManager:
                     bool: 若未达到调用上限，返回True
                 """
                 if hasattr(event, "group_id"):
-                    if (
-                        self.__get_group(group_id=event.group_id)[self.__idx]
-                        < self.__count_limit
-                    ):
+                    if self.__data.get(event.group_id, self.__idx) < self.__count_limit:
                         return True
                 return True
 
-        def __init__(self, file: Path) -> None:
+        def __init__(self, file: Path, current: List[int]) -> None:
             """PluginCount构造函数，管理单插件的调用计数
 
             Args:
-                plugin_name (str): 插件名
+                file (Path): 计数快照文件
+                current (List[int]): 各周期当前的编号
             """
             self.__file = file
-            self.__count_data: Counter
+            self.__user: Counter = Counter(current)
+            self.__group: Counter = Counter(current)
             self.__count_checkers: List[CountManager.PluginCount.CountChecker] = []
             self.__dirty_data: bool = False
 
@@ -208,11 +305,17 @@ class CountManager:
             Args:
                 count_items (Union[CountItem, Iterable[CountItem]]): 调用次数配置项
             """
+            legacy_file = self.__file.with_suffix(".json")
             if self.__file.exists():
-                async with await anyio.open_file(self.__file, "r") as f:
-                    self.__count_data = Counter.model_validate_json(await f.read())
-            else:
-                self.__count_data = Counter()
+                async with await anyio.open_file(self.__file, "rb") as f:
+                    self.__load_snapshot(await f.read())
+            elif legacy_file.exists():
+                # 从旧版的json记录迁移，下次保存时写成快照
+                async with await anyio.open_file(legacy_file, "r") as f:
+                    data = json.loads(await f.read())
+                self.__user.load_legacy(data.get("user", {}))
+                self.__group.load_legacy(data.get("group", {}))
+                self.__dirty_data = True
             if isinstance(count_items, Iterable):
                 unique_period = set()
                 for count_item in count_items:
@@ -220,13 +323,13 @@ class CountManager:
                         continue
                     self.__count_checkers.append(
                         CountManager.PluginCount.CountChecker(
-                            self.__count_data, count_item=count_item
+                            self.__user, self.__group, count_item=count_item
                         )
                     )
             else:
                 self.__count_checkers.append(
                     CountManager.PluginCount.CountChecker(
-                        self.__count_data, count_item=count_items
+                        self.__user, self.__group, count_item=count_items
                     )
                 )
 
@@ -248,33 +351,73 @@ class CountManager:
             self.__dirty_data = True
             return True
 
-        async def save(self) -> None:
-            """将调用次数保存在硬盘"""
-            if self.__dirty_data:
-                async with await anyio.open_file(self.__file, "w") as f:
-                    await f.write(self.__count_data.model_dump_json(indent=4))
-                self.__dirty_data = False
-
-        def reset(self, period: CountPeriod) -> None:
-            """重置调用次数
+        def __load_snapshot(self, data: bytes) -> None:
+            """载入二进制快照
 
             Args:
-                period (CountPeriod): 所需重置的对应周期
+                data (bytes): 快照内容
             """
-            if not hasattr(self, "_PluginCount__count_data"):
-                logger.warning(f"插件计数文件 {self.__file} 尚未初始化，跳过本次重置")
+            magic, version, n_user, n_group = _SNAPSHOT_HEADER.unpack_from(data)
+            if magic != _SNAPSHOT_MAGIC or version != _SNAPSHOT_VERSION:
+                logger.warning(f"插件计数文件 {self.__file} 格式不符，已忽略")
                 return
-            for counts in self.__count_data.group.values():
-                counts[period._value_] = 0
-            for counts in self.__count_data.user.values():
-                counts[period._value_] = 0
-            self.__dirty_data = True
+            offset = _SNAPSHOT_HEADER.size
+            for counter, n in ((self.__user, n_user), (self.__group, n_group)):
+                arrays = []
+                for typecode, length in (
+                    ("q", n),
+                    ("I", n * Counter._PERIODS),
+                    ("i", n * Counter._PERIODS),
+                ):
+                    arr = array(typecode)
+                    size = arr.itemsize * length
+                    arr.frombytes(data[offset : offset + size])
+                    if sys.byteorder != "little":
+                        arr.byteswap()
+                    arrays.append(arr)
+                    offset += size
+                counter.load(*arrays)
+
+        def __dump_snapshot(self) -> bytes:
+            """导出二进制快照
+
+            Returns:
+                bytes: 快照内容
+            """
+            parts = [
+                _SNAPSHOT_HEADER.pack(
+                    _SNAPSHOT_MAGIC,
+                    _SNAPSHOT_VERSION,
+                    len(self.__user),
+                    len(self.__group),
+                )
+            ]
+            for counter in (self.__user, self.__group):
+                for arr in (counter.ids, counter.counts, counter.epochs):
+                    if sys.byteorder != "little":
+                        arr = array(arr.typecode, arr)
+                        arr.byteswap()
+                    parts.append(arr.tobytes())
+            return b"".join(parts)
+
+        async def save(self) -> None:
+            """将调用次数快照保存在硬盘"""
+            if self.__dirty_data:
+                self.__dirty_data = False
+                await async_atomic_write(self.__file, self.__dump_snapshot())
+                legacy_file = self.__file.with_suffix(".json")
+                if legacy_file.exists():
+                    legacy_file.unlink()
 
     def __init__(self, path: Path) -> None:
         """CountManager构造函数"""
         self.__plugin_count: Dict[str, CountManager.PluginCount] = {}
         self.__path: Path = path
         self.__path.mkdir(exist_ok=True, parents=True)
+        now = datetime.now()
+        self.__current: List[int] = [_period_id(period, now) for period in CountPeriod]
+        """各周期当前的编号，所有插件共享，重置时只需修改此处
+        """
 
     async def add(
         self, plugin_name: str, count_items: Union[Iterable[CountItem], CountItem, int]
@@ -286,7 +429,7 @@ class CountManager:
             count_items (Union[Iterable[CountItem], CountItem, int]): 插件计数配置们
         """
         self.__plugin_count[plugin_name] = CountManager.PluginCount(
-            file=self.__path / f"{plugin_name}.json"
+            file=self.__path / f"{plugin_name}.bin", current=self.__current
         )
         if isinstance(count_items, int):
             count_items = CountItem(count_items)
@@ -314,10 +457,11 @@ class CountManager:
         )
 
     def reset(self, period: CountPeriod) -> None:
-        """重置调用次数
+        """重置调用次数，O(1)，旧周期的计数会在下次访问时视为0
 
         Args:
             period (CountPeriod): 所需重置的对应周期
         """
-        for plugin_count in self.__plugin_count.values():
-            plugin_count.reset(period)
+        self.__current[period._value_] = max(
+            self.__current[period._value_] + 1, _period_id(period, datetime.now())
+        )
@@ -28,6 +28,21 @@ class CheckType(Enum):
     """
 
 
+@unique
+class CDMode(Enum):
+    """用于CD限制，限制的方式"""
+
+    cooldown = 0
+    """两次调用间隔需大于cd
+    """
+    sliding_window = 1
+    """任意cd秒的窗口内最多调用count次
+    """
+    token_bucket = 2
+    """令牌桶，容量为count，每cd秒补满，允许突发调用
+    """
+
+
 @unique
 class CountPeriod(Enum):
     """用于调用次数限制，限制检测的周期"""
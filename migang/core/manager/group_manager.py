@@ -1,13 +1,13 @@
-import asyncio
-from collections import defaultdict
-from typing import Set, Dict, DefaultDict
+from typing import Set, Dict
 
 from tortoise.transactions import in_transaction
 
 from migang.core.models import GroupStatus
 from migang.core.permission import NORMAL, Permission
+from migang.core.utils.render_cache import render_cache
 from migang.core.manager.task_manager import TaskManager
 from migang.core.manager.plugin_manager import PluginManager
+from migang.core.manager.access_cache import AccessCache, AccessDecision
 
 
 class Group:
@@ -75,39 +75,44 @@ class GroupManager:
         self.__task_manager: TaskManager = task_manager
         """管理任务
         """
-        self.__save_query: DefaultDict[int, Set[str]] = defaultdict(set)
+        self.__access_cache: AccessCache = plugin_manager.access_cache
+        """插件调用决策表，群状态改变时失效
+        """
+        self.__save_query: Set[int] = set()
+        """有未保存修改的群
+        """
 
     async def init(self) -> None:
         """初始化，从数据库中载入"""
         all_groups = await GroupStatus.all()
         for group in all_groups:
             self.__group[group.group_id] = Group(group.permission, group.bot_status)
+        self.__access_cache.clear()
 
     async def save(self) -> None:
-        """写进数据库"""
+        """写进数据库，有修改的群合并为一条upsert语句"""
         if self.__save_query:
-            async with in_transaction() as connection:
-                tasks = []
-                for group_id, fields in self.__save_query.items():
-                    group_status = await GroupStatus.filter(group_id=group_id).first()
-                    if not group_status:
-                        # 若数据库中没有，创建
-                        group_status = GroupStatus(
-                            group_id=group_id,
-                            permission=self.__group[group_id].permission,
-                            bot_status=self.__group[group_id].bot_status,
-                        )
-                    else:
-                        # 更新修改过的项
-                        for field in fields:
-                            group_status.__setattr__(
-                                field, self.__group[group_id].__getattribute__(field)
-                            )
-                    tasks.append(
-                        group_status.save(update_fields=fields, using_db=connection)
+            groups = [
+                GroupStatus(
+                    group_id=group_id,
+                    permission=self.__group[group_id].permission,
+                    bot_status=self.__group[group_id].bot_status,
+                )
+                for group_id in self.__save_query
+            ]
+            self.__save_query.clear()
+            try:
+                async with in_transaction() as connection:
+                    await GroupStatus.bulk_create(
+                        groups,
+                        on_conflict=["group_id"],
+                        update_fields=["permission", "bot_status"],
+                        using_db=connection,
                     )
-                self.__save_query.clear()
-                await asyncio.gather(*tasks)
+            except Exception:
+                # 写入失败时保留修改，下次再试
+                self.__save_query.update(group.group_id for group in groups)
+                raise
 
     def __get_group(self, group_id: int) -> Group:
         """获取group_id对应的Group类，若无，则创建
@@ -121,7 +126,7 @@ class GroupManager:
         group = self.__group.get(group_id)
         if not group:
             group = self.__group[group_id] = Group(permission=NORMAL, bot_status=True)
-            self.__save_query[group_id].update()
+            self.__save_query.add(group_id)
         return group
 
     def check_group_plugin_status(self, plugin_name: str, group_id: int) -> bool:
@@ -141,6 +146,45 @@ class GroupManager:
             group_permission=group.permission,
         )
 
+    def check_plugin_access(
+        self, plugin_name: str, group_id: int, user_permission: Permission
+    ) -> AccessDecision:
+        """检测群group_id中权限为user_permission的用户能否调用plugin_name插件，结果会被缓存
+
+        Args:
+            plugin_name (str): 插件名
+            group_id (int): 群号
+            user_permission (Permission): 用户权限
+
+        Returns:
+            AccessDecision: 检查结果
+        """
+        if (
+            decision := self.__access_cache.get_group(
+                plugin_name=plugin_name,
+                group_id=group_id,
+                user_permission=user_permission,
+            )
+        ) is not None:
+            return decision
+        if not self.check_group_plugin_status(
+            plugin_name=plugin_name, group_id=group_id
+        ):
+            decision = AccessDecision.group_denied
+        elif not self.__plugin_manager.check_user_status(
+            plugin_name=plugin_name, user_permission=user_permission
+        ):
+            decision = AccessDecision.user_denied
+        else:
+            decision = AccessDecision.allowed
+        self.__access_cache.set_group(
+            plugin_name=plugin_name,
+            group_id=group_id,
+            user_permission=user_permission,
+            decision=decision,
+        )
+        return decision
+
     def check_group_task_status(self, task_name: str, group_id: int) -> bool:
         """检测群group_id是否能调用task_name任务，若能，返回True
 
@@ -279,7 +323,8 @@ class GroupManager:
         """
         group = self.__get_group(group_id=group_id)
         if group.set_bot_enable():
-            self.__save_query[group_id].add("bot_status")
+            self.__access_cache.invalidate_group(group_id)
+            self.__save_query.add(group_id)
             return True
         return False
 
@@ -294,7 +339,8 @@ class GroupManager:
         """
         group = self.__get_group(group_id=group_id)
         if group.set_bot_disable():
-            self.__save_query[group_id].add("bot_status")
+            self.__access_cache.invalidate_group(group_id)
+            self.__save_query.add(group_id)
             return True
         return False
 
@@ -307,7 +353,9 @@ class GroupManager:
         """
         group = self.__get_group(group_id=group_id)
         group.set_permission(permission=permission)
-        self.__save_query[group_id].add("permission")
+        self.__access_cache.invalidate_group(group_id)
+        render_cache.invalidate(group_id)
+        self.__save_query.add(group_id)
 
     def get_group_permission(self, group_id: int) -> Permission:
         """获取群权限
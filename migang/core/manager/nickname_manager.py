@@ -0,0 +1,63 @@
+"""缓存昵称系统中的昵称，避免每个事件都查询数据库
+"""
+from typing import Dict, Optional
+
+from migang.core.models import UserProperty
+
+
+class NicknameManager:
+    """管理昵称系统的昵称，写入时同步更新缓存"""
+
+    def __init__(self) -> None:
+        self.__nickname: Dict[int, Optional[str]] = {}
+        """user_id 对应的昵称，值为None表示该用户没有昵称
+        """
+        self.__loaded: bool = False
+        """载入完成后缓存即为全量数据，未命中的用户一定没有昵称
+        """
+
+    async def init(self) -> None:
+        """初始化，从数据库中载入全部昵称"""
+        users = await UserProperty.filter(nickname__not_isnull=True).values_list(
+            "user_id", "nickname"
+        )
+        for user_id, nickname in users:
+            self.__nickname[user_id] = nickname
+        self.__loaded = True
+
+    async def get_nickname(self, user_id: int) -> Optional[str]:
+        """获取用户昵称
+
+        Args:
+            user_id (int): 用户id
+
+        Returns:
+            Optional[str]: 若没有设定昵称，返回None
+        """
+        if user_id in self.__nickname:
+            return self.__nickname[user_id]
+        if self.__loaded:
+            return None
+        # 初始化完成前回退到数据库，结果（包括没有昵称）一并缓存
+        name = (
+            await UserProperty.filter(user_id=user_id).first().values_list("nickname")
+        )
+        nickname = self.__nickname[user_id] = name[0] if name else None
+        return nickname
+
+    async def set_nickname(self, user_id: int, nickname: Optional[str]) -> None:
+        """设定用户昵称，同时写进数据库
+
+        Args:
+            user_id (int): 用户id
+            nickname (Optional[str]): 昵称，为None时表示删除昵称
+        """
+        if user := await UserProperty.filter(user_id=user_id).first():
+            user.nickname = nickname
+            await user.save(update_fields=["nickname"])
+        elif nickname is not None:
+            await UserProperty(user_id=user_id, nickname=nickname).save()
+        if nickname is None and self.__loaded:
+            self.__nickname.pop(user_id, None)
+        else:
+            self.__nickname[user_id] = nickname
@@ -1,148 +1,204 @@
 """管理用户权限，支持定时管理
 """
-import heapq
-import asyncio
+import os
 from pathlib import Path
-from typing import Dict, List, Union
 from datetime import datetime, timedelta
+from typing import Dict, List, Union, Optional
 
-import anyio
-from pydantic import BaseModel
+import ujson as json
+from nonebot.log import logger
 
 from migang.core.permission import Permission
+from migang.core.utils.timer import timer_service
 from migang.core.manager.user_manager import UserManager
 from migang.core.manager.group_manager import GroupManager
+from migang.core.utils.file_operation import load_data, async_atomic_write
 
+_USER = "user"
+_GROUP = "group"
 
-class PermItem(BaseModel):
-    expired: datetime
-    target_perm: Permission
 
-    def __eq__(self, __o: object) -> bool:
-        return self.expired == __o.expired
+class PermItem:
+    """到期后把权限改回target_perm"""
 
-    def __ne__(self, __o: object) -> bool:
-        return self.expired != __o.expired
+    __slots__ = ("expired", "target_perm")
 
-    def __gt__(self, __o: object) -> bool:
-        return self.expired > __o.expired
+    def __init__(self, expired: datetime, target_perm: Permission) -> None:
+        self.expired = expired
+        self.target_perm = target_perm
 
-    def __ge__(self, __o: object) -> bool:
-        return self.expired >= __o.expired
 
-    def __lt__(self, __o: object) -> bool:
-        return self.expired < __o.expired
-
-    def __le__(self, __o: object) -> bool:
-        return self.expired <= __o.expired
-
-
-class GroupPermItem(PermItem):
-    group_id: int
-
-
-class UserPermItem(PermItem):
-    user_id: int
-
-
-class TinyPriorityQueue(BaseModel):
-    """一个勉强能用的优先队列"""
+class PermissionManager:
+    """管理权限，可用于设定限时权限
 
-    data: List[Union[GroupPermItem, UserPermItem]] = []
-    """一个小顶堆
+    到期由timer_service触发，每次修改追加一行到日志文件，保存时写入快照并清空日志
     """
 
-    def push(self, item: Union[GroupPermItem, UserPermItem]) -> None:
-        heapq.heappush(self.data, item)
-
-    def pop(self) -> Union[GroupPermItem, UserPermItem, None]:
-        if len(self.data) == 0:
-            return None
-        return heapq.heappop(self.data)
-
-    def top(self) -> Union[GroupPermItem, UserPermItem, None]:
-        if len(self.data) == 0:
-            return None
-        return self.data[0]
-
-    def empty(self) -> bool:
-        return len(self.data) == 0
-
-    def heapify(self):
-        """O(n)"""
-        heapq.heapify(self.data)
-
-
-class PermissionManager:
-    """管理权限，可用于设定限时权限"""
-
     def __init__(
         self, file: Path, user_manager: UserManager, group_manager: GroupManager
     ) -> None:
         self.__file: Path = file
-        if file.exists():
-            self.__data: TinyPriorityQueue = TinyPriorityQueue.parse_file(file)
-        else:
-            self.__data: TinyPriorityQueue = TinyPriorityQueue()
-        self.__group_data: Dict[int, GroupPermItem] = {}
-        self.__user_data: Dict[int, UserPermItem] = {}
-        """用来检测有没有重复添加
+        self.__journal_file: Path = file.with_suffix(".journal")
+        self.__old_journal_file: Path = file.with_suffix(".journal.old")
+        self.__data: Dict[str, Dict[int, PermItem]] = {_USER: {}, _GROUP: {}}
+        """{类型: {id: PermItem}}
         """
-        for item in self.__data.data:
-            if isinstance(item, GroupPermItem):
-                self.__group_data[item.group_id] = item
-            else:
-                self.__user_data[item.user_id] = item
-
         self.__dirty_data = False
+        self.__load()
         self.__user_manager: UserManager = user_manager
         self.__group_manager: GroupManager = group_manager
-        self.__event: asyncio.Event = asyncio.Event()
+
+    def __load(self) -> None:
+        data = load_data(self.__file)
+        if "data" in data:
+            # 旧版本保存的整个堆
+            for item in data["data"]:
+                kind, id_ = (
+                    (_GROUP, item["group_id"])
+                    if "group_id" in item
+                    else (_USER, item["user_id"])
+                )
+                self.__data[kind][id_] = PermItem(
+                    expired=datetime.fromisoformat(item["expired"]),
+                    target_perm=Permission(item["target_perm"]),
+                )
+        else:
+            for kind, items in data.items():
+                for id_, (expired, target_perm) in items.items():
+                    self.__data[kind][int(id_)] = PermItem(
+                        expired=datetime.fromtimestamp(expired),
+                        target_perm=Permission(target_perm),
+                    )
+        # 保存快照时正在使用的日志，快照写入完成前退出时仍需重放
+        for journal in (self.__old_journal_file, self.__journal_file):
+            if journal.exists():
+                self.__replay(journal)
+
+    def __replay(self, journal: Path) -> None:
+        with open(journal, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    kind, id_, expired, target_perm = json.loads(line)
+                except ValueError:
+                    # 写入到一半的最后一行
+                    logger.warning(f"权限日志 {journal} 存在无法解析的行，已忽略")
+                    continue
+                # 重放的修改尚未写入快照
+                self.__dirty_data = True
+                if expired is None:
+                    self.__data[kind].pop(id_, None)
+                else:
+                    self.__data[kind][id_] = PermItem(
+                        expired=datetime.fromtimestamp(expired),
+                        target_perm=Permission(target_perm),
+                    )
 
     def init(self) -> None:
         """等事件循环出来后启动"""
-        asyncio.create_task(self.__permission_setting_task())
+        timer_service.start()
+        for kind, items in self.__data.items():
+            for id_, item in items.items():
+                self.__schedule(kind, id_, item)
 
     async def save(self) -> None:
         """保存"""
-        # 反正每次启动时候都会检查，所以关bot和新添加时候保存就行了
+        # 修改已记录在日志中，这里只把日志合并为快照
         if self.__dirty_data:
-            async with await anyio.open_file(self.__file, "w", encoding="utf-8") as f:
-                await f.write(self.__data.model_dump_json(indent=4))
             self.__dirty_data = False
-
-    async def __permission_setting_task(self) -> None:
-        """定时检查是否需要把权限改回去的后台任务"""
-        while True:
-            now = datetime.now()
-            while not self.__data.empty() and self.__data.top().expired < now:
-                item = self.__data.pop()
-                if isinstance(item, GroupPermItem):
-                    del self.__group_data[item.group_id]
-                    self.__group_manager.set_group_permission(
-                        group_id=item.group_id, permission=item.target_perm
-                    )
+            data = json.dumps(
+                {
+                    kind: {
+                        id_: [item.expired.timestamp(), int(item.target_perm)]
+                        for id_, item in items.items()
+                    }
+                    for kind, items in self.__data.items()
+                }
+            )
+            # 之后的修改写入新的日志
+            if self.__journal_file.exists():
+                if self.__old_journal_file.exists():
+                    # 上次的快照未写入成功，旧日志仍需保留
+                    self.__append_journal()
                 else:
-                    del self.__user_data[item.user_id]
-                    self.__user_manager.set_user_permission(
-                        user_id=item.user_id, permission=item.target_perm
-                    )
-                self.__dirty_data = True
-            self.__event.clear()
-            if not self.__data.empty():
-                try:
-                    await asyncio.wait_for(
-                        self.__event.wait(),
-                        timeout=max(
-                            (self.__data.top().expired - now).total_seconds(), 0.1
-                        ),
-                    )
-                    # 没超时说明被唤醒了
-                except asyncio.TimeoutError:
-                    # 超时了就接着去清理
-                    pass
+                    self.__journal_file.replace(self.__old_journal_file)
+            await async_atomic_write(self.__file, data)
+            self.__old_journal_file.unlink(missing_ok=True)
+
+    def __append_journal(self) -> None:
+        """将日志追加到旧日志后并删除"""
+        records = self.__journal_file.read_bytes()
+        with open(self.__old_journal_file, "rb+") as f:
+            # 旧日志最后一行可能只写入了一半
+            if f.seek(0, os.SEEK_END):
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    f.write(b"\n")
+            f.write(records)
+        self.__journal_file.unlink()
+
+    def __journal(self, kind: str, id_: int, item: Optional[PermItem]) -> None:
+        """追加一条修改记录，item为None表示删除"""
+        record: List = [kind, id_, None, None]
+        if item is not None:
+            record[2:] = [item.expired.timestamp(), int(item.target_perm)]
+        with open(self.__journal_file, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+        self.__dirty_data = True
+
+    def __schedule(self, kind: str, id_: int, item: PermItem) -> None:
+        timer_service.call_at_datetime(
+            ("permission", kind, id_), item.expired, self.__expire, kind, id_
+        )
+
+    def __set_permission(self, kind: str, id_: int, permission: Permission) -> None:
+        if kind == _GROUP:
+            self.__group_manager.set_group_permission(
+                group_id=id_, permission=permission
+            )
+        else:
+            self.__user_manager.set_user_permission(user_id=id_, permission=permission)
+
+    def __get_permission(self, kind: str, id_: int) -> Permission:
+        if kind == _GROUP:
+            return self.__group_manager.get_group_permission(group_id=id_)
+        return self.__user_manager.get_user_permission(user_id=id_)
+
+    def __expire(self, kind: str, id_: int) -> None:
+        """到期，把权限改回去"""
+        if (item := self.__data[kind].pop(id_, None)) is None:
+            return
+        self.__set_permission(kind, id_, item.target_perm)
+        self.__journal(kind, id_, None)
+
+    def __set_perm(
+        self,
+        kind: str,
+        id_: int,
+        permission: Permission,
+        duration: Union[int, timedelta, None],
+    ) -> None:
+        items = self.__data[kind]
+        if duration is not None:
+            if isinstance(duration, int):
+                duration = timedelta(seconds=duration)
+            if (item := items.get(id_)) is not None:
+                # 已有记录时只延长时间，到期后仍恢复为最初的权限
+                item.expired = datetime.now() + duration
             else:
-                await self.__event.wait()
+                item = items[id_] = PermItem(
+                    expired=datetime.now() + duration,
+                    target_perm=self.__get_permission(kind, id_),
+                )
+            self.__set_permission(kind, id_, permission)
+            self.__schedule(kind, id_, item)
+            self.__journal(kind, id_, item)
+        # 若已有记录，立刻清除记录
+        else:
+            if id_ in items:
+                del items[id_]
+                timer_service.cancel(("permission", kind, id_))
+                self.__journal(kind, id_, None)
+            self.__set_permission(kind, id_, permission)
 
     def set_user_perm(
         self,
@@ -157,40 +213,7 @@ class PermissionManager:
             permission (Permission): _权限
             duration (Union[int, timedelta, None], optional): 时长，当为int时，单位为秒，为None时则永久. Defaults to None.
         """
-        if duration is not None:
-            if isinstance(duration, int):
-                duration = timedelta(seconds=duration)
-            if user_id in self.__user_data:
-                self.__user_data[user_id].expired = datetime.now() + duration
-                self.__data.heapify()
-            else:
-                item = UserPermItem(
-                    expired=datetime.now() + duration,
-                    target_perm=self.__user_manager.get_user_permission(
-                        user_id=user_id
-                    ),
-                    user_id=user_id,
-                )
-                self.__user_data[user_id] = item
-                self.__data.push(item)
-            self.__user_manager.set_user_permission(
-                user_id=user_id, permission=permission
-            )
-            self.__event.set()
-            self.__dirty_data = True
-        # 若已有记录，立刻清除记录
-        else:
-            if user_id in self.__user_data:
-                user = self.__user_data[user_id]
-                user.expired = datetime.now()
-                user.target_perm = permission
-                self.__data.heapify()
-                self.__event.set()
-                self.__dirty_data = True
-            else:
-                self.__user_manager.set_user_permission(
-                    user_id=user_id, permission=permission
-                )
+        self.__set_perm(_USER, user_id, permission, duration)
 
     def set_group_perm(
         self,
@@ -205,39 +228,7 @@ class PermissionManager:
             permission (Permission): _权限
             duration (Union[int, timedelta, None], optional): 时长，当为int时，单位为秒，为None时则永久. Defaults to None.
         """
-        if duration is not None:
-            if isinstance(duration, int):
-                duration = timedelta(seconds=duration)
-            if group_id in self.__group_data:
-                self.__group_data[group_id].expired = datetime.now() + duration
-                self.__data.heapify()
-            else:
-                item = GroupPermItem(
-                    expired=datetime.now() + duration,
-                    target_perm=self.__group_manager.get_group_permission(
-                        group_id=group_id
-                    ),
-                    group_id=group_id,
-                )
-                self.__group_data[group_id] = item
-                self.__data.push(item)
-            self.__group_manager.set_group_permission(
-                group_id=group_id, permission=permission
-            )
-            self.__event.set()  # 唤醒
-            self.__dirty_data = True
-        else:
-            if group_id in self.__group_data:
-                group = self.__group_data[group_id]
-                group.expired = datetime.now()
-                group.target_perm = permission
-                self.__data.heapify()
-                self.__event.set()
-                self.__dirty_data = True
-            else:
-                self.__group_manager.set_group_permission(
-                    group_id=group_id, permission=permission
-                )
+        self.__set_perm(_GROUP, group_id, permission, duration)
 
     def get_user_perm(self, user_id: int) -> Permission:
         """获取用户权限
@@ -5,8 +5,12 @@ from typing import Set, Dict, List, Tuple, Union, Optional
 import anyio
 from pydantic import BaseModel
 
-from migang.core.manager.data_class import PluginType
 from migang.core.permission import NORMAL, Permission
+from migang.core.manager.data_class import PluginType
+from migang.core.utils.render_cache import render_cache
+from migang.core.manager.access_cache import AccessCache
+from migang.core.utils.startup_profile import startup_profiler
+from migang.core.utils.file_operation import async_atomic_write
 
 CUSTOM_USAGE_FILE = Path() / "data" / "core" / "custom_usage.yaml"
 """若在此路径下存在插件名.txt，则插件用法以该文件为主
@@ -82,9 +86,13 @@ class PluginManager:
             self.__non_default_group: Set[int]
             """用于快速查找
             """
+            self.__dirty: bool = False
+            """数据是否有未保存的修改
+            """
 
         async def init(self) -> None:
             """异步初始化插件"""
+            startup_profiler.count_io()
             async with await anyio.open_file(self.__file, "r") as f:
                 self.__data = PluginManager.PluginAttr.model_validate_json(
                     await f.read()
@@ -107,9 +115,11 @@ class PluginManager:
             )
 
         async def save(self) -> None:
-            """将插件数据存储到硬盘"""
-            async with await anyio.open_file(self.__file, "w") as f:
-                await f.write(self.__data.model_dump_json(indent=4))
+            """将插件数据存储到硬盘，仅在有修改时写入"""
+            if not self.__dirty:
+                return
+            self.__dirty = False
+            await async_atomic_write(self.__file, self.__data.model_dump_json(indent=4))
 
         def set_plugin_type(self, type_: PluginType):
             """设置插件类型
@@ -130,11 +140,15 @@ class PluginManager:
 
         def enable(self) -> None:
             """全局启用"""
-            self.__data.global_status = self.__global_status = True
+            if not self.__global_status:
+                self.__data.global_status = self.__global_status = True
+                self.__dirty = True
 
         def disable(self) -> None:
             """全局禁用"""
-            self.__data.global_status = self.__global_status = False
+            if self.__global_status:
+                self.__data.global_status = self.__global_status = False
+                self.__dirty = True
 
         def check_group_status(
             self, group_id: int, group_permission: Permission
@@ -203,13 +217,17 @@ class PluginManager:
             if self.__default_status:
                 if group_id in self.__non_default_group:
                     self.__non_default_group.remove(group_id)
+                    self.__dirty = True
                 if group_id not in self.__data.enabled_group:
                     self.__data.enabled_group.add(group_id)
+                    self.__dirty = True
             else:
                 if group_id not in self.__non_default_group:
                     self.__non_default_group.add(group_id)
+                    self.__dirty = True
                 if group_id in self.__data.disabled_group:
                     self.__data.disabled_group.remove(group_id)
+                    self.__dirty = True
             return True
 
         def set_group_disable(self, group_id: int) -> bool:
@@ -226,13 +244,17 @@ class PluginManager:
             if self.__default_status:
                 if group_id not in self.__non_default_group:
                     self.__non_default_group.add(group_id)
+                    self.__dirty = True
                 if group_id in self.__data.enabled_group:
                     self.__data.enabled_group.remove(group_id)
+                    self.__dirty = True
             else:
                 if group_id in self.__non_default_group:
                     self.__non_default_group.remove(group_id)
+                    self.__dirty = True
                 if group_id not in self.__data.disabled_group:
                     self.__data.disabled_group.add(group_id)
+                    self.__dirty = True
             return True
 
         def set_usage(self, usage: Optional[str]) -> None:
@@ -259,7 +281,9 @@ class PluginManager:
             Args:
                 group_set (Set[int]): 当前有效的群
             """
-            self.__non_default_group &= group_set
+            if not self.__non_default_group <= group_set:
+                self.__non_default_group &= group_set
+                self.__dirty = True
 
     def __init__(self, file_path: Path) -> None:
         """PluginManager构造函数，管理全部插件
@@ -280,6 +304,18 @@ class PluginManager:
         )
         """初始化后就销毁，添加新插件时减少系统调用
         """
+        self.__access_cache: AccessCache = AccessCache()
+        """插件调用决策表，插件状态改变时失效
+        """
+
+    @property
+    def access_cache(self) -> AccessCache:
+        """插件调用决策表，供group_manager与user_manager共用
+
+        Returns:
+            AccessCache: 决策表
+        """
+        return self.__access_cache
 
     async def init(self) -> List[Optional[str]]:
         """异步初始化所有Plugin类
@@ -296,6 +332,7 @@ class PluginManager:
             if not ret[i]:
                 for alias in plugin.all_name:
                     self.__plugin_aliases[alias] = plugin.plugin_name
+        self.__access_cache.clear()
         return ret
 
     def check_group_status(
@@ -372,6 +409,8 @@ class PluginManager:
         if (plugin := self.__plugin.get(plugin_name)) and plugin.set_group_enable(
             group_id
         ):
+            self.__access_cache.invalidate_group(group_id)
+            render_cache.invalidate(group_id)
             await plugin.save()
             return True
         return False
@@ -389,6 +428,8 @@ class PluginManager:
         if (plugin := self.__plugin.get(plugin_name)) and plugin.set_group_disable(
             group_id
         ):
+            self.__access_cache.invalidate_group(group_id)
+            render_cache.invalidate(group_id)
             await plugin.save()
             return True
         return False
@@ -457,6 +498,12 @@ class PluginManager:
         group_list = set(group_list)
         for plugin in self.__plugin.values():
             plugin.clean_group(group_list)
+        self.__access_cache.clear()
+        render_cache.invalidate()
+        await self.save()
+
+    async def save(self) -> None:
+        """保存有修改的插件"""
         await asyncio.gather(*[plugin.save() for plugin in self.__plugin.values()])
 
     # def set_plugin_usage(self, plugin_name: str, usage: Optional[str]):
@@ -519,6 +566,8 @@ class PluginManager:
         if not plugin:
             return
         plugin.enable()
+        self.__access_cache.clear()
+        render_cache.invalidate()
         await plugin.save()
 
     async def disable_plugin(self, plugin_name: str):
@@ -531,6 +580,8 @@ class PluginManager:
         if not plugin:
             return
         plugin.disable()
+        self.__access_cache.clear()
+        render_cache.invalidate()
         await plugin.save()
 
     async def add(
@@ -576,6 +627,7 @@ class PluginManager:
                 aliases = set()
             else:
                 aliases = set(aliases)
+            startup_profiler.count_io()
             async with await anyio.open_file(self.__file_path / file_name, "w") as f:
                 await f.write(
                     PluginManager.PluginAttr(
@@ -599,6 +651,8 @@ class PluginManager:
             always_on=always_on,
             plugin_type=plugin_type,
         )
+        self.__access_cache.clear()
+        render_cache.invalidate()
         return new_plugin
 
     async def remove(self, plugin_name: set) -> None:
@@ -609,4 +663,6 @@ class PluginManager:
         """
         if plugin_name in self.__plugin:
             del self.__plugin[plugin_name]
+            self.__access_cache.clear()
+            render_cache.invalidate()
             (self.__file_path / f"{plugin_name}.json").unlink()
@@ -4,11 +4,12 @@ from pathlib import Path
 from datetime import datetime
 from typing import List, Optional
 
-import anyio
 from nonebot.log import logger
 from pydantic import BaseModel
 from nonebot.adapters.onebot.v11 import Bot, ActionFailed
 
+from migang.core.utils.file_operation import async_atomic_write
+
 
 class GroupRequest(BaseModel):
     group_name: Optional[str]
@@ -50,8 +51,7 @@ class RequestManager:
             self.__data = Requests()
 
     async def save(self) -> None:
-        async with await anyio.open_file(self.__file, "w", encoding="utf-8") as f:
-            await f.write(self.__data.model_dump_json(indent=4))
+        await async_atomic_write(self.__file, self.__data.model_dump_json(indent=4))
 
     async def add(
         self,
@@ -6,6 +6,9 @@ import anyio
 from pydantic import BaseModel
 
 from migang.core.permission import NORMAL, Permission
+from migang.core.utils.render_cache import render_cache
+from migang.core.utils.startup_profile import startup_profiler
+from migang.core.utils.file_operation import async_atomic_write
 
 
 class TaskItem:
@@ -73,9 +76,13 @@ class TaskManager:
             self.__global_status: bool
             self.__default_status: bool
             self.__non_default_group: Set[int]
+            self.__dirty: bool = False
+            """数据是否有未保存的修改
+            """
 
         async def init(self) -> None:
             """异步初始化Task类"""
+            startup_profiler.count_io()
             async with await anyio.open_file(self.__file, "r") as f:
                 self.__data = TaskManager.TaskAttr.model_validate_json(await f.read())
             self.name: str = self.__data.name
@@ -89,9 +96,11 @@ class TaskManager:
             )
 
         async def save(self) -> None:
-            """保存数据进文件"""
-            async with await anyio.open_file(self.__file, "w") as f:
-                await f.write(self.__data.model_dump_json(indent=4))
+            """保存数据进文件，仅在有修改时写入"""
+            if not self.__dirty:
+                return
+            self.__dirty = False
+            await async_atomic_write(self.__file, self.__data.model_dump_json(indent=4))
 
         @property
         def global_status(self) -> bool:
@@ -112,11 +121,15 @@ class TaskManager:
 
         def enable(self):
             """全局启用"""
-            self.__data.global_status = self.__global_status = True
+            if not self.__global_status:
+                self.__data.global_status = self.__global_status = True
+                self.__dirty = True
 
         def disable(self):
             """全局禁用"""
-            self.__data.global_status = self.__global_status = False
+            if self.__global_status:
+                self.__data.global_status = self.__global_status = False
+                self.__dirty = True
 
         def check_group_status(
             self, group_id: int, group_permission: Permission
@@ -161,13 +174,17 @@ class TaskManager:
             if self.__default_status:
                 if group_id in self.__non_default_group:
                     self.__non_default_group.remove(group_id)
+                    self.__dirty = True
                 if group_id not in self.__data.enabled_group:
                     self.__data.enabled_group.add(group_id)
+                    self.__dirty = True
             else:
                 if group_id not in self.__non_default_group:
                     self.__non_default_group.add(group_id)
+                    self.__dirty = True
                 if group_id in self.__data.disabled_group:
                     self.__data.disabled_group.remove(group_id)
+                    self.__dirty = True
             return True
 
         def set_group_disable(self, group_id: int) -> bool:
@@ -182,13 +199,17 @@ class TaskManager:
             if self.__default_status:
                 if group_id not in self.__non_default_group:
                     self.__non_default_group.add(group_id)
+                    self.__dirty = True
                 if group_id in self.__data.enabled_group:
                     self.__data.enabled_group.remove(group_id)
+                    self.__dirty = True
             else:
                 if group_id in self.__non_default_group:
                     self.__non_default_group.remove(group_id)
+                    self.__dirty = True
                 if group_id not in self.__data.disabled_group:
                     self.__data.disabled_group.add(group_id)
+                    self.__dirty = True
             return True
 
         def clean_group(self, group_set: Set[int]) -> None:
@@ -197,7 +218,9 @@ class TaskManager:
             Args:
                 group_set (Set[int]): 当前有效的群
             """
-            self.__non_default_group &= group_set
+            if not self.__non_default_group <= group_set:
+                self.__non_default_group &= group_set
+                self.__dirty = True
 
     def __init__(self, file_path: Path) -> None:
         """TaskManager构造函数，管理全部插件
@@ -276,6 +299,7 @@ class TaskManager:
             bool: 若返回False则表示已被全局禁用，反之返回True
         """
         if (task := self.__task.get(task_name)) and task.set_group_enable(group_id):
+            render_cache.invalidate(group_id)
             await task.save()
             return True
         return False
@@ -291,6 +315,7 @@ class TaskManager:
             bool: 返回True
         """
         if (task := self.__task.get(task_name)) and task.set_group_disable(group_id):
+            render_cache.invalidate(group_id)
             await task.save()
             return True
         return False
@@ -359,6 +384,11 @@ class TaskManager:
         group_list = set(group_list)
         for task in self.__task.values():
             task.clean_group(group_list)
+        render_cache.invalidate()
+        await self.save()
+
+    async def save(self) -> None:
+        """保存有修改的任务"""
         await asyncio.gather(*[task.save() for task in self.__task.values()])
 
     async def enable_task(self, task_name: str):
@@ -371,6 +401,7 @@ class TaskManager:
         if not task:
             return
         task.enable()
+        render_cache.invalidate()
         await task.save()
 
     async def disable_task(self, task_name: str):
@@ -383,6 +414,7 @@ class TaskManager:
         if not task:
             return
         task.disable()
+        render_cache.invalidate()
         await task.save()
 
     def set_task_usage(self, task_name: str, usage: Optional[str]):
@@ -407,6 +439,7 @@ class TaskManager:
         for item in task_items:
             file_name = f"{item.task_name}.json"
             if file_name not in self.__files:
+                startup_profiler.count_io()
                 async with await anyio.open_file(
                     self.__file_path / file_name, "w"
                 ) as f:
@@ -424,6 +457,7 @@ class TaskManager:
             self.__task[item.task_name] = TaskManager.Task(
                 file=self.__file_path / file_name, usage=item.usage
             )
+        render_cache.invalidate()
 
     async def remove(self, task_name: str) -> None:
         """从TaskManager中移除插件
@@ -433,4 +467,5 @@ class TaskManager:
         """
         if task_name in self.__task:
             del self.__task[task_name]
+            render_cache.invalidate()
             (self.__file_path / f"{task_name}.json").unlink()
@@ -1,6 +1,4 @@
-import asyncio
-from collections import defaultdict
-from typing import Set, Dict, DefaultDict
+from typing import Set, Dict
 
 from tortoise.transactions import in_transaction
 
@@ -44,7 +42,9 @@ class UserManager:
         self.__plugin_manager = plugin_manager
         """管理插件
         """
-        self.__save_query: DefaultDict[int, Set[str]] = defaultdict(set)
+        self.__save_query: Set[int] = set()
+        """有未保存修改的用户
+        """
 
     async def init(self) -> None:
         """初始化，从数据库中载入"""
@@ -53,28 +53,25 @@ class UserManager:
             self.__user[user.user_id] = User(permission=user.permission)
 
     async def save(self) -> None:
-        """写进数据库"""
+        """写进数据库，有修改的用户合并为一条upsert语句"""
         if self.__save_query:
-            async with in_transaction() as connection:
-                tasks = []
-                for user_id, fields in self.__save_query.items():
-                    user_status = await UserStatus.filter(user_id=user_id).first()
-                    if not user_status:
-                        # 若数据库中没有，创建
-                        user_status = UserStatus(
-                            user_id=user_id, permission=self.__user[user_id].permission
-                        )
-                    else:
-                        # 更新修改过的项
-                        for field in fields:
-                            user_status.__setattr__(
-                                field, self.__user[user_id].__getattribute__(field)
-                            )
-                    tasks.append(
-                        user_status.save(update_fields=fields, using_db=connection)
+            users = [
+                UserStatus(user_id=user_id, permission=self.__user[user_id].permission)
+                for user_id in self.__save_query
+            ]
+            self.__save_query.clear()
+            try:
+                async with in_transaction() as connection:
+                    await UserStatus.bulk_create(
+                        users,
+                        on_conflict=["user_id"],
+                        update_fields=["permission"],
+                        using_db=connection,
                     )
-                self.__save_query.clear()
-                await asyncio.gather(*tasks)
+            except Exception:
+                # 写入失败时保留修改，下次再试
+                self.__save_query.update(user.user_id for user in users)
+                raise
 
     def __get_user(self, user_id: int) -> User:
         """获取user_id对应的User类，若无，则创建
@@ -88,7 +85,7 @@ class UserManager:
         user = self.__user.get(user_id)
         if not user:
             user = self.__user[user_id] = User(permission=NORMAL)
-            self.__save_query[user_id].update()
+            self.__save_query.add(user_id)
         return user
 
     def check_user_plugin_status(self, plugin_name: str, user_id: int) -> bool:
@@ -101,10 +98,21 @@ class UserManager:
         Returns:
             bool: 若能调用，返回True
         """
-        user = self.__get_user(user_id=user_id)
-        return self.__plugin_manager.check_user_status(
-            plugin_name=plugin_name, user_permission=user.permission
-        )
+        permission = self.__get_user(user_id=user_id).permission
+        access_cache = self.__plugin_manager.access_cache
+        if (
+            status := access_cache.get_private(
+                plugin_name=plugin_name, user_permission=permission
+            )
+        ) is None:
+            status = self.__plugin_manager.check_user_status(
+                plugin_name=plugin_name, user_permission=permission
+            )
+            # 用户权限是key的一部分，修改用户权限无需失效
+            access_cache.set_private(
+                plugin_name=plugin_name, user_permission=permission, status=status
+            )
+        return status
 
     def check_plugin_permission(self, plugin_name: str, user_id: int) -> bool:
         """检测用户user_id是否有插件plugin_name的调用权限
@@ -130,7 +138,7 @@ class UserManager:
         """
         user = self.__get_user(user_id=user_id)
         user.set_permission(permission=permission)
-        self.__save_query[user_id].add("permission")
+        self.__save_query.add(user_id)
 
     def get_user_permission(self, user_id: int) -> Permission:
         """获取用户权限
@@ -1,8 +1,13 @@
 import asyncio
+from io import BytesIO
+from base64 import b64encode
+from time import time, monotonic
 from random import random, shuffle
-from typing import Dict, List, Union, Iterable, Optional
+from dataclasses import field, dataclass
+from typing import Any, Dict, List, Tuple, Union, Iterable, Optional
 
-from nonebot import get_bot
+import ujson as json
+from nonebot import get_driver
 from nonebot.log import logger
 from nonebot.adapters.onebot.v11 import (
     Bot,
@@ -12,126 +17,418 @@ from nonebot.adapters.onebot.v11 import (
     MessageSegment,
 )
 
+from migang.core.path import DATA_PATH
 from migang.core.manager import group_manager, group_bot_manager
+from migang.core.utils.file_operation import async_atomic_write
 
+PROGRESS_PATH = DATA_PATH / "core" / "broadcast"
+"""未完成的推送进度，重启后继续推送
+"""
+
+# 每个bot的发送速率（条/秒）与突发容量，失败时减半，成功后逐步恢复
+_RATE = 1.25
+_MIN_RATE = 0.2
+_RATE_STEP = 0.05
+_BURST = 3
+# 进度写入间隔
+_SAVE_INTERVAL = 5
+# 超过该时间的进度不再继续
+_RESUME_EXPIRE = 6 * 60 * 60
+# 首个bot连接后等待其他bot连接再继续推送
+_RESUME_DELAY = 60
+
+
+class RateLimiter:
+    """令牌桶，失败时发送速率减半，成功时线性恢复"""
+
+    def __init__(self, rate: float = _RATE, burst: int = _BURST) -> None:
+        self.__max_rate = rate
+        self.rate = rate
+        self.__burst = burst
+        self.__tokens: float = burst
+        self.__last: float = monotonic()
+        self.__lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        """等待一个令牌"""
+        async with self.__lock:
+            while True:
+                now = monotonic()
+                self.__tokens = min(
+                    self.__burst, self.__tokens + (now - self.__last) * self.rate
+                )
+                self.__last = now
+                if self.__tokens >= 1:
+                    self.__tokens -= 1
+                    return
+                # 加一点随机，避免发送间隔过于规律
+                await asyncio.sleep((1 - self.__tokens) / self.rate + random() * 0.1)
+
+    def on_success(self) -> None:
+        self.rate = min(self.__max_rate, self.rate + _RATE_STEP)
+
+    def on_failure(self) -> None:
+        self.rate = max(_MIN_RATE, self.rate / 2)
+        # 丢弃已积攒的令牌，立即放慢
+        self.__tokens = min(self.__tokens, 0)
+
+
+_limiters: Dict[str, RateLimiter] = {}
+"""{bot.self_id: RateLimiter}，同一bot的多个推送共用
+"""
+
+
+def _get_limiter(bot: Bot) -> RateLimiter:
+    if (limiter := _limiters.get(bot.self_id)) is None:
+        limiter = _limiters[bot.self_id] = RateLimiter()
+    return limiter
+
+
+@dataclass
+class BroadcastStats:
+    """一次推送的统计"""
+
+    task_name: str
+    groups: int = 0
+    sent: int = 0
+    """发送成功的消息数
+    """
+    failed: int = 0
+    """重试后仍失败的群数
+    """
+    blocked: int = 0
+    """被风控拦截而放弃的群数
+    """
+    retried: int = 0
+    start: float = field(default_factory=monotonic)
+    elapsed: float = 0
+
+    @property
+    def throughput(self) -> float:
+        """每秒发送的消息数"""
+        return self.sent / self.elapsed if self.elapsed else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"推送 {self.task_name} 完成：{self.groups} 个群，成功 {self.sent} 条，"
+            f"失败 {self.failed} 个群，拦截 {self.blocked} 个群，重试 {self.retried} 次，"
+            f"耗时 {self.elapsed:.1f}s，{self.throughput:.2f} 条/s"
+        )
+
+
+def _encode_media(value: Any) -> Any:
+    """将消息中bytes与BytesIO形式的媒体转换为base64://，各群共用同一份编码结果"""
+    if isinstance(value, MessageSegment):
+        return MessageSegment(
+            value.type, {k: _encode_media(v) for k, v in value.data.items()}
+        )
+    if isinstance(value, Message):
+        return Message([_encode_media(seg) for seg in value])
+    if isinstance(value, dict):
+        return {k: _encode_media(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_encode_media(v) for v in value]
+    if isinstance(value, BytesIO):
+        value = value.getvalue()
+    if isinstance(value, bytes):
+        return f"base64://{b64encode(value).decode()}"
+    return value
+
+
+def _dump_seg(value: Any) -> Any:
+    """将消息转换为可json序列化的结构"""
+    if isinstance(value, MessageSegment):
+        return {
+            "type": value.type,
+            "data": {k: _dump_seg(v) for k, v in value.data.items()},
+        }
+    if isinstance(value, Message):
+        return {"message": [_dump_seg(seg) for seg in value]}
+    return value
+
+
+def _load_seg(value: Any) -> Any:
+    if isinstance(value, dict):
+        if "message" in value and len(value) == 1:
+            return Message([_load_seg(seg) for seg in value["message"]])
+        if value.keys() == {"type", "data"}:
+            return MessageSegment(
+                value["type"], {k: _load_seg(v) for k, v in value["data"].items()}
+            )
+    return value
+
+
+class BroadcastTask:
+    """向多个群推送同一组消息，各bot并行发送，进度保存在PROGRESS_PATH"""
 
-class SendManager:
     def __init__(
         self,
-        bot: Bot,
-        group_list: List[int],
-        msg: Iterable[Union[Message, MessageSegment]],
-        forward=False,
+        task_name: str,
+        msg: Tuple[Union[Message, MessageSegment], ...],
+        forward: bool = False,
+        progress: Optional[Dict[int, int]] = None,
+        task_id: Optional[str] = None,
+        created: Optional[float] = None,
         retry_limit: int = 3,
         retry_interval: int = 5,
-    ):
-        self.bot = bot
-        self.group_list = group_list
+    ) -> None:
+        """BroadcastTask构造函数
+
+        Args:
+            task_name (str): 任务名
+            msg (Tuple[Union[Message, MessageSegment], ...]): 消息，转发模式下为转发节点
+            forward (bool, optional): 若以转发模式，则True. Defaults to False.
+            progress (Optional[Dict[int, int]], optional): 继续推送时的进度. Defaults to None.
+            task_id (Optional[str], optional): 继续推送时的任务id. Defaults to None.
+            created (Optional[float], optional): 继续推送时的创建时间. Defaults to None.
+            retry_limit (int, optional): 重试次数. Defaults to 3.
+            retry_interval (int, optional): 重试间隔. Defaults to 5.
+        """
+        self.task_name = task_name
         self.msg = msg
         self.forward = forward
         self.retry_limit = retry_limit
         self.retry_interval = retry_interval
-        self.failed_dict: Dict[int, Union[set[int], bool]] = {}
+        self.task_id = task_id or f"{task_name}_{int(time() * 1000)}"
+        self.__file = PROGRESS_PATH / f"{self.task_id}.json"
+        self.__created = created or time()
+        self.__total = 1 if forward else len(msg)
+        """每个群需要发送的消息数
+        """
+        self.progress: Dict[int, int] = progress if progress is not None else {}
+        """{group_id: 下一条要发送的消息下标}，发送完成的群会被移除
+        """
+        self.stats = BroadcastStats(task_name=task_name)
+        self.__dirty = False
+        self.__persistable = True
 
-    async def retry(self):
-        for i in range(self.retry_limit):
-            if self.forward:
-                for group in list(self.failed_dict):
-                    await asyncio.sleep(random() + 0.3)
-                    try:
-                        await self.bot.send_group_forward_msg(
-                            group_id=group, messages=self.msg
-                        )
-                        self.failed_dict.pop(group)
-                    except (ActionFailed, NetworkError) as e:
-                        logger.error(f"GROUP {group} 消息发送失败 {type(e)}: {e}")
+    async def __send_group(self, bot: Bot, group_id: int, limiter: RateLimiter) -> bool:
+        """发送一个群剩余的消息
+
+        Returns:
+            bool: 若发送完成或放弃，返回True，需要重试时返回False
+        """
+        while (idx := self.progress.get(group_id)) is not None:
+            await limiter.acquire()
+            try:
+                if self.forward:
+                    await bot.send_group_forward_msg(
+                        group_id=group_id, messages=self.msg
+                    )
+                else:
+                    await bot.send_group_msg(group_id=group_id, message=self.msg[idx])
+            except (ActionFailed, NetworkError) as e:
+                logger.error(f"GROUP {group_id} 消息发送失败 {type(e)}: {e}")
+                # blocked by server时不处理
+                if isinstance(e, ActionFailed) and "blocked by server" in (
+                    e.info.get("message", "")
+                ):
+                    self.stats.blocked += 1
+                    self.__finish_group(group_id)
+                    return True
+                limiter.on_failure()
+                return False
+            limiter.on_success()
+            self.stats.sent += 1
+            self.__dirty = True
+            if idx + 1 >= self.__total:
+                self.__finish_group(group_id)
             else:
-                for group in list(self.failed_dict):
-                    for idx in list(self.failed_dict[group]):
-                        await asyncio.sleep(random() + 0.3)
-                        try:
-                            await self.bot.send_group_msg(
-                                group_id=group, message=self.msg[idx]
-                            )
-                            self.failed_dict[group].remove(idx)
-                        except (ActionFailed, NetworkError) as e:
-                            logger.error(f"GROUP {group} 消息发送失败 {type(e)}: {e}")
-                    if not self.failed_dict[group]:
-                        self.failed_dict.pop(group)
-
-            if not self.failed_dict:
-                break
+                self.progress[group_id] = idx + 1
+        return True
+
+    def __finish_group(self, group_id: int) -> None:
+        self.progress.pop(group_id, None)
+        self.__dirty = True
+
+    async def __run_bot(self, bot: Bot, group_list: List[int]) -> None:
+        """单个bot依次发送，失败的群在最后统一重试"""
+        limiter = _get_limiter(bot)
+        failed = [
+            group_id
+            for group_id in group_list
+            if not await self.__send_group(bot, group_id, limiter)
+        ]
+        for i in range(self.retry_limit):
+            if not failed:
+                return
             logger.warning(
-                f"剩余 {len(self.failed_dict)} 个消息发送失败，重试次数{i+1}/{self.retry_limit}"
+                f"BOT {bot.self_id} 剩余 {len(failed)} 个群发送失败，重试次数{i+1}/{self.retry_limit}"
             )
             await asyncio.sleep(self.retry_interval)
+            self.stats.retried += len(failed)
+            failed = [
+                group_id
+                for group_id in failed
+                if not await self.__send_group(bot, group_id, limiter)
+            ]
+        self.stats.failed += len(failed)
+        for group_id in failed:
+            self.__finish_group(group_id)
 
-    async def do(self):
-        if self.forward:
-            for group in self.group_list:
-                await asyncio.sleep(random() + 0.3)
-                try:
-                    await self.bot.send_group_forward_msg(
-                        group_id=group, messages=self.msg
-                    )
-                except (ActionFailed, NetworkError) as e:
-                    logger.error(f"GROUP {group} 消息发送失败 {type(e)}: {e}")
-                    # blocked by server时不处理
-                    if isinstance(
-                        e, ActionFailed
-                    ) and "blocked by server" in e.info.get("message", ""):
-                        pass
-                    else:
-                        self.failed_dict[group] = True
-        else:
-            for group in self.group_list:
-                for i, m in enumerate(self.msg):
-                    await asyncio.sleep(random() + 0.3)
-                    try:
-                        await self.bot.send_group_msg(group_id=group, message=m)
-                    except (ActionFailed, NetworkError) as e:
-                        logger.error(f"GROUP {group} 消息发送失败 {type(e)}: {e}")
-                        if isinstance(
-                            e, ActionFailed
-                        ) and "blocked by server" in e.info.get("message", ""):
-                            pass
-                        else:
-                            if group not in self.failed_dict:
-                                self.failed_dict[group] = set()
-                            self.failed_dict[group].add(i)
-        if self.failed_dict:
-            logger.warning(f"共 {len(self.failed_dict)} 个消息发送失败，即将重试")
-            await asyncio.sleep(self.retry_interval)
-            await self.retry()
+    async def save(self) -> None:
+        """保存进度，全部完成后删除进度文件"""
+        self.__dirty = False
+        if not self.progress:
+            self.__file.unlink(missing_ok=True)
+            return
+        if not self.__persistable:
+            return
+        try:
+            data = json.dumps(
+                {
+                    "task_name": self.task_name,
+                    "forward": self.forward,
+                    "created": self.__created,
+                    "msg": [_dump_seg(m) for m in self.msg],
+                    "progress": self.progress,
+                },
+                ensure_ascii=False,
+            )
+        except (TypeError, OverflowError) as e:
+            # 消息中含有无法序列化的内容时只能放弃断点续传
+            logger.warning(f"推送 {self.task_id} 的进度无法保存：{e}")
+            self.__persistable = False
+            return
+        await async_atomic_write(self.__file, data)
 
+    async def __save_loop(self) -> None:
+        while True:
+            await asyncio.sleep(_SAVE_INTERVAL)
+            if self.__dirty:
+                await self.save()
 
-async def broadcast(
-    task_name: str,
-    msg: Union[Iterable[Union[Message, MessageSegment]], Message, MessageSegment, str],
-    forward: bool = False,
-) -> None:
-    """将消息推送到task_name启用的所有群
+    async def run(self, bot_group_map: Dict[Bot, List[int]]) -> BroadcastStats:
+        """各bot并行发送
+
+        Args:
+            bot_group_map (Dict[Bot, List[int]]): 每个bot负责的群
+
+        Returns:
+            BroadcastStats: 统计
+        """
+        # 继续推送时，已无bot负责或已关闭任务的群不再发送
+        self.progress = {
+            group_id: self.progress.get(group_id, 0)
+            for group_list in bot_group_map.values()
+            for group_id in group_list
+        }
+        self.stats.groups = len(self.progress)
+        if not self.progress:
+            return self.stats
+        await self.save()
+        saver = asyncio.create_task(self.__save_loop())
+        try:
+            await asyncio.gather(
+                *[
+                    self.__run_bot(bot, group_list)
+                    for bot, group_list in bot_group_map.items()
+                    if group_list
+                ]
+            )
+        finally:
+            saver.cancel()
+            await self.save()
+        self.stats.elapsed = monotonic() - self.stats.start
+        logger.info(str(self.stats))
+        return self.stats
+
+    @classmethod
+    async def load(cls, file) -> Optional["BroadcastTask"]:
+        """从进度文件恢复，过期或损坏的进度会被删除"""
+        try:
+            data = json.loads(file.read_text(encoding="utf-8"))
+            if time() - data["created"] > _RESUME_EXPIRE:
+                raise ValueError("进度已过期")
+            task = cls(
+                task_name=data["task_name"],
+                msg=tuple(_load_seg(m) for m in data["msg"]),
+                forward=data["forward"],
+                progress={int(k): v for k, v in data["progress"].items()},
+                task_id=file.stem,
+                created=data["created"],
+            )
+        except (ValueError, KeyError, TypeError) as e:
+            logger.warning(f"放弃推送进度 {file.name}：{e}")
+            file.unlink(missing_ok=True)
+            return None
+        return task
+
+
+def _get_bot_group_map(
+    task_name: str, groups: Optional[Iterable[int]] = None
+) -> Dict[Bot, List[int]]:
+    """获取每个bot负责推送的群
 
     Args:
         task_name (str): 任务名
-        msg (Union[Iterable[Union[Message, MessageSegment]], Message, MessageSegment]): 消息
-        forward (bool, optional): 若以转发模式，则True. Defaults to False.
-        bot (Optional[Bot], optional): 选定的bot. Defaults to None.
+        groups (Optional[Iterable[int]], optional): 仅包含这些群. Defaults to None.
     """
-    group_bot_list = group_bot_manager.get_valid_group()
+    groups = set(groups) if groups is not None else None
     bot_group_map: Dict[Bot, List[int]] = {}
-    for bot, group_id in group_bot_list:
+    for bot, group_id in group_bot_manager.get_valid_group():
         if bot not in bot_group_map:
             bot_group_map[bot] = []
-        if group_manager.check_group_task_status(
-            task_name=task_name, group_id=group_id
+        if (groups is None or group_id in groups) and (
+            group_manager.check_group_task_status(
+                task_name=task_name, group_id=group_id
+            )
         ):
             bot_group_map[bot].append(group_id)
     for group_list in bot_group_map.values():
         shuffle(group_list)
+    return bot_group_map
+
+
+async def broadcast(
+    task_name: str,
+    msg: Union[Iterable[Union[Message, MessageSegment]], Message, MessageSegment, str],
+    forward: bool = False,
+) -> BroadcastStats:
+    """将消息推送到task_name启用的所有群
+
+    Args:
+        task_name (str): 任务名
+        msg (Union[Iterable[Union[Message, MessageSegment]], Message, MessageSegment]): 消息
+        forward (bool, optional): 若以转发模式，则True. Defaults to False.
+
+    Returns:
+        BroadcastStats: 推送统计
+    """
     if isinstance(msg, str):
         msg = Message(msg)
     if isinstance(msg, Message) or isinstance(msg, MessageSegment):
         msg = (msg,)
-    for bot, group_list in bot_group_map.items():
-        await SendManager(bot=bot, group_list=group_list, msg=msg, forward=forward).do()
+    # 只编码一次，推送进度也因此可以保存
+    return await BroadcastTask(
+        task_name=task_name, msg=tuple(_encode_media(m) for m in msg), forward=forward
+    ).run(_get_bot_group_map(task_name))
+
+
+_resume_task: Optional[asyncio.Task] = None
+
+
+async def _resume() -> None:
+    await asyncio.sleep(_RESUME_DELAY)
+    if not PROGRESS_PATH.exists():
+        return
+    tasks = [
+        task
+        for file in PROGRESS_PATH.glob("*.json")
+        if (task := await BroadcastTask.load(file))
+    ]
+    for task in tasks:
+        logger.info(f"继续推送 {task.task_id}，剩余 {len(task.progress)} 个群")
+    await asyncio.gather(
+        *[
+            task.run(_get_bot_group_map(task.task_name, groups=list(task.progress)))
+            for task in tasks
+        ]
+    )
+
+
+@get_driver().on_bot_connect
+async def _():
+    global _resume_task
+    if _resume_task is None:
+        _resume_task = asyncio.create_task(_resume())
@@ -0,0 +1,300 @@
+"""用户头像缓存，按内容哈希存放在硬盘，过期后通过ETag/Last-Modified重新验证
+"""
+import asyncio
+import hashlib
+from time import time
+from io import BytesIO
+from collections import OrderedDict
+from typing import Dict, List, Tuple, Iterable, Optional
+
+import anyio
+import ujson as json
+from PIL import Image
+from nonebot import get_driver
+from nonebot.log import logger
+
+from migang.core.path import DATA_PATH
+from migang.utils.http import http_session
+from migang.core.utils.file_operation import async_atomic_write
+
+AVATAR_PATH = DATA_PATH / "core" / "avatar"
+_BLOB_PATH = AVATAR_PATH / "blob"
+_INDEX_FILE = AVATAR_PATH / "index.json"
+_AVATAR_URL = "http://q1.qlogo.cn/g?b=qq&nk={qq}&s={size}"
+# 超过该时间后向服务器验证头像是否变化
+_TTL = 24 * 60 * 60
+# 硬盘中头像的总大小
+_MAX_SIZE = 256 * 1024 * 1024
+# 批量预取时的并发数
+_PREFETCH_CONCURRENCY = 8
+# 解码后图片的缓存数，为0时不缓存
+_DECODED_CACHE_SIZE = 64
+
+
+class _Entry:
+    """(qq, size)对应的头像"""
+
+    __slots__ = ("digest", "etag", "last_modified", "checked")
+
+    def __init__(
+        self,
+        digest: str,
+        etag: Optional[str],
+        last_modified: Optional[str],
+        checked: float,
+    ) -> None:
+        self.digest = digest
+        self.etag = etag
+        self.last_modified = last_modified
+        self.checked = checked
+        """上次从服务器获取或验证的时间
+        """
+
+
+class AvatarStore:
+    """头像缓存，相同内容的头像只存一份，超出大小时淘汰最久未使用的文件"""
+
+    def __init__(self, max_size: int, ttl: float, decoded_cache_size: int) -> None:
+        """AvatarStore构造函数
+
+        Args:
+            max_size (int): 硬盘中头像的总大小
+            ttl (float): 超过该时间后重新验证
+            decoded_cache_size (int): 解码后图片的缓存数，为0时不缓存
+        """
+        self.__max_size = max_size
+        self.__ttl = ttl
+        self.__decoded_cache_size = decoded_cache_size
+        self.__entries: Dict[Tuple[int, int], _Entry] = {}
+        """{(qq, size): _Entry}
+        """
+        self.__blobs: OrderedDict[str, int] = OrderedDict()
+        """{内容哈希: 文件大小}，按最近使用排序
+        """
+        self.__size = 0
+        self.__fetching: Dict[Tuple[int, int], asyncio.Future] = {}
+        """正在获取的头像，重复请求等待同一次获取
+        """
+        self.__decoded: OrderedDict[str, Image.Image] = OrderedDict()
+        """{内容哈希: 解码后的图片}
+        """
+        self.__dirty = False
+
+    async def load(self) -> None:
+        """从硬盘载入索引"""
+        _BLOB_PATH.mkdir(parents=True, exist_ok=True)
+        if not _INDEX_FILE.exists():
+            return
+        try:
+            async with await anyio.open_file(_INDEX_FILE, "r", encoding="utf-8") as f:
+                data = json.loads(await f.read())
+        except Exception as e:
+            logger.warning(f"头像缓存索引读取失败，将重新获取头像：{e}")
+            return
+        for digest, size in data["blobs"]:
+            if (_BLOB_PATH / digest).exists():
+                self.__blobs[digest] = size
+                self.__size += size
+        for key, (digest, etag, last_modified, checked) in data["entries"].items():
+            if digest in self.__blobs:
+                qq, size = key.split("_")
+                self.__entries[(int(qq), int(size))] = _Entry(
+                    digest, etag, last_modified, checked
+                )
+
+    async def save(self) -> None:
+        """索引有变化时写入硬盘"""
+        if not self.__dirty:
+            return
+        self.__dirty = False
+        await async_atomic_write(
+            _INDEX_FILE,
+            json.dumps(
+                {
+                    "blobs": list(self.__blobs.items()),
+                    "entries": {
+                        f"{qq}_{size}": [
+                            entry.digest,
+                            entry.etag,
+                            entry.last_modified,
+                            entry.checked,
+                        ]
+                        for (qq, size), entry in self.__entries.items()
+                    },
+                }
+            ),
+        )
+
+    async def get(self, qq: int, size: int = 160) -> Optional[bytes]:
+        """获取头像
+
+        Args:
+            qq (int): QQ号
+            size (int, optional): 尺寸. Defaults to 160.
+
+        Returns:
+            Optional[bytes]: 头像，获取失败且无缓存时为None
+        """
+        key = (qq, size)
+        entry = self.__entries.get(key)
+        if entry and time() - entry.checked < self.__ttl:
+            if (data := await self.__read(entry.digest)) is not None:
+                return data
+        if future := self.__fetching.get(key):
+            return await asyncio.shield(future)
+        future = self.__fetching[key] = asyncio.get_running_loop().create_future()
+        try:
+            data = await self.__fetch(key, self.__entries.get(key))
+        except BaseException as e:
+            # 获取的任务被取消时，等待者得到普通的异常而不是随之取消
+            future.set_exception(
+                e if isinstance(e, Exception) else RuntimeError("获取已被取消")
+            )
+            # 没有等待者时避免未取出异常的警告
+            future.exception()
+            raise
+        else:
+            future.set_result(data)
+            return data
+        finally:
+            del self.__fetching[key]
+
+    async def get_image(self, qq: int, size: int = 160) -> Optional[Image.Image]:
+        """获取解码后的头像，相同内容只解码一次
+
+        Args:
+            qq (int): QQ号
+            size (int, optional): 尺寸. Defaults to 160.
+
+        Returns:
+            Optional[Image.Image]: 头像的副本，可直接修改
+        """
+        if (data := await self.get(qq, size)) is None:
+            return None
+        if (entry := self.__entries.get((qq, size))) is None:
+            return Image.open(BytesIO(data))
+        digest = entry.digest
+        if (img := self.__decoded.get(digest)) is None:
+            img = Image.open(BytesIO(data))
+            img.load()
+            if self.__decoded_cache_size > 0:
+                self.__decoded[digest] = img
+                if len(self.__decoded) > self.__decoded_cache_size:
+                    self.__decoded.popitem(last=False)
+        else:
+            self.__decoded.move_to_end(digest)
+        return img.copy()
+
+    async def prefetch(
+        self, qqs: Iterable[int], size: int = 160
+    ) -> Dict[int, Optional[bytes]]:
+        """批量获取头像，用于群内多人的图片
+
+        Args:
+            qqs (Iterable[int]): QQ号
+            size (int, optional): 尺寸. Defaults to 160.
+
+        Returns:
+            Dict[int, Optional[bytes]]: {QQ号: 头像}
+        """
+        semaphore = asyncio.Semaphore(_PREFETCH_CONCURRENCY)
+
+        async def _get(qq: int) -> Optional[bytes]:
+            async with semaphore:
+                return await self.get(qq, size)
+
+        ids: List[int] = list(dict.fromkeys(qqs))
+        return dict(zip(ids, await asyncio.gather(*[_get(qq) for qq in ids])))
+
+    async def __read(self, digest: str) -> Optional[bytes]:
+        try:
+            data = await anyio.Path(_BLOB_PATH / digest).read_bytes()
+        except FileNotFoundError:
+            self.__discard({digest})
+            return None
+        if digest in self.__blobs:
+            self.__blobs.move_to_end(digest)
+            self.__dirty = True
+        return data
+
+    async def __fetch(
+        self, key: Tuple[int, int], entry: Optional[_Entry]
+    ) -> Optional[bytes]:
+        url = _AVATAR_URL.format(qq=key[0], size=key[1])
+        headers = {}
+        if entry:
+            if entry.etag:
+                headers["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                headers["If-Modified-Since"] = entry.last_modified
+        try:
+            async with http_session() as client:
+                async with client.get(url, headers=headers) as resp:
+                    if resp.status != 304:
+                        resp.raise_for_status()
+                        return await self.__store(key, resp.headers, await resp.read())
+                    if (data := await self.__read(entry.digest)) is not None:
+                        entry.checked = time()
+                        self.__dirty = True
+                        return data
+                # 未变化但文件已被删除，重新获取
+                async with client.get(url) as resp:
+                    resp.raise_for_status()
+                    return await self.__store(key, resp.headers, await resp.read())
+        except Exception as e:
+            logger.warning(f"获取用户头像失败 {e}")
+            return await self.__read(entry.digest) if entry else None
+
+    async def __store(self, key: Tuple[int, int], headers, data: bytes) -> bytes:
+        digest = hashlib.blake2b(data, digest_size=16).hexdigest()
+        if digest not in self.__blobs:
+            await async_atomic_write(_BLOB_PATH / digest, data)
+            self.__blobs[digest] = len(data)
+            self.__size += len(data)
+        self.__blobs.move_to_end(digest)
+        self.__entries[key] = _Entry(
+            digest, headers.get("ETag"), headers.get("Last-Modified"), time()
+        )
+        self.__dirty = True
+        self.__evict()
+        return data
+
+    def __evict(self) -> None:
+        evicted = set()
+        while self.__size > self.__max_size and len(self.__blobs) > 1:
+            digest = next(iter(self.__blobs))
+            evicted.add(digest)
+            self.__size -= self.__blobs.pop(digest)
+            (_BLOB_PATH / digest).unlink(missing_ok=True)
+        if evicted:
+            self.__discard(evicted)
+
+    def __discard(self, digests: set) -> None:
+        """移除指向已删除文件的索引"""
+        for digest in digests:
+            if (size := self.__blobs.pop(digest, None)) is not None:
+                self.__size -= size
+            self.__decoded.pop(digest, None)
+        self.__entries = {
+            key: entry
+            for key, entry in self.__entries.items()
+            if entry.digest not in digests
+        }
+        self.__dirty = True
+
+
+avatar_store = AvatarStore(
+    max_size=_MAX_SIZE, ttl=_TTL, decoded_cache_size=_DECODED_CACHE_SIZE
+)
+"""用户头像缓存
+"""
+
+
+@get_driver().on_startup
+async def _():
+    await avatar_store.load()
+
+
+@get_driver().on_shutdown
+async def _():
+    await avatar_store.save()
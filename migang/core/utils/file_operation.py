@@ -8,6 +8,7 @@ from ruamel.yaml import YAML, CommentedMap
 from ruamel.yaml.scanner import ScannerError
 
 from migang.core.exception import FileTypeError, FileParseError
+from migang.core.utils.startup_profile import startup_profiler
 
 _yaml = YAML(typ="rt")
 _file_suffixes = [".json", ".yaml", ".yml"]
@@ -27,6 +28,7 @@ def load_data(file: Union[Path, str]) -> Union[Dict, CommentedMap, List]:
     Returns:
         Union[Dict, CommentedMap, List]: 若json返回Dict或List，若yaml返回CommentedMap
     """
+    startup_profiler.count_io()
     data: Union[Dict, CommentedMap, List, None] = None
     if isinstance(file, str):
         file = Path(file)
@@ -58,6 +60,7 @@ def save_data(
         obj (Union[Dict[str, Any], CommentedMap]): 对象
         file (Union[Path, str]): 文件路径
     """
+    startup_profiler.count_io()
     if isinstance(file, str):
         file = Path(file)
     file.parent.mkdir(exist_ok=True, parents=True)
@@ -81,6 +84,7 @@ async def async_load_data(file: Union[Path, str]) -> Union[Dict, CommentedMap, L
     Returns:
         Union[Dict, CommentedMap, List]: 若json返回Dict或List，若yaml返回CommentedMap
     """
+    startup_profiler.count_io()
     data: Union[Dict, CommentedMap, List, None] = None
     if isinstance(file, str):
         file = Path(file)
@@ -113,6 +117,7 @@ async def async_save_data(
         obj (Union[Dict[str, Any], List[Any], CommentedMap]): 对象
         file (Union[Path, str]): 文件路径
     """
+    startup_profiler.count_io()
     if isinstance(file, str):
         file = Path(file)
     file.parent.mkdir(parents=True, exist_ok=True)
@@ -123,3 +128,24 @@ async def async_save_data(
             with StringIO() as data:
                 _yaml.dump(obj, data)
                 await f.write(data.getvalue())
+
+
+async def async_atomic_write(file: Union[Path, str], data: Union[str, bytes]) -> None:
+    """先写入临时文件再重命名，避免写到一半时进程退出导致文件损坏
+
+    Args:
+        file (Union[Path, str]): 文件路径
+        data (Union[str, bytes]): 内容
+    """
+    startup_profiler.count_io()
+    if isinstance(file, str):
+        file = Path(file)
+    file.parent.mkdir(parents=True, exist_ok=True)
+    tmp_file = file.with_name(f".{file.name}.tmp")
+    if isinstance(data, bytes):
+        async with await anyio.open_file(tmp_file, "wb") as f:
+            await f.write(data)
+    else:
+        async with await anyio.open_file(tmp_file, "w", encoding="utf-8") as f:
+            await f.write(data)
+    await anyio.Path(tmp_file).replace(file)
@@ -3,6 +3,8 @@ import nonebot
 from nonebot import get_driver
 from nonebot.log import logger
 
+from migang.utils.http import http_client
+
 # https://github.com/lambdayh/hub-proxy 自建一个
 GH_PROXY_URL: str = ""
 GH_PROXY_HEADERS = {}
@@ -50,7 +52,7 @@ async def request_gh(url: str):
     full_url = get_gh_url(url)
 
     try:
-        async with httpx.AsyncClient() as client:
+        async with http_client() as client:
             response = await client.get(full_url, headers=GH_PROXY_HEADERS, timeout=30)
             response.raise_for_status()
             return response
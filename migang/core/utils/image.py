@@ -2,9 +2,8 @@ from pathlib import Path
 from typing import Tuple, Optional
 
 import anyio
-import aiohttp
-from nonebot.log import logger
-from async_lru import alru_cache
+
+from migang.core.utils.avatar import avatar_store
 
 
 async def pic_file_to_bytes(pic: Path | str) -> str:
@@ -12,16 +11,17 @@ async def pic_file_to_bytes(pic: Path | str) -> str:
         return await f.read()
 
 
-@alru_cache(maxsize=32)
 async def get_user_avatar(qq: int, size: int = 160) -> Optional[bytes]:
-    try:
-        async with aiohttp.ClientSession() as client:
-            return await (
-                await client.get(f"http://q1.qlogo.cn/g?b=qq&nk={qq}&s={size}")
-            ).read()
-    except Exception as e:
-        logger.warning(f"获取用户头像失败 {e}")
-        return None
+    """获取用户头像，见avatar_store
+
+    Args:
+        qq (int): QQ号
+        size (int, optional): 尺寸. Defaults to 160.
+
+    Returns:
+        Optional[bytes]: 头像，获取失败且无缓存时为None
+    """
+    return await avatar_store.get(qq, size)
 
 
 # pillow 10+ 中去除了getSize，以此替代
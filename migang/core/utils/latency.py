@@ -0,0 +1,170 @@
+"""统计事件处理各阶段的耗时，按插件聚合成直方图
+"""
+import math
+from array import array
+from functools import wraps
+from time import perf_counter
+from contextlib import contextmanager
+from typing import Any, Dict, List, Tuple, Callable, Iterator, Optional
+
+GLOBAL = "-"
+"""不属于某个插件的耗时，例如event_preprocessor
+"""
+
+# 对数分桶，每翻倍分8个桶，相对误差约9%，覆盖1us到约67s
+_MIN_SECONDS = 1e-6
+_BUCKETS_PER_OCTAVE = 8
+_BUCKET_COUNT = 26 * _BUCKETS_PER_OCTAVE
+
+
+class Histogram:
+    """记录一次为O(1)，分位数由分桶上界估计"""
+
+    __slots__ = ("counts", "total", "sum", "max")
+
+    def __init__(self) -> None:
+        self.counts = array("I", bytes(4 * _BUCKET_COUNT))
+        self.total: int = 0
+        self.sum: float = 0.0
+        self.max: float = 0.0
+
+    @staticmethod
+    def _bucket(seconds: float) -> int:
+        if seconds <= _MIN_SECONDS:
+            return 0
+        return min(
+            int(math.log2(seconds / _MIN_SECONDS) * _BUCKETS_PER_OCTAVE),
+            _BUCKET_COUNT - 1,
+        )
+
+    @staticmethod
+    def _upper_bound(bucket: int) -> float:
+        return _MIN_SECONDS * 2 ** ((bucket + 1) / _BUCKETS_PER_OCTAVE)
+
+    def record(self, seconds: float) -> None:
+        self.counts[self._bucket(seconds)] += 1
+        self.total += 1
+        self.sum += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, q: float) -> float:
+        """估计分位数
+
+        Args:
+            q (float): 0~1之间的分位
+
+        Returns:
+            float: 耗时（秒），不超过实际最大值
+        """
+        if self.total == 0:
+            return 0.0
+        rank = max(math.ceil(q * self.total), 1)
+        seen = 0
+        for bucket, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(self._upper_bound(bucket), self.max)
+        return self.max
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            "count": self.total,
+            "avg": self.sum / self.total if self.total else 0.0,
+            "p50": self.percentile(0.5),
+            "p95": self.percentile(0.95),
+            "p99": self.percentile(0.99),
+            "max": self.max,
+        }
+
+
+class LatencyRecorder:
+    """以(阶段, 插件)为key记录耗时"""
+
+    def __init__(self) -> None:
+        self.__histograms: Dict[Tuple[str, str], Histogram] = {}
+        self.enabled: bool = True
+
+    def record(self, stage: str, plugin: Optional[str], seconds: float) -> None:
+        """记录一次耗时
+
+        Args:
+            stage (str): 阶段
+            plugin (Optional[str]): 插件名，None时记为GLOBAL
+            seconds (float): 耗时（秒）
+        """
+        if not self.enabled:
+            return
+        key = (stage, plugin or GLOBAL)
+        if (histogram := self.__histograms.get(key)) is None:
+            histogram = self.__histograms[key] = Histogram()
+        histogram.record(seconds)
+
+    @contextmanager
+    def timer(self, stage: str, plugin: Optional[str] = None) -> Iterator[None]:
+        """记录with块的耗时，抛出异常时同样记录
+
+        Args:
+            stage (str): 阶段
+            plugin (Optional[str], optional): 插件名. Defaults to None.
+        """
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, plugin, perf_counter() - start)
+
+    def timed(self, stage: str) -> Callable[[Callable], Callable]:
+        """记录异步hook函数的耗时，若hook有matcher参数则按matcher所属插件记录
+
+        Args:
+            stage (str): 阶段
+        """
+
+        def decorator(func: Callable) -> Callable:
+            @wraps(func)
+            async def wrapper(*args: Any, **kwargs: Any) -> Any:
+                matcher = kwargs.get("matcher")
+                start = perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    self.record(
+                        stage,
+                        getattr(matcher, "plugin_name", None),
+                        perf_counter() - start,
+                    )
+
+            return wrapper
+
+        return decorator
+
+    def summary(
+        self, stage: Optional[str] = None, plugin: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """获取统计结果，按p95从大到小排序
+
+        Args:
+            stage (Optional[str], optional): 仅返回该阶段. Defaults to None.
+            plugin (Optional[str], optional): 仅返回该插件. Defaults to None.
+
+        Returns:
+            List[Dict[str, Any]]: 每项包含stage, plugin, count, avg, p50, p95, p99, max
+        """
+        ret = [
+            {"stage": key[0], "plugin": key[1], **histogram.summary()}
+            for key, histogram in self.__histograms.items()
+            if (stage is None or key[0] == stage)
+            and (plugin is None or key[1] == plugin)
+        ]
+        ret.sort(key=lambda item: item["p95"], reverse=True)
+        return ret
+
+    def reset(self) -> None:
+        """清空统计"""
+        self.__histograms.clear()
+
+
+latency_recorder = LatencyRecorder()
+"""事件处理耗时统计
+"""
@@ -0,0 +1,78 @@
+"""在进程池中执行PIL绘图等CPU密集的任务，不占用事件循环所在进程的GIL
+"""
+import os
+import asyncio
+import threading
+import multiprocessing
+from functools import partial
+from typing import Any, TypeVar, Callable, Optional
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from nonebot import get_driver
+from nonebot.log import logger
+from nonebot.utils import run_sync
+
+_T = TypeVar("_T")
+
+# 进程数，为0时在线程中执行
+_MAX_WORKERS: int = getattr(
+    get_driver().config, "process_pool_workers", min(os.cpu_count() or 1, 4)
+)
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+
+def _create_executor() -> Optional[ProcessPoolExecutor]:
+    """创建进程池并立即启动所有子进程
+
+    子进程由fork创建，函数按引用传递，无需在子进程中重新导入插件。
+    fork时若已有其他线程，子进程可能因继承了被占用的锁而死锁，
+    因此只在启动时、尚无其他线程时fork，之后不再创建
+    """
+    if _MAX_WORKERS <= 0 or "fork" not in multiprocessing.get_all_start_methods():
+        return None
+    if threading.active_count() > 1:
+        logger.warning("已存在其他线程，fork可能导致子进程死锁，绘图将在线程中执行")
+        return None
+    executor = ProcessPoolExecutor(
+        max_workers=_MAX_WORKERS, mp_context=multiprocessing.get_context("fork")
+    )
+    # 使用fork时首次提交任务即启动全部子进程
+    executor.submit(os.getpid)
+    return executor
+
+
+async def run_in_process(func: Callable[..., _T], *args: Any, **kwargs: Any) -> _T:
+    """在进程池中执行func，进程池不可用时退化为在线程中执行
+
+    Args:
+        func (Callable[..., _T]): 模块级函数，参数与返回值需可pickle
+
+    Returns:
+        _T: func的返回值
+    """
+    global _executor
+    if (executor := _executor) is not None:
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                executor, partial(func, *args, **kwargs)
+            )
+        except BrokenProcessPool as e:
+            # 此时已有其他线程，不再重新fork
+            logger.warning(f"进程池异常，之后将在线程中执行：{e}")
+            _executor = None
+            executor.shutdown(wait=False)
+    return await run_sync(func)(*args, **kwargs)
+
+
+@get_driver().on_startup
+async def _():
+    global _executor
+    _executor = _create_executor()
+
+
+@get_driver().on_shutdown
+async def _():
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
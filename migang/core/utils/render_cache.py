@@ -0,0 +1,188 @@
+"""渲染结果缓存，以模板上下文的哈希为key，帮助图片等只在内容变化时重新渲染
+"""
+import asyncio
+import hashlib
+from pathlib import Path
+from collections import OrderedDict
+from typing import Any, Dict, Tuple, Callable, Optional, Awaitable
+
+import anyio
+from nonebot.log import logger
+
+from migang.core.path import DATA_PATH
+
+# 内存中缓存的总大小
+_CACHE_SIZE = 32 * 1024 * 1024
+# 硬盘中缓存的总大小，为0时不使用硬盘
+_DISK_CACHE_SIZE = 128 * 1024 * 1024
+
+
+class RenderCache:
+    """按key缓存渲染出的图片，超出大小时淘汰最久未使用的项
+
+    每项可带一个tag（一般为群号），状态改变时可只失效该tag下的项；
+    同一key同时只渲染一次，其余请求等待该次结果
+    """
+
+    def __init__(
+        self,
+        max_size: int,
+        disk_path: Optional[Path] = None,
+        disk_max_size: int = 0,
+    ) -> None:
+        """RenderCache构造函数
+
+        Args:
+            max_size (int): 内存中缓存的总大小
+            disk_path (Optional[Path], optional): 硬盘缓存的文件夹，启动时清空. Defaults to None.
+            disk_max_size (int, optional): 硬盘中缓存的总大小. Defaults to 0.
+        """
+        self.__max_size = max_size
+        self.__size = 0
+        self.__data: OrderedDict[str, Tuple[bytes, Optional[int]]] = OrderedDict()
+        """{key: (内容, tag)}，按最近使用排序
+        """
+        self.__disk_path = disk_path if disk_max_size > 0 else None
+        self.__disk_max_size = disk_max_size
+        self.__disk_size = 0
+        self.__disk: OrderedDict[str, Tuple[int, Optional[int]]] = OrderedDict()
+        """{key: (文件大小, tag)}，按写入时间排序
+        """
+        self.__rendering: Dict[str, asyncio.Future] = {}
+        """正在渲染的key，重复请求等待同一次渲染
+        """
+        self.__generation = 0
+        """每次失效时自增，失效前开始的渲染结果不写入缓存
+        """
+        if self.__disk_path:
+            self.__disk_path.mkdir(exist_ok=True, parents=True)
+            for file in self.__disk_path.iterdir():
+                file.unlink()
+
+    @staticmethod
+    def key(*parts: Any) -> str:
+        """由模板上下文生成key
+
+        Args:
+            *parts (Any): 决定渲染结果的内容，需有稳定的repr
+
+        Returns:
+            str: key
+        """
+        return hashlib.blake2b(repr(parts).encode(), digest_size=16).hexdigest()
+
+    async def get(
+        self,
+        key: str,
+        render: Callable[[], Awaitable[bytes]],
+        tag: Optional[int] = None,
+    ) -> bytes:
+        """获取key对应的内容，不存在时调用render渲染
+
+        Args:
+            key (str): key
+            render (Callable[[], Awaitable[bytes]]): 渲染函数
+            tag (Optional[int], optional): 失效时使用的tag. Defaults to None.
+
+        Returns:
+            bytes: 渲染结果
+        """
+        if item := self.__data.get(key):
+            self.__data.move_to_end(key)
+            return item[0]
+        if future := self.__rendering.get(key):
+            return await asyncio.shield(future)
+        future = self.__rendering[key] = asyncio.get_running_loop().create_future()
+        try:
+            data = await self.__load(key, render, tag)
+        except BaseException as e:
+            # 渲染的任务被取消时，等待者得到普通的异常而不是随之取消
+            future.set_exception(
+                e if isinstance(e, Exception) else RuntimeError("渲染已被取消")
+            )
+            # 没有等待者时避免未取出异常的警告
+            future.exception()
+            raise
+        else:
+            future.set_result(data)
+            return data
+        finally:
+            del self.__rendering[key]
+
+    async def __load(
+        self, key: str, render: Callable[[], Awaitable[bytes]], tag: Optional[int]
+    ) -> bytes:
+        generation = self.__generation
+        if key in self.__disk:
+            try:
+                data = await anyio.Path(self.__disk_path / key).read_bytes()
+            except OSError as e:
+                logger.warning(f"读取渲染缓存 {key} 失败：{e}")
+                self.__discard_disk(key)
+            else:
+                self.__store(key, data, tag)
+                return data
+        data = await render()
+        if generation != self.__generation:
+            return data
+        self.__store(key, data, tag)
+        if self.__disk_path and len(data) <= self.__disk_max_size:
+            try:
+                await anyio.Path(self.__disk_path / key).write_bytes(data)
+            except OSError as e:
+                logger.warning(f"写入渲染缓存 {key} 失败：{e}")
+            else:
+                if generation == self.__generation:
+                    self.__disk[key] = (len(data), tag)
+                    self.__disk_size += len(data)
+                    self.__evict_disk()
+                else:
+                    (self.__disk_path / key).unlink(missing_ok=True)
+        return data
+
+    def __store(self, key: str, data: bytes, tag: Optional[int]) -> None:
+        if len(data) > self.__max_size:
+            return
+        if old := self.__data.pop(key, None):
+            self.__size -= len(old[0])
+        self.__data[key] = (data, tag)
+        self.__size += len(data)
+        while self.__size > self.__max_size:
+            _, (old, _) = self.__data.popitem(last=False)
+            self.__size -= len(old)
+
+    def __evict_disk(self) -> None:
+        while self.__disk_size > self.__disk_max_size:
+            self.__discard_disk(next(iter(self.__disk)))
+
+    def __discard_disk(self, key: str) -> None:
+        size, _ = self.__disk.pop(key)
+        self.__disk_size -= size
+        (self.__disk_path / key).unlink(missing_ok=True)
+
+    def invalidate(self, tag: Optional[int] = None) -> None:
+        """插件、任务或群状态改变时调用
+
+        Args:
+            tag (Optional[int], optional): 只失效该tag下的项，为None时清空全部. Defaults to None.
+        """
+        self.__generation += 1
+        if tag is None:
+            self.__data.clear()
+            self.__size = 0
+            for key in list(self.__disk):
+                self.__discard_disk(key)
+            return
+        for key in [key for key, item in self.__data.items() if item[1] == tag]:
+            self.__size -= len(self.__data.pop(key)[0])
+        for key in [key for key, item in self.__disk.items() if item[1] == tag]:
+            self.__discard_disk(key)
+
+
+render_cache = RenderCache(
+    max_size=_CACHE_SIZE,
+    disk_path=DATA_PATH / "core" / "render_cache",
+    disk_max_size=_DISK_CACHE_SIZE,
+)
+"""帮助图片等的渲染缓存，由plugin_manager、task_manager与group_manager失效
+"""
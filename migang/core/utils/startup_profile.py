@@ -0,0 +1,101 @@
+"""记录启动过程的耗时：各插件的导入耗时，初始化各阶段的耗时与文件读写次数
+"""
+import re
+import time
+from contextvars import ContextVar
+from contextlib import contextmanager
+from typing import Any, Dict, List, Iterator, Optional
+
+import psutil
+from nonebot.log import logger
+
+# 报告中列出的最慢插件数
+_SHOW_COUNT = 10
+
+_PLUGIN_LOADED = re.compile(r'Succeeded to load plugin "([^"]+)"')
+
+_current_stage: ContextVar[Optional[str]] = ContextVar("startup_stage", default=None)
+
+
+class StartupProfiler:
+    """插件的导入耗时由nonebot加载插件成功的日志间隔得出，插件按顺序导入，间隔即为该插件自身的导入耗时"""
+
+    def __init__(self) -> None:
+        self.__last_loaded = time.perf_counter()
+        self.__plugins: Dict[str, float] = {}
+        """{插件名: 导入耗时}
+        """
+        self.__stages: Dict[str, float] = {}
+        """{阶段名: 耗时}
+        """
+        self.__io: Dict[str, int] = {}
+        """{阶段名: 文件读写次数}
+        """
+        self.__total: Optional[float] = None
+        self.__handler_id: Optional[int] = logger.add(
+            self.__on_plugin_loaded,
+            level="SUCCESS",
+            filter=lambda record: record["name"].startswith("nonebot"),
+            format="{message}",
+        )
+
+    def __on_plugin_loaded(self, message: Any) -> None:
+        now = time.perf_counter()
+        if match := _PLUGIN_LOADED.search(message.record["message"]):
+            self.__plugins[match.group(1)] = now - self.__last_loaded
+            self.__last_loaded = now
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """记录初始化阶段的耗时，阶段内的文件读写计入该阶段
+
+        Args:
+            name (str): 阶段名
+        """
+        token = _current_stage.set(name)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.__stages[name] = time.perf_counter() - start
+            _current_stage.reset(token)
+
+    def count_io(self) -> None:
+        """记录一次文件读写，不在初始化阶段内时忽略"""
+        if (stage := _current_stage.get()) is not None:
+            self.__io[stage] = self.__io.get(stage, 0) + 1
+
+    def finish(self) -> None:
+        """初始化完成，停止记录插件导入并输出报告"""
+        if self.__handler_id is None:
+            return
+        logger.remove(self.__handler_id)
+        self.__handler_id = None
+        self.__total = time.time() - psutil.Process().create_time()
+        logger.info(self.report())
+
+    def report(self) -> str:
+        """启动报告
+
+        Returns:
+            str: 进程启动至初始化完成的耗时，最慢的插件与各阶段的耗时
+        """
+        lines: List[str] = []
+        if self.__total is not None:
+            lines.append(f"启动耗时 {self.__total:.2f}s（进程启动至初始化完成）")
+        plugins = sorted(self.__plugins.items(), key=lambda x: x[1], reverse=True)
+        lines.append(
+            f"导入插件 {len(plugins)} 个，共 {sum(t for _, t in plugins):.2f}s，最慢的插件："
+        )
+        lines += [f"  {name}: {t:.3f}s" for name, t in plugins[:_SHOW_COUNT]]
+        lines.append("初始化阶段：")
+        lines += [
+            f"  {name}: {t:.3f}s，文件读写 {self.__io.get(name, 0)} 次"
+            for name, t in self.__stages.items()
+        ]
+        return "\n".join(lines)
+
+
+startup_profiler = StartupProfiler()
+"""启动耗时记录
+"""
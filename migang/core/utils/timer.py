@@ -0,0 +1,197 @@
+"""按到期时间执行回调的定时器，所有定时共用一个后台任务
+"""
+import heapq
+import asyncio
+import inspect
+import itertools
+from time import monotonic
+from datetime import datetime
+from typing import Any, Set, Dict, List, Callable, Hashable, Optional
+
+from nonebot.log import logger
+
+# 已取消的项超过该数量且超过堆的一半时重建堆
+_COMPACT_THRESHOLD = 64
+
+_WHEN, _SEQ, _KEY, _CALLBACK, _ARGS = range(5)
+
+
+class TimerService:
+    """以单调时钟为准的小顶堆，休眠至最近的到期时间，添加更早的定时时被唤醒
+
+    每个定时由key标识，对同一key再次定时即为改期，取消与改期均为O(log n)
+    """
+
+    def __init__(self) -> None:
+        self.__heap: List[list] = []
+        """[到期时间, 序号, key, 回调, 参数]的堆，取消的项回调为None
+        """
+        self.__entries: Dict[Hashable, list] = {}
+        self.__seq = itertools.count()
+        self.__cancelled = 0
+        self.__event: Optional[asyncio.Event] = None
+        self.__task: Optional[asyncio.Task] = None
+        self.__running: Set[asyncio.Task] = set()
+        """执行中的异步回调，避免被回收
+        """
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.__entries
+
+    def call_at(
+        self, key: Hashable, when: float, callback: Callable[..., Any], *args: Any
+    ) -> None:
+        """在单调时钟到达when时执行callback，key已存在时改期
+
+        Args:
+            key (Hashable): 定时的标识
+            when (float): time.monotonic()的时间
+            callback (Callable[..., Any]): 回调，可为协程函数
+        """
+        self.__discard(key)
+        entry = [when, next(self.__seq), key, callback, args]
+        self.__entries[key] = entry
+        heapq.heappush(self.__heap, entry)
+        if self.__heap[0] is entry:
+            self.__wake()
+
+    def call_later(
+        self, key: Hashable, delay: float, callback: Callable[..., Any], *args: Any
+    ) -> None:
+        """delay秒后执行callback，key已存在时改期
+
+        Args:
+            key (Hashable): 定时的标识
+            delay (float): 秒数
+            callback (Callable[..., Any]): 回调，可为协程函数
+        """
+        self.call_at(key, monotonic() + delay, callback, *args)
+
+    def call_at_datetime(
+        self, key: Hashable, when: datetime, callback: Callable[..., Any], *args: Any
+    ) -> None:
+        """在when时执行callback，key已存在时改期，修改系统时间不影响已有的定时
+
+        Args:
+            key (Hashable): 定时的标识
+            when (datetime): 时间
+            callback (Callable[..., Any]): 回调，可为协程函数
+        """
+        self.call_later(key, (when - datetime.now()).total_seconds(), callback, *args)
+
+    def cancel(self, key: Hashable) -> bool:
+        """取消定时
+
+        Args:
+            key (Hashable): 定时的标识
+
+        Returns:
+            bool: 定时存在时返回True
+        """
+        if not self.__discard(key):
+            return False
+        if self.__cancelled > _COMPACT_THRESHOLD and self.__cancelled * 2 > len(
+            self.__heap
+        ):
+            self.__heap = [
+                entry for entry in self.__heap if entry[_CALLBACK] is not None
+            ]
+            heapq.heapify(self.__heap)
+            self.__cancelled = 0
+        return True
+
+    def when(self, key: Hashable) -> Optional[float]:
+        """获取定时的到期时间
+
+        Args:
+            key (Hashable): 定时的标识
+
+        Returns:
+            Optional[float]: time.monotonic()的时间，不存在时为None
+        """
+        if entry := self.__entries.get(key):
+            return entry[_WHEN]
+        return None
+
+    def start(self) -> None:
+        """启动后台任务，需在事件循环中调用"""
+        if self.__task is None or self.__task.done():
+            self.__event = asyncio.Event()
+            self.__task = asyncio.create_task(self.__run())
+
+    async def close(self) -> None:
+        """停止后台任务，未到期的定时不再执行"""
+        if self.__task is not None:
+            self.__task.cancel()
+            try:
+                await self.__task
+            except asyncio.CancelledError:
+                pass
+            self.__task = None
+        # 之后新增定时时由__wake重新启动
+        self.__event = None
+
+    def __discard(self, key: Hashable) -> bool:
+        if (entry := self.__entries.pop(key, None)) is None:
+            return False
+        # 堆中的项在到达堆顶时丢弃
+        entry[_CALLBACK] = None
+        entry[_ARGS] = None
+        self.__cancelled += 1
+        return True
+
+    def __wake(self) -> None:
+        if self.__event is not None:
+            self.__event.set()
+        else:
+            try:
+                asyncio.get_running_loop()
+            except RuntimeError:
+                # 事件循环启动前的定时在start后执行
+                return
+            self.start()
+
+    def __invoke(self, entry: list) -> None:
+        try:
+            ret = entry[_CALLBACK](*entry[_ARGS])
+            if inspect.isawaitable(ret):
+                task = asyncio.ensure_future(ret)
+                self.__running.add(task)
+                task.add_done_callback(self.__done)
+        except Exception as e:
+            logger.exception(f"定时任务 {entry[_KEY]} 执行失败：{e}")
+
+    def __done(self, task: asyncio.Task) -> None:
+        self.__running.discard(task)
+        if not task.cancelled() and (e := task.exception()):
+            logger.opt(exception=e).error(f"定时任务执行失败：{e}")
+
+    async def __run(self) -> None:
+        while True:
+            now = monotonic()
+            # 回调中的取消可能重建堆，每次都从self.__heap读取
+            while self.__heap and (
+                self.__heap[0][_CALLBACK] is None or self.__heap[0][_WHEN] <= now
+            ):
+                entry = heapq.heappop(self.__heap)
+                if entry[_CALLBACK] is None:
+                    self.__cancelled -= 1
+                    continue
+                del self.__entries[entry[_KEY]]
+                self.__invoke(entry)
+            self.__event.clear()
+            if not self.__heap:
+                await self.__event.wait()
+                continue
+            try:
+                await asyncio.wait_for(self.__event.wait(), self.__heap[0][_WHEN] - now)
+            except asyncio.TimeoutError:
+                pass
+
+
+timer_service = TimerService()
+"""全局的定时器
+"""
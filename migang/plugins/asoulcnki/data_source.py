@@ -4,9 +4,10 @@ from datetime import datetime
 
 import anyio
 import ujson as json
-from nonebot_plugin_htmlrender import template_to_pic
 from nonebot.adapters.onebot.v11 import MessageSegment
 
+from migang.utils.render import template_to_pic
+
 template_path = Path(__file__).parent / "templates"
 
 
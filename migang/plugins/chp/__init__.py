@@ -1,10 +1,11 @@
 import asyncio
 from pathlib import Path
 
-import aiohttp
 from nonebot import on_fullmatch
 from nonebot.plugin import PluginMetadata
 
+from migang.utils.http import http_session
+
 __plugin_meta__ = PluginMetadata(
     name="彩虹屁",
     description="生成彩虹屁",
@@ -28,7 +29,7 @@ chp_url = "https://api.shadiao.pro/chp"
 @chp.handle()
 async def _():
     try:
-        async with aiohttp.ClientSession() as client:
+        async with http_session() as client:
             r = await client.get(chp_url)
             data = await r.json()
             await chp.send(data["data"]["text"])
@@ -3,12 +3,13 @@ import math
 from typing import Union
 
 import ujson
-import aiohttp
 from nonebot import require
 from nonebot.adapters.onebot.v11 import MessageSegment
 
+from migang.utils.http import http_session
+
 require("nonebot_plugin_htmlrender")
-from nonebot_plugin_htmlrender import md_to_pic, text_to_pic
+from migang.utils.render import md_to_pic, text_to_pic
 
 RUN_API_URL_FORMAT = "https://glot.io/run/{}?version=latest"
 SUPPORTED_LANGUAGES = {
@@ -79,7 +80,7 @@ async def runner(msg: str) -> Union[str, MessageSegment]:
         "stdin": "",
         "command": "",
     }
-    async with aiohttp.ClientSession(json_serialize=ujson.dumps) as client:
+    async with http_session(json_serialize=ujson.dumps) as client:
         try:
             res = await client.post(url, json=js)
         except Exception as e:
@@ -1,9 +1,10 @@
 import asyncio
 
-import aiohttp
 from nonebot import on_fullmatch
 from nonebot.plugin import PluginMetadata
 
+from migang.utils.http import http_session
+
 __plugin_meta__ = PluginMetadata(
     name="网易云热评",
     description="生成发病小作文",
@@ -26,7 +27,7 @@ comments_163_url = "https://keai.icu/apiwyy/api"
 @comment_163.handle()
 async def _():
     try:
-        async with aiohttp.ClientSession() as client:
+        async with http_session() as client:
             r = await client.get(comments_163_url)
             data = await r.json(content_type=None)
             await comment_163.send(f"{data['content']}\n\t——《{data['music']}》")
@@ -9,6 +9,7 @@ from pydantic import Extra, BaseModel
 from nonebot import get_driver, get_plugin_config
 
 from migang.core.utils import http_utils
+from migang.utils.http import http_client
 
 try:
     import ujson as json
@@ -34,7 +35,7 @@ class ResourceError(Exception):
 
 
 async def download_url(url: str) -> Union[httpx.Response, None]:
-    async with httpx.AsyncClient() as client:
+    async with http_client() as client:
         for i in range(3):
             try:
                 response = await client.get(url, follow_redirects=True)
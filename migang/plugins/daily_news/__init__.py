@@ -3,16 +3,16 @@ import asyncio
 import datetime
 from pathlib import Path
 
-import aiohttp
 from yarl import URL
 from nonebot.log import logger
 from nonebot.rule import to_me
 from nonebot import on_fullmatch
 from nonebot.plugin import PluginMetadata
 from nonebot_plugin_apscheduler import scheduler
-from nonebot_plugin_htmlrender import template_to_pic
 from nonebot.adapters.onebot.v11 import MessageSegment
 
+from migang.utils.http import http_session
+from migang.utils.render import template_to_pic
 from migang.core import DATA_PATH, TaskItem, broadcast
 
 __plugin_meta__ = PluginMetadata(
@@ -104,7 +104,7 @@ async def get_zaobao() -> MessageSegment:
         lunar_day_cn = []
     for i in range(3):
         try:
-            async with aiohttp.ClientSession() as client:
+            async with http_session() as client:
                 r = await client.get("https://60s-api.viki.moe/v2/60s", timeout=7)
                 r = await r.json()
                 if r["code"] == 200 and (data := r.get("data")):
@@ -1,10 +1,11 @@
 import random
 
-import aiohttp
 from nonebot import on_startswith
 from nonebot.plugin import PluginMetadata
 from nonebot.params import Startswith, EventPlainText
 
+from migang.utils.http import http_session
+
 __plugin_meta__ = PluginMetadata(
     name="对联",
     description="生成对联",
@@ -21,7 +22,7 @@ duilian = on_startswith("/duilian", priority=5, block=True)
 
 
 async def get_xialian(shanglian: str):
-    async with aiohttp.ClientSession() as client:
+    async with http_session() as client:
         r = await client.get(
             f"https://seq2seq-couplet-model.rssbrain.com/v0.2/couplet/{shanglian}",
             timeout=15,
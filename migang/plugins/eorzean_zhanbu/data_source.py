@@ -8,12 +8,12 @@ from pathlib import Path
 from datetime import date, datetime
 from typing import List, Tuple, Union, Optional
 
-import aiohttp
 from sqlalchemy import select
 from pil_utils import BuildImage
 from nonebot_plugin_datastore import create_session
 
 from migang.utils.date import is_new_year
+from migang.utils.http import http_session
 
 from . import zhanbu_config
 from .model import EorzeanZhanbuRecorder
@@ -131,7 +131,7 @@ def get_basemap(occupation: str) -> str:
 
 async def get_hitokoto() -> str:
     try:
-        async with aiohttp.ClientSession() as client:
+        async with http_session() as client:
             r = await client.get(
                 "https://v1.hitokoto.cn/?encode=text&max_length=16&c=d&c=e&c=i&c=k",
                 timeout=5,
@@ -7,6 +7,8 @@ from nonebot.log import logger
 from nonebot.adapters.onebot.v11 import MessageSegment
 from tenacity import retry, wait_random, stop_after_attempt
 
+from migang.utils.http import http_session
+
 
 # 获取所有 Epic Game Store 促销游戏
 # 方法参考：RSSHub /epicgames 路由
@@ -48,7 +50,7 @@ async def get_epic_game_desp(name: str, client: aiohttp.ClientSession):
 # 处理免费游戏的信息方法借鉴 pip 包 epicstore_api 示例
 # https://github.com/SD4RK/epicstore_api/blob/master/examples/free_games_example.py
 async def get_epic_free(self_id: int) -> Tuple[List, int]:
-    async with aiohttp.ClientSession() as client:
+    async with http_session() as client:
         try:
             games = await get_epic_game(client)
         except Exception:
@@ -11,7 +11,7 @@ from migang.utils.text import is_number
 from migang.core import ConfigItem, get_config
 
 require("nonebot_plugin_htmlrender")
-from nonebot_plugin_htmlrender import get_new_page
+from migang.utils.render import get_new_page
 
 __plugin_meta__ = PluginMetadata(
     name="汇率转换",
@@ -2,9 +2,10 @@ import time
 from pathlib import Path
 from typing import Any, Dict, List, Literal, Optional
 
-import aiohttp
 from nonebot import require
 
+from migang.utils.http import http_session
+
 from .const import (
     me,
     pe,
@@ -25,7 +26,7 @@ from .const import (
 )
 
 require("nonebot_plugin_htmlrender")
-from nonebot_plugin_htmlrender import template_to_pic
+from migang.utils.render import template_to_pic
 
 # https://house.ffxiv.cyou/#/about
 api_url = "https://house.ffxiv.cyou/api/sales"
@@ -156,7 +157,7 @@ def lottery_has_winner(house: Dict[str, Any]) -> bool:
 
 
 async def get_server_house_info(server_id: int) -> List[Dict[str, Any]]:
-    async with aiohttp.ClientSession() as client:
+    async with http_session() as client:
         r = await client.get(
             api_url, params={"server": server_id}, headers={"User-Agent": user_agent}
         )
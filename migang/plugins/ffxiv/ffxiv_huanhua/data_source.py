@@ -10,6 +10,7 @@ from nonebot.log import logger
 from pil_utils import BuildImage
 from nonebot.adapters.onebot.v11 import MessageSegment
 
+from migang.utils.http import http_session
 from migang.utils.file import async_load_data
 
 logo_path = Path(__file__).parent / "res" / "logo.jpg"
@@ -131,7 +132,7 @@ async def search_jr(
     item_name: str,
     item_flag: bool = False,
 ) -> MessageSegment:
-    async with aiohttp.ClientSession() as client:
+    async with http_session() as client:
         headers = {
             "Host": "api.ffxivsc.cn",
             "Origin": "https://www.ffxivsc.cn",
@@ -9,6 +9,8 @@ import aiohttp
 from nonebot.log import logger
 from tenacity import RetryError, retry, stop_after_attempt
 
+from migang.utils.http import http_session
+
 
 def localize_world_name(world_name: str):
     world_dict = {
@@ -93,7 +95,7 @@ def handle_item_name_abbr(item_name: str):
 
 
 async def get_market_data(server_name: str, item_name: str, hq=False) -> str:
-    async with aiohttp.ClientSession() as client:
+    async with http_session() as client:
         try:
             new_item_name, item_id = await get_item_id(
                 item_name=item_name, client=client, name_lang="cn"
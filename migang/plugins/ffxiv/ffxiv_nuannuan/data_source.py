@@ -13,12 +13,12 @@ from nonebot import get_driver
 from nonebot.log import logger
 from fake_useragent import UserAgent
 from nonebot_plugin_apscheduler import scheduler
-from nonebot_plugin_htmlrender import get_new_page
 from tenacity import retry, wait_fixed, stop_after_attempt
 from playwright.async_api import TimeoutError as PlaywrightTimeoutError
 
 from migang.core import DATA_PATH
-from migang.utils.http import get_signed_params
+from migang.utils.render import get_new_page
+from migang.utils.http import http_session, get_signed_params
 
 nuannuan_path = DATA_PATH / "ffxiv" / "nuannuan" / "nuannuan.png"
 nuannuan_path.parent.mkdir(exist_ok=True, parents=True)
@@ -132,7 +132,7 @@ def get_cur_phase() -> str:
 
 
 async def get_nuannuan_text() -> None:
-    async with aiohttp.ClientSession() as client:
+    async with http_session() as client:
         bvid = await get_video_id(15503317, client)
         # 获取数据
         res_data = await extract_nn(bvid, client)
@@ -12,7 +12,7 @@ from nonebot.adapters.onebot.v11 import MessageSegment
 from migang.core import DATA_PATH
 
 require("nonebot_plugin_htmlrender")
-from nonebot_plugin_htmlrender import get_new_page
+from migang.utils.render import get_new_page
 
 __plugin_meta__ = PluginMetadata(
     name="今日素材",
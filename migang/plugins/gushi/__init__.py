@@ -1,9 +1,10 @@
 import asyncio
 
-import aiohttp
 from nonebot import on_fullmatch
 from nonebot.plugin import PluginMetadata
 
+from migang.utils.http import http_session
+
 __plugin_meta__ = PluginMetadata(
     name="古诗",
     description="为什么突然文艺起来了！",
@@ -27,7 +28,7 @@ gushi_url = "https://v1.jinrishici.com/all"
 @gushi.handle()
 async def _():
     try:
-        async with aiohttp.ClientSession() as client:
+        async with http_session() as client:
             r = await client.get(gushi_url)
             data = await r.json()
             await gushi.send(
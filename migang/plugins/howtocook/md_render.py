@@ -7,7 +7,6 @@ from nonebot import require
 from nonebot.log import logger
 
 require("nonebot_plugin_htmlrender")
-from nonebot_plugin_htmlrender.browser import get_new_page
 from nonebot_plugin_htmlrender.data_source import (
     TEMPLATES_PATH,
     env,
@@ -16,6 +15,7 @@ from nonebot_plugin_htmlrender.data_source import (
 )
 
 from migang.core.utils import http_utils
+from migang.utils.render import get_new_page
 
 
 async def handle_route(route):
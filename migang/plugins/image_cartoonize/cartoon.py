@@ -1,13 +1,14 @@
 import base64
 from io import BytesIO
 
-import httpx
 from PIL import Image
 from httpx import NetworkError
 
+from migang.utils.http import http_client
+
 
 async def cartonization(img_url: str) -> str:
-    async with httpx.AsyncClient() as client:
+    async with http_client() as client:
         res = await client.get(img_url)
     if res.is_error:
         raise NetworkError("无法获取此图像")
@@ -24,7 +25,7 @@ async def cartonization(img_url: str) -> str:
         "data": [f"data:image/jpeg;base64,{img_b64}"],
     }
 
-    async with httpx.AsyncClient() as client:
+    async with http_client() as client:
         res = await client.post(url_push, json=data, timeout=60)
 
     if res.is_error:
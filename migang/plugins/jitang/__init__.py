@@ -1,9 +1,10 @@
 import asyncio
 
-import aiohttp
 from nonebot import on_regex
 from nonebot.plugin import PluginMetadata
 
+from migang.utils.http import http_session
+
 __plugin_meta__ = PluginMetadata(
     name="鸡汤",
     description="生成发病小作文",
@@ -26,7 +27,7 @@ jitang_url = "https://api.shadiao.pro/du"
 @jitang.handle()
 async def _():
     try:
-        async with aiohttp.ClientSession() as client:
+        async with http_session() as client:
             r = await client.get(jitang_url)
             data = await r.json()
             await jitang.send(data["data"]["text"])
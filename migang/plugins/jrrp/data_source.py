@@ -7,7 +7,8 @@ import anyio
 import ujson
 import jinja2
 from nonebot import get_plugin_config
-from nonebot_plugin_htmlrender import html_to_pic
+
+from migang.utils.render import html_to_pic
 
 from .config import Config
 
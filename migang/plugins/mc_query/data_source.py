@@ -13,10 +13,12 @@ from sqlalchemy import select
 from nonebot.log import logger
 from PIL.Image import Image as IMG
 from mcstatus import JavaServer, BedrockServer
-from nonebot_plugin_htmlrender import get_new_page
 from nonebot_plugin_datastore import create_session
 from nonebot.adapters.onebot.v11 import MessageSegment
 
+from migang.utils.http import http_session
+from migang.utils.render import get_new_page
+
 from .draw import draw_list
 from .model import McServerGroup, McServerPrivate
 from .picmcstat.draw import draw_java, draw_error, draw_bedrock
@@ -155,7 +157,7 @@ def get_add_info(name: str, host: str, sv_type: str):
 async def get_mc_uuid(username: str) -> str:
     url = f"https://api.mojang.com/users/profiles/minecraft/{username}"
     try:
-        async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(10)) as client:
+        async with http_session(timeout=aiohttp.ClientTimeout(10)) as client:
             resp = await client.get(url)
             result = await resp.json(content_type=None)
         if not result:
@@ -182,7 +184,7 @@ async def get_crafatar(type_: str, uuid: str) -> Optional[bytes]:
     url = f"https://crafatar.com/{path}/{uuid}?overlay"
 
     try:
-        async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(10)) as client:
+        async with http_session(timeout=aiohttp.ClientTimeout(10)) as client:
             resp = await client.get(url)
             result = await resp.read()
         return result
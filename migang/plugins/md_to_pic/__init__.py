@@ -6,7 +6,7 @@ from nonebot.params import Startswith, EventPlainText
 from nonebot.adapters.onebot.v11 import MessageSegment
 
 require("nonebot_plugin_htmlrender")
-from nonebot_plugin_htmlrender import md_to_pic
+from migang.utils.render import md_to_pic
 
 __plugin_meta__ = PluginMetadata(
     name="Markdown转图片",
@@ -1,9 +1,12 @@
 import asyncio
+from typing import Type
 
 from nonebot.drivers import Driver
+from nonebot.matcher import Matcher
+from nonebot.permission import SUPERUSER
 from nonebot.plugin import PluginMetadata
-from nonebot import get_driver, on_message
 from nonebot.adapters.onebot.v11 import MessageEvent
+from nonebot import get_driver, on_message, on_fullmatch
 
 from migang.core import ConfigItem, get_config, post_init_manager
 
@@ -39,6 +42,8 @@ __plugin_meta__ = PluginMetadata(
 “我的”、“全局”、<时间段>、“表情名” 均为可选项
 <时间段> 的关键词有：日、本日、周、本周、月、本月、年、本年
 如：“我的今日表情调用统计 petpet”
+- 转发统计
+“超级用户” 发送 表情包转发统计 查看转发、过滤、丢弃的消息数与连接延迟
 """.strip(),
     type="application",
     supported_adapters={"~onebot.v11"},
@@ -48,15 +53,21 @@ __plugin_category__ = "好玩的"
 __plugin_config__ = [
     ConfigItem(key="url", initial_value="", description="连接地址"),
     ConfigItem(key="access_token", initial_value="", description="token"),
+    ConfigItem(
+        key="meme_api",
+        initial_value="",
+        description="meme-generator的地址，连接时从中获取表情关键词，只转发以关键词开头的消息，为空时转发所有消息",
+    ),
 ]
 
 driver: Driver = get_driver()
 
 ws_conn: WebSocketConn
+stats_matcher: Type[Matcher]
 
 
 async def __rule(event: MessageEvent):
-    asyncio.create_task(ws_conn.forwardEvent(event))
+    ws_conn.forwardEvent(event)
     return False
 
 
@@ -64,13 +75,25 @@ async def _handler():
     pass
 
 
+async def _stats_handler():
+    await stats_matcher.finish(
+        "\n".join(f"{k}: {v}" for k, v in ws_conn.stats().items())
+    )
+
+
 @post_init_manager
 async def setup_ws():
     url = await get_config("url")
     if not url:
         return
     ascess_token = await get_config("access_token")
-    global ws_conn
-    ws_conn = WebSocketConn(url=url, access_token=ascess_token)
+    global ws_conn, stats_matcher
+    ws_conn = WebSocketConn(
+        url=url, access_token=ascess_token, meme_api=await get_config("meme_api")
+    )
     on_message(block=False, priority=20, rule=__rule).append_handler(_handler)
+    stats_matcher = on_fullmatch(
+        "表情包转发统计", permission=SUPERUSER, priority=1, block=True
+    )
+    stats_matcher.append_handler(_stats_handler)
     asyncio.create_task(ws_conn.connect())
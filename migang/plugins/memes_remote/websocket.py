@@ -1,19 +1,35 @@
 import time
 import random
 import asyncio
-from typing import Any
-from asyncio import Queue
+from time import monotonic
+from collections import deque
+from re import _parser as sre_parse
+from typing import Any, Dict, List, Deque, Tuple, Optional
 
 import ujson
 import websockets
-from nonebot import get_bot
+from pygtrie import CharTrie
 from nonebot.log import logger
-from pydantic import BaseModel
+from nonebot import get_bot, get_driver
 from websockets import WebSocketClientProtocol
 from websockets.exceptions import ConnectionClosedOK, ConnectionClosedError
 from nonebot.adapters.onebot.v11 import Message, MessageEvent, MessageSegment
 
+from migang.utils.http import http_session
+
 _HEARTBEAT_INTERVAL = 30
+# 待转发事件的上限，超出时丢弃最早的事件
+_MAX_QUEUE_SIZE = 256
+# 断线期间积压超过该时间（秒）的事件不再转发
+_MAX_EVENT_AGE = 60
+# 获取表情详情的并发数
+_INFO_CONCURRENCY = 8
+# 表情包插件自身的指令都含有该词
+_COMMAND_WORD = "表情"
+# 关键词获取成功后的有效期，过期后在下次连接成功时重新获取
+_KEYWORDS_TTL = 6 * 60 * 60
+# 获取失败后的重试间隔
+_KEYWORDS_RETRY = 5 * 60
 
 
 def _proccess_api(data: dict[str, Any]):
@@ -42,9 +58,117 @@ def _build_ret_msg(data) -> dict[str, Any]:
     return {"status": "ok", "retcode": 0, "data": data}
 
 
+def _dump_event(event: MessageEvent) -> str:
+    data = event.model_dump()
+    data["message"] = data["raw_message"]
+    return ujson.dumps(data)
+
+
+def _subpattern_prefixes(items) -> Optional[List[str]]:
+    """匹配的文本必以其中之一开头的固定前缀，无法确定时为None"""
+    prefix = ""
+    for op, av in items:
+        if op is sre_parse.LITERAL:
+            prefix += chr(av)
+            continue
+        if op is sre_parse.AT:
+            continue
+        branches = None
+        if op is sre_parse.BRANCH:
+            branches = av[1]
+        elif op is sre_parse.SUBPATTERN:
+            # 组内开启忽略大小写时前缀不可靠
+            if not av[1] & sre_parse.SRE_FLAG_IGNORECASE:
+                branches = [av[3]]
+        elif op in (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT) and av[0] >= 1:
+            branches = [av[2]]
+        if branches is not None:
+            tails = [_subpattern_prefixes(branch) for branch in branches]
+            if all(tails):
+                return [prefix + tail for tail_list in tails for tail in tail_list]
+        break
+    return [prefix] if prefix else None
+
+
+def _literal_prefixes(pattern: str) -> Optional[List[str]]:
+    """正则的固定开头，匹配的文本都以其中之一开头
+
+    Args:
+        pattern (str): 正则
+
+    Returns:
+        Optional[List[str]]: 各分支的固定开头，有分支没有固定开头时为None
+    """
+    try:
+        parsed = sre_parse.parse(pattern)
+    except Exception:
+        return None
+    if parsed.state.flags & sre_parse.SRE_FLAG_IGNORECASE:
+        return None
+    return _subpattern_prefixes(parsed)
+
+
+async def _fetch_keywords(api: str) -> Optional[CharTrie]:
+    """从meme-generator获取所有表情的关键词
+
+    Args:
+        api (str): meme-generator的地址
+
+    Returns:
+        Optional[CharTrie]: 关键词前缀树，有无法转为前缀的快捷指令时为None
+    """
+    api = api.rstrip("/")
+    semaphore = asyncio.Semaphore(_INFO_CONCURRENCY)
+    async with http_session(raise_for_status=True) as client:
+
+        async def _info(key: str) -> Dict[str, Any]:
+            async with semaphore:
+                async with client.get(f"{api}/memes/{key}/info", timeout=15) as resp:
+                    return await resp.json()
+
+        async with client.get(f"{api}/memes/keys", timeout=15) as resp:
+            keys = await resp.json()
+        infos = await asyncio.gather(*[_info(key) for key in keys])
+    trie = CharTrie()
+    for info in infos:
+        for keyword in info.get("keywords", []):
+            trie[keyword] = True
+        for shortcut in info.get("shortcuts", []):
+            if (prefixes := _literal_prefixes(shortcut["key"])) is None:
+                logger.warning(f"memes：快捷指令 {shortcut['key']} 没有固定的开头，将转发所有消息")
+                return None
+            for prefix in prefixes:
+                trie[prefix] = True
+    return trie
+
+
 class WebSocketConn:
-    def __init__(self, url: str, access_token: str) -> None:
-        self.__queue = Queue()
+    def __init__(self, url: str, access_token: str, meme_api: str = "") -> None:
+        """WebSocketConn构造函数
+
+        Args:
+            url (str): 连接地址
+            access_token (str): token
+            meme_api (str, optional): meme-generator的地址，为空时不过滤消息. Defaults to "".
+        """
+        self.__events: Deque[Tuple[float, MessageEvent]] = deque(maxlen=_MAX_QUEUE_SIZE)
+        """[(收到的时间, 事件)]
+        """
+        self.__ready = asyncio.Event()
+        self.__meme_api = meme_api
+        self.__keywords: Optional[CharTrie] = None
+        """表情关键词，为None时转发所有消息
+        """
+        self.__keywords_expire = 0.0
+        """在此之前不重新获取关键词
+        """
+        self.__keywords_task: Optional[asyncio.Task] = None
+        self.__command_start = sorted(
+            (start for start in get_driver().config.command_start if start),
+            key=len,
+            reverse=True,
+        )
+        self.__stats = {"forwarded": 0, "filtered": 0, "dropped": 0, "expired": 0}
         self.__url = url
         self.__bot_id = int("".join([str(random.randint(0, 9)) for _ in range(10)]))
         self.__access_token = access_token
@@ -57,6 +181,7 @@ class WebSocketConn:
 
     async def connect(self):
         self.__stop_flag = True
+        await self.__load_keywords()
         while self.__stop_flag:
             try:
                 async with websockets.connect(
@@ -72,6 +197,8 @@ class WebSocketConn:
                     logger.info("与memes已成功建立连接")
                     self.__websocket = websocket
                     self.__connect = True
+                    # 只在连接成功后刷新，对方离线时不反复请求
+                    self.__keywords_task = asyncio.create_task(self.__load_keywords())
                     self.__send_task = asyncio.create_task(self.__ws_send(websocket))
                     self.__recv_task = asyncio.create_task(self.__ws_recv(websocket))
                     self.__heartbeat = asyncio.create_task(
@@ -141,8 +268,67 @@ class WebSocketConn:
         self.__stop_flag = False
         await self.__handle_disconnect()
 
-    async def forwardEvent(self, event: MessageEvent):
-        await self.__queue.put(event)
+    async def __load_keywords(self) -> None:
+        if not self.__meme_api or monotonic() < self.__keywords_expire:
+            return
+        self.__keywords_expire = monotonic() + _KEYWORDS_RETRY
+        try:
+            self.__keywords = await _fetch_keywords(self.__meme_api)
+        except Exception as e:
+            # 保留上次获取的关键词
+            logger.warning(f"memes：获取表情关键词失败：{e}")
+            return
+        self.__keywords_expire = monotonic() + _KEYWORDS_TTL
+        if self.__keywords is not None:
+            logger.info(f"memes：已获取 {len(self.__keywords)} 个表情关键词")
+
+    def __match(self, event: MessageEvent) -> bool:
+        """消息的某段文本以表情关键词开头，或含有表情包插件的指令"""
+        if self.__keywords is None:
+            return True
+        for seg in event.message:
+            if seg.type != "text":
+                continue
+            text = seg.data["text"].lstrip()
+            if _COMMAND_WORD in text or self.__keywords.shortest_prefix(text):
+                return True
+            for start in self.__command_start:
+                if text.startswith(start):
+                    if self.__keywords.shortest_prefix(text[len(start) :]):
+                        return True
+                    break
+        return False
+
+    def forwardEvent(self, event: MessageEvent) -> None:
+        """将可能触发表情的消息加入待转发队列
+
+        Args:
+            event (MessageEvent): 消息事件
+        """
+        if not self.__match(event):
+            self.__stats["filtered"] += 1
+            return
+        if len(self.__events) == self.__events.maxlen:
+            self.__stats["dropped"] += 1
+        self.__events.append((monotonic(), event))
+        self.__ready.set()
+
+    def stats(self) -> Dict[str, Any]:
+        """转发的统计
+
+        Returns:
+            Dict[str, Any]: 转发、过滤、丢弃、过期的事件数，队列长度，关键词数与心跳往返延迟
+        """
+        return {
+            **self.__stats,
+            "queue": len(self.__events),
+            "keywords": len(self.__keywords) if self.__keywords is not None else None,
+            "latency_ms": (
+                round(self.__websocket.latency * 1000, 1)
+                if self.__connect and self.__websocket
+                else None
+            ),
+        }
 
     async def _call_api(self, raw_data: str) -> Any:
         echo: str = ""
@@ -158,7 +344,7 @@ class WebSocketConn:
             if echo:
                 resp_data["echo"] = echo
             logger.info(f"发送memesAPI调用结果：{resp_data}")
-            await self.__queue.put(resp_data)
+            await self.__websocket.send(ujson.dumps(resp_data))
         except Exception as e:
             logger.error(f"memes：调用api失败：{data}：{e}")
             import traceback
@@ -169,17 +355,22 @@ class WebSocketConn:
     async def __ws_send(self, ws: WebSocketClientProtocol):
         while self.__connect:
             try:
-                event = await self.__queue.get()
-                send_data: str
-                if isinstance(event, BaseModel):
-                    send_data = event.model_dump()
-                    send_data["message"] = send_data["raw_message"]
-                    send_data = ujson.dumps(send_data)
-                elif isinstance(event, dict):
-                    send_data = ujson.dumps(event)
-                elif isinstance(event, str):
-                    send_data = event
-                asyncio.create_task(ws.send(send_data))
+                await self.__ready.wait()
+                self.__ready.clear()
+                deadline = monotonic() - _MAX_EVENT_AGE
+                # OneBot每个事件为单独的一帧，无法合并发送，按顺序逐个发送；
+                # 发送成功后才移出队列，断线时未发送的事件留待重连后发送
+                while self.__events:
+                    received, event = self.__events[0]
+                    if received < deadline:
+                        self.__events.popleft()
+                        self.__stats["expired"] += 1
+                        continue
+                    await ws.send(_dump_event(event))
+                    # 发送期间队列已满时该事件可能已被丢弃
+                    if self.__events and self.__events[0][1] is event:
+                        self.__events.popleft()
+                    self.__stats["forwarded"] += 1
             except (ConnectionClosedError, ConnectionClosedOK) as e:
                 raise e
             except Exception as e:
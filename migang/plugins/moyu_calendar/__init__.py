@@ -1,4 +1,3 @@
-import aiohttp
 from nonebot.log import logger
 from nonebot.rule import to_me
 from nonebot import on_fullmatch
@@ -7,6 +6,7 @@ from nonebot_plugin_apscheduler import scheduler
 from nonebot.adapters.onebot.v11 import Message, MessageSegment
 
 from migang.core import TaskItem, broadcast
+from migang.utils.http import http_session
 
 __plugin_meta__ = PluginMetadata(
     name="摸鱼日历",
@@ -31,7 +31,7 @@ moyu_calendar = on_fullmatch("摸鱼日历", priority=26, block=True, rule=to_me
 async def get_calendar() -> Message:
     for i in range(3):
         try:
-            async with aiohttp.ClientSession() as client:
+            async with http_session() as client:
                 r = await client.get(
                     "https://api.j4u.ink/v1/store/other/proxy/remote/moyu.json",
                     timeout=7,
@@ -18,6 +18,8 @@ from nonebot.adapters.onebot.v11 import (
     GroupMessageEvent,
 )
 
+from migang.utils.http import http_session
+
 from .data_source import render_music_list
 from .qq_music import search as search_qq_music
 from .kugo_music import search as search_kugo_music
@@ -104,9 +106,7 @@ async def build_music_card(song) -> MessageSegment:
         return MessageSegment.music("163", song["id"])
     elif song["type"] == "qq":
         try:
-            import aiohttp
-
-            async with aiohttp.ClientSession() as client:
+            async with http_session() as client:
                 m_detail = (
                     await (
                         await client.get(
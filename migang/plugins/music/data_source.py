@@ -1,7 +1,7 @@
 from pathlib import Path
 from typing import Dict, List
 
-from nonebot_plugin_htmlrender import template_to_pic
+from migang.utils.render import template_to_pic
 
 template_path = Path(__file__).parent / "templates"
 
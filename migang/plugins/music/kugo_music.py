@@ -1,6 +1,7 @@
-import aiohttp
 from nonebot.log import logger
 
+from migang.utils.http import http_session
+
 
 async def search(keyword: str, result_num: int = 3):
     search_url = "http://mobilecdn.kugou.com/api/v3/search/song"
@@ -13,7 +14,7 @@ async def search(keyword: str, result_num: int = 3):
     }
     song_list = []
     try:
-        async with aiohttp.ClientSession() as client:
+        async with http_session() as client:
             resp = await client.get(search_url, params=params)
             result = await resp.json(content_type=None)
             if songs := result["data"]["info"][:result_num]:
@@ -1,6 +1,7 @@
-import aiohttp
 from nonebot.log import logger
 
+from migang.utils.http import http_session
+
 
 async def search(keyword: str, result_num: int = 3):
     search_url = "https://search.kuwo.cn/r.s"
@@ -16,7 +17,7 @@ async def search(keyword: str, result_num: int = 3):
     }
     song_list = []
     try:
-        async with aiohttp.ClientSession() as client:
+        async with http_session() as client:
             resp = await client.get(search_url, params=params, timeout=5)
             result = await resp.json(content_type=None)
             if songs := result["abslist"][:result_num]:
@@ -1,6 +1,7 @@
-import aiohttp
 from nonebot.log import logger
 
+from migang.utils.http import http_session
+
 USER_AGENT = "Mozilla/5.0 (iPhone; CPU iPhone OS 9_1 like Mac OS X) AppleWebKit/601.1.46 (KHTML, like Gecko) Version/9.0 Mobile/13B143 Safari/601.1"
 headers = {"referer": "https://m.music.migu.cn/v3", "User-Agent": USER_AGENT}
 
@@ -10,7 +11,7 @@ async def search(keyword, result_num: int = 3):
     song_list = []
     # ?rows=20&type=2&keyword=霜雪千年&pgc=1
     try:
-        async with aiohttp.ClientSession() as client:
+        async with http_session() as client:
             resp = await client.get(
                 url=f"https://m.music.migu.cn/migu/remoting/scr_search_tag?rows=20&type=2&keyword={keyword}&pgc=1",
                 headers=headers,
@@ -1,7 +1,8 @@
 import ujson
-import aiohttp
 from nonebot.log import logger
 
+from migang.utils.http import http_session
+
 headers = {
     "Accept": "*/*",
     "Accept-Encoding": "gzip,deflate,sdch",
@@ -22,7 +23,7 @@ api_url = "https://music.163.com/api/search/get/web"
 
 async def search_song(s, limit, stype=1, offset=0, total="true"):
     data = {"s": s, "type": stype, "offset": offset, "total": total, "limit": limit}
-    async with aiohttp.ClientSession(json_serialize=ujson.dumps) as client:
+    async with http_session(json_serialize=ujson.dumps) as client:
         resp = await client.post(api_url, data=data, headers=headers, timeout=5)
         return await resp.json(content_type=None)
 
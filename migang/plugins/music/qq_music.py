@@ -1,6 +1,7 @@
-import aiohttp
 from nonebot.log import logger
 
+from migang.utils.http import http_session
+
 
 async def search(keyword, result_num: int = 3):
     """搜索音乐"""
@@ -9,7 +10,7 @@ async def search(keyword, result_num: int = 3):
         "word": keyword,
     }
     try:
-        async with aiohttp.ClientSession() as client:
+        async with http_session() as client:
             resp = await client.get(
                 url=f"https://api.vkeys.cn/v2/music/tencent",
                 params=params,
@@ -3,7 +3,6 @@ import random
 import asyncio
 from io import BytesIO
 
-from httpx import AsyncClient
 from nonebot.log import logger
 from nonebot.params import Arg
 from nonebot import get_driver, get_plugin_config
@@ -17,6 +16,8 @@ from nonebot.adapters.onebot.v11 import (
     MessageSegment,
 )
 
+from migang.utils.http import http_client
+
 from .config import Config, capoo_path, capoo_pic2, capoo_pic2_path
 from .download import (
     hashlib,
@@ -78,7 +79,7 @@ async def pic():
         except ActionFailed:
             await picture.send(f"capoo出不来了，稍后再试试吧~")
     else:
-        async with AsyncClient() as client:
+        async with http_client() as client:
             resp = await client.get(
                 f"https://git.acwing.com/HuParry/capoo/-/raw/master/capoo ({random.randint(1, capoo_list_len)}).gif",
                 timeout=5.0,
@@ -125,7 +126,7 @@ async def add_pic(pic_list: Message = Arg("pic")):
             continue
         pic_url = pic.data["url"]
 
-        async with AsyncClient() as client:
+        async with http_client() as client:
             resp = await client.get(pic_url, timeout=5.0)
 
         try:
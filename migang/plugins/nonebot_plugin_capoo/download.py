@@ -3,9 +3,10 @@ import asyncio
 import hashlib
 import sqlite3
 
-import httpx
 from nonebot.log import logger
 
+from migang.utils.http import http_client
+
 from .sqlite import check_md5, check_md5_force
 from .config import (
     capoo_pic,
@@ -20,7 +21,7 @@ capoo_list_len = 456
 
 
 async def download_url(url: str) -> bytes:
-    async with httpx.AsyncClient() as client:
+    async with http_client() as client:
         for i in range(3):
             try:
                 resp = await client.get(url, timeout=20)
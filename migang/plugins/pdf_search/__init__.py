@@ -3,7 +3,6 @@
 import os
 import re
 
-import aiohttp
 from bs4 import BeautifulSoup
 from nonebot.log import logger
 from nonebot import on_startswith
@@ -17,6 +16,8 @@ from nonebot.adapters.onebot.v11 import (
     GroupMessageEvent,
 )
 
+from migang.utils.http import http_session
+
 __plugin_meta__ = PluginMetadata(
     name="PDF搜索",
     description="PDF搜索",
@@ -40,7 +41,7 @@ base_url = "https://z-lib.is/"
 async def _(bot: Bot, event: MessageEvent, cmd: str = Startswith()):
     keyword = event.get_plaintext().removeprefix(cmd).strip()
     try:
-        async with aiohttp.ClientSession() as client:
+        async with http_session() as client:
             html = await (
                 await client.get(
                     os.path.join(base_url, "s"),
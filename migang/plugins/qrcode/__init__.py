@@ -1,7 +1,6 @@
 from io import BytesIO
 from typing import Annotated
 
-import httpx
 from pyzbar import pyzbar
 from nonebot import on_command
 from nonebot.typing import T_State
@@ -17,6 +16,8 @@ from nonebot.adapters.onebot.v11 import (
     GroupMessageEvent,
 )
 
+from migang.utils.http import http_client
+
 __plugin_meta__ = PluginMetadata(
     name="二维码转链接",
     description="将二维码转化为链接发出",
@@ -90,7 +91,7 @@ async def _(bot: Bot, event: MessageEvent, state: T_State):
 
     url_list = []
 
-    async with httpx.AsyncClient() as client:
+    async with http_client() as client:
         for i in image_url:
             img = await client.get(i, timeout=15)
             urls = "\n".join(decode(img.content))
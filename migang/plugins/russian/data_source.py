@@ -1,14 +1,12 @@
 from typing import Optional
 
-import pygal
-from pygal.style import Style
 from sqlalchemy import select
 from nonebot.adapters.onebot.v11 import Bot
 from sqlalchemy.ext.asyncio.session import AsyncSession
 
 from .model import RussianUser
 
-style = Style(font_family="Noto Sans Mono CJK SC", colors=["#B6DCEF"])
+_STYLE = {"font_family": "Noto Sans Mono CJK SC", "colors": ["#B6DCEF"]}
 
 
 async def rank(
@@ -54,7 +52,11 @@ async def rank(
         list(t)
         for t in zip(*sorted(zip(all_user_data, user_names), reverse=True)[:num])
     )
-    bar_chart = pygal.Bar(style=style)
+    # pygal仅在绘制排行榜时使用，首次使用时导入
+    import pygal
+    from pygal.style import Style
+
+    bar_chart = pygal.Bar(style=Style(**_STYLE))
     bar_chart.title = rank_name
     bar_chart.x_labels = user_names
     bar_chart.y_labels = range(user_data[0] + 1)
@@ -11,6 +11,7 @@ from pydantic import TypeAdapter
 from nonebot.adapters.onebot.v11 import Message, MessageSegment
 
 from migang.core import DATA_PATH
+from migang.utils.http import http_client
 
 data_dir = DATA_PATH / "schedule_reminder"
 image_dir = data_dir / "image"
@@ -19,7 +20,7 @@ image_dir.mkdir(exist_ok=True, parents=True)
 
 
 async def cache_file(msg: Message):
-    async with httpx.AsyncClient() as client:
+    async with http_client() as client:
         await asyncio.gather(
             *[cache_image_url(seg, client) for seg in msg if seg.type == "image"]
         )
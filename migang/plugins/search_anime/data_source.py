@@ -2,11 +2,12 @@ import time
 import asyncio
 from typing import List, Union
 
-import aiohttp
 import feedparser
 from lxml import etree
 from nonebot.log import logger
 
+from migang.utils.http import http_session
+
 
 async def from_anime_get_info(key_word: str, max_: int) -> Union[str, List[str]]:
     s_time = time.time()
@@ -20,7 +21,7 @@ async def from_anime_get_info(key_word: str, max_: int) -> Union[str, List[str]]
 
 
 async def get_repass(key_word: str, max_: int) -> List[str]:
-    async with aiohttp.ClientSession() as client:
+    async with http_session() as client:
         put_line = []
         r = await client.get(
             url="https://share.dmhy.org/topics/rss/rss.xml",
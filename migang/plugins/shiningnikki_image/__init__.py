@@ -2,7 +2,6 @@ import random
 import asyncio
 from typing import Any, Tuple
 
-import aiohttp
 from aiocache import cached
 from nonebot.log import logger
 from nonebot.rule import to_me
@@ -18,6 +17,7 @@ from nonebot.adapters.onebot.v11 import (
 )
 
 from migang.core import CDItem, CountItem
+from migang.utils.http import http_session
 from migang.utils.file import async_load_data
 
 from .data_source import DATA_PATH, update_suits_img
@@ -107,7 +107,7 @@ async def _():
 @random_nikki.handle()
 async def _(bot: Bot, event: MessageEvent, reg_group: Tuple[Any, ...] = RegexGroup()):
     num = int(reg_group[0] or 1)
-    async with aiohttp.ClientSession() as client:
+    async with http_session() as client:
         r = await client.get(
             "https://api.sunuannuan.com/api/assets",
             params={"category": "nikki", "count": num},
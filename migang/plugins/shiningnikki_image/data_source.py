@@ -1,9 +1,8 @@
-import aiohttp
 from fake_useragent import UserAgent
 
 from migang.core import DATA_PATH
-from migang.utils.http import async_download_files
 from migang.utils.file import async_load_data, async_save_data
+from migang.utils.http import http_session, async_download_files
 
 DATA_PATH = DATA_PATH / "shiningnikki_image"
 DATA_PATH.mkdir(exist_ok=True, parents=True)
@@ -11,7 +10,7 @@ DATA_PATH.mkdir(exist_ok=True, parents=True)
 
 async def update_suits_img():
     headers = {"user-agent": UserAgent(browsers=["chrome", "edge"]).random}
-    async with aiohttp.ClientSession() as client:
+    async with http_session() as client:
         r = await client.head(
             "https://nikki4.papegames.cn/audiovisual?utm_source=official&utm_medium=home_nav",
             headers=headers,
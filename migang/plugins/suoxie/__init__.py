@@ -1,11 +1,12 @@
 import ujson
-import aiohttp
 from nonebot import on_command
 from fake_useragent import UserAgent
 from nonebot.params import CommandArg
 from nonebot.plugin import PluginMetadata
 from nonebot.adapters.onebot.v11 import Message
 
+from migang.utils.http import http_session
+
 __plugin_meta__ = PluginMetadata(
     name="缩写查询",
     description="缩写查询",
@@ -33,7 +34,7 @@ async def _(arg: Message = CommandArg()):
         if not episode:
             await suoxie.finish("你想知道哪个拼音缩写的全称呢？请发送[缩写 xxx]查看哦", at_sender=True)
         body = {"text": episode}
-        async with aiohttp.ClientSession(json_serialize=ujson.dumps) as client:
+        async with http_session(json_serialize=ujson.dumps) as client:
             r = await client.post(
                 url=url,
                 json=body,
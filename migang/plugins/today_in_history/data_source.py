@@ -4,13 +4,14 @@ from asyncio import sleep
 from datetime import datetime
 
 import anyio
-import aiohttp
 from lxml import etree
 from nonebot.log import logger
 from fake_useragent import UserAgent
-from nonebot_plugin_htmlrender import template_to_pic
 from nonebot.adapters.onebot.v11 import MessageSegment
 
+from migang.utils.http import http_session
+from migang.utils.render import template_to_pic
+
 template_path = Path(__file__).parent / "templates"
 
 
@@ -18,7 +19,7 @@ async def get_data():
     for i in range(3):
         try:
             today = datetime.today()
-            async with aiohttp.ClientSession() as client:
+            async with http_session() as client:
                 r = await client.get(
                     f"https://baike.baidu.com/cms/home/eventsOnHistory/{today.month:02}.json",
                     headers={
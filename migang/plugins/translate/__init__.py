@@ -1,7 +1,6 @@
 import re
 import asyncio
 
-import aiohttp
 from nonebot.log import logger
 from nonebot.plugin import PluginMetadata
 from nonebot import get_driver, on_startswith
@@ -13,6 +12,7 @@ from nonebot.adapters.onebot.v11 import (
     GroupMessageEvent,
 )
 
+from migang.utils.http import http_session
 from migang.core import ConfigItem, get_config
 
 from .data_source import (
@@ -64,7 +64,7 @@ GOOGLE_STATUS = False
 async def _():
     global GOOGLE_STATUS
     try:
-        async with aiohttp.ClientSession() as client:
+        async with http_session() as client:
             r = await client.head("https://translate.google.com/", timeout=2)
             GOOGLE_STATUS = r.status == 200
     except asyncio.exceptions.TimeoutError:
@@ -5,12 +5,12 @@ import hashlib
 from typing import Dict
 
 import ujson
-import aiohttp
 from nonebot import get_driver
 from nonebot.log import logger
 from nonebot.utils import run_sync
 from deep_translator import DeeplTranslator, GoogleTranslator
 
+from migang.utils.http import http_session
 from migang.core import get_config, sync_get_config
 
 
@@ -200,7 +200,7 @@ async def _():
 
 async def get_azure_trans(text: str):
     try:
-        async with aiohttp.ClientSession(json_serialize=ujson.dumps) as client:
+        async with http_session(json_serialize=ujson.dumps) as client:
             r = await client.post(
                 constructed_url, headers=headers, json=[{"text": text}]
             )
@@ -257,7 +257,7 @@ async def get_baidu_trans(text: str, to: str = "zh"):
             "salt": salt,
             "sign": sign,
         }
-        async with aiohttp.ClientSession() as client:
+        async with http_session() as client:
             r = await client.get(
                 "https://api.fanyi.baidu.com/api/trans/vip/translate",
                 params=params,
@@ -291,7 +291,7 @@ async def get_youdao_trans(text: str):
         "typoResult": "true",
     }
     try:
-        async with aiohttp.ClientSession() as client:
+        async with http_session() as client:
             data = await (await client.post(url, data=data)).json()
         if data["errorCode"] == 0:
             return f"[有道机翻]\n> {data['translateResult'][0][0]['tgt']}"
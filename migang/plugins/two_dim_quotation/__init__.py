@@ -1,8 +1,9 @@
-import aiohttp
 from nonebot.rule import to_me
 from nonebot import on_fullmatch
 from nonebot.plugin import PluginMetadata
 
+from migang.utils.http import http_session
+
 __plugin_meta__ = PluginMetadata(
     name="一言二次元语录",
     description="解析群聊消息中的各类链接",
@@ -23,7 +24,7 @@ url = "https://international.v1.hitokoto.cn/?c=a"
 
 @quotations.handle()
 async def _():
-    async with aiohttp.ClientSession() as client:
+    async with http_session() as client:
         data = await (await client.get(url, timeout=5)).json()
     result = f'{data["hitokoto"]}\t——{data["from"]}'
     await quotations.send(result)
@@ -1,11 +1,13 @@
 import re
+from typing import Dict
 
-from nonebot import on_message
 from nonebot.log import logger
 from nonebot.typing import T_State
+from nonebot.permission import SUPERUSER
 from nonebot.plugin import PluginMetadata
+from nonebot import on_message, on_fullmatch
 from nonebot.adapters.onebot.v11.permission import GROUP
-from nonebot.adapters.onebot.v11 import ActionFailed, GroupMessageEvent
+from nonebot.adapters.onebot.v11 import Message, ActionFailed, GroupMessageEvent
 
 from migang.core import TaskItem
 
@@ -22,6 +24,8 @@ usage：
         B站
         微博
         Github
+    指令（超级用户）：
+        链接解析统计：查看消息经过各阶段筛选后剩余的数量
 """.strip(),
     type="application",
     supported_adapters={"~onebot.v11"},
@@ -46,16 +50,47 @@ URL_PATTERN = re.compile(
 BVID_AID_PATTERN = re.compile(r"((?:av|AV)\d+|(?:BV|bv)[a-zA-Z0-9]{10})")
 
 
+# 在正则之前检查的子串，不含任何一个的消息不可能有链接或bv,av号
+KEYWORDS = ("http", "av", "AV", "BV", "bv")
+
+rule_stats: Dict[str, int] = {"消息": 0, "关键字": 0, "正则": 0, "域名": 0}
+"""各阶段放行的消息数
+"""
+
+
+def _extract_text(message: Message) -> str:
+    """只取文本与卡片中的内容，不序列化图片等其他消息段"""
+    return "\n".join(
+        seg.data["text"] if seg.type == "text" else seg.data["data"]
+        for seg in message
+        if seg.type in ("text", "json")
+    )
+
+
 async def _rule(event: GroupMessageEvent, state: T_State) -> bool:
-    msg = str(event.message)
-    if msg.startswith("【FF14/时尚品鉴】"):
+    rule_stats["消息"] += 1
+    message = event.message
+    if (
+        message
+        and message[0].type == "text"
+        and message[0].data["text"].startswith("【FF14/时尚品鉴】")
+    ):
         return False
+    msg = _extract_text(message)
+    if not any(keyword in msg for keyword in KEYWORDS):
+        return False
+    rule_stats["关键字"] += 1
     url_set = set(URL_PATTERN.findall(msg))
     # 对bv,av号额外处理
     if not url_set:
         for id_ in BVID_AID_PATTERN.findall(msg):
             url_set.add(f"https://www.bilibili.com/video/{id_}")
+    if not url_set:
+        return False
+    rule_stats["正则"] += 1
+    url_set = {url for url in url_set if parser_manager.has_parser(url)}
     if url_set:
+        rule_stats["域名"] += 1
         if parsers := await parser_manager.get_parser(
             urls=url_set, group_id=event.group_id
         ):
@@ -65,6 +100,14 @@ async def _rule(event: GroupMessageEvent, state: T_State) -> bool:
 
 
 url_parse = on_message(permission=GROUP, priority=22, block=True, rule=_rule)
+url_parse_stats = on_fullmatch("链接解析统计", permission=SUPERUSER, priority=1, block=True)
+
+
+@url_parse_stats.handle()
+async def _():
+    await url_parse_stats.finish(
+        "各阶段放行的消息数：\n" + "\n".join(f"{k}: {v}" for k, v in rule_stats.items())
+    )
 
 
 @url_parse.handle()
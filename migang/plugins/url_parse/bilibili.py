@@ -3,12 +3,13 @@ import asyncio
 from typing import Tuple, Optional
 from time import strftime, localtime
 
-import aiohttp
 from yarl import URL
 from nonebot.log import logger
 from fake_useragent import UserAgent
 from nonebot.adapters.onebot.v11 import Message, MessageSegment
 
+from migang.utils.http import http_session
+
 from .utils import parser_manager
 
 AID_PATTERN = re.compile(r"(av|AV)\d+")
@@ -20,7 +21,7 @@ LIVE_API_URL = "https://api.live.bilibili.com/xlive/web-room/v1/index/getInfoByR
 
 async def download_image(url: str) -> Optional[bytes]:
     for _ in range(5):
-        async with aiohttp.ClientSession(raise_for_status=True) as session:
+        async with http_session(raise_for_status=True) as session:
             referer = f"{URL(url).scheme}://{URL(url).host}/"
             headers = {"referer": referer}
             try:
@@ -57,7 +58,7 @@ async def get_video_detail(url: str) -> Tuple[Message, str]:
         api_url = f"https://api.bilibili.com/x/web-interface/view?aid={aid.group()[2:]}"
     else:
         raise Exception("找不到bvid或aid")
-    async with aiohttp.ClientSession() as client:
+    async with http_session() as client:
         details = await (
             await client.get(
                 api_url,
@@ -113,7 +114,7 @@ async def get_bangumi_detail(url: str) -> Tuple[Message, str]:
     else:
         raise Exception("无法获取剧集信息")
 
-    async with aiohttp.ClientSession() as client:
+    async with http_session() as client:
         r = await (
             await client.get(
                 real_url,
@@ -164,7 +165,7 @@ async def get_live_summary(url: str) -> Tuple[Message, str]:
         room_id = link.group(2)
     else:
         raise Exception("no link found")
-    async with aiohttp.ClientSession() as client:
+    async with http_session() as client:
         headers = {"User-Agent": UserAgent(browsers=["chrome", "edge"]).random}
         r = await (
             await client.get(
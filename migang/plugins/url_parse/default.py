@@ -3,17 +3,18 @@ import re
 from typing import Tuple
 from urllib.parse import urlparse
 
-import httpx
 from lxml import etree
 from nonebot.log import logger
 from nonebot.adapters.onebot.v11 import Message
 
+from migang.utils.http import http_client
+
 from .utils import parser_manager
 
 
 async def get_meta_data(url) -> dict:
     try:
-        async with httpx.AsyncClient() as client:
+        async with http_client() as client:
             response = await client.get(url, follow_redirects=True)
             response.raise_for_status()
 
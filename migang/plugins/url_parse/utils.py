@@ -1,19 +1,40 @@
 import asyncio
 import traceback
+from time import monotonic
 from functools import partial
-from collections import defaultdict
-from typing import Any, Set, Dict, List, Tuple, Callable, Optional, DefaultDict
+from collections import OrderedDict, defaultdict
+from urllib.parse import urlsplit, parse_qsl, urlencode, urlunsplit
+from typing import (
+    Any,
+    Set,
+    Dict,
+    List,
+    Tuple,
+    Callable,
+    Hashable,
+    Optional,
+    Awaitable,
+    DefaultDict,
+)
 
-import aiohttp
-from aiocache import cached
 from nonebot.log import logger
 from pygtrie import StringTrie
 from nonebot.adapters.onebot.v11 import Message
 
 from migang.core import check_task
+from migang.utils.http import http_session
+from migang.core.utils.timer import timer_service
 
 # 5min
 DEFAULT_CACHE_TIME = 30 * 5
+# 短链接跳转结果的缓存时间
+REDIRECT_CACHE_TIME = 300
+# 解析结果缓存的总大小（字节），截图等较大的结果超出后淘汰最久未使用的
+MAX_RESULT_CACHE_SIZE = 64 * 1024 * 1024
+MAX_REDIRECT_CACHE_SIZE = 1024 * 1024
+# 清理过期缓存的间隔，所有缓存共用一个定时
+SWEEP_INTERVAL = 60
+_SWEEP_KEY = ("url_parse", "sweep")
 
 ALIAS_DOMAIN = (
     "https://b23.tv",
@@ -21,23 +42,165 @@ ALIAS_DOMAIN = (
     "https://bilibili.com",
 )
 
+# 分享链接附带的跟踪参数，不影响解析结果
+TRACKING_PARAMS = frozenset(
+    {
+        "spm_id_from",
+        "from_spmid",
+        "vd_source",
+        "share_source",
+        "share_medium",
+        "share_plat",
+        "share_session_id",
+        "share_tag",
+        "share_from",
+        "bbid",
+        "buvid",
+        "unique_k",
+        "up_id",
+        "is_story_h5",
+        "timestamp",
+        "ts",
+    }
+)
+
+
+def canonical_url(url: str) -> str:
+    """统一链接的形式，去除跟踪参数与锚点，同一内容的分享链接得到同一结果
+
+    Args:
+        url (str): 链接
+
+    Returns:
+        str: https开头的链接
+    """
+    try:
+        parts = urlsplit(url.rstrip("&"))
+    except ValueError:
+        return url
+    query = [
+        (k, v)
+        for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if k not in TRACKING_PARAMS
+    ]
+    return urlunsplit(
+        (
+            "https" if parts.scheme == "http" else parts.scheme,
+            parts.netloc.lower(),
+            parts.path,
+            urlencode(query),
+            "",
+        )
+    )
+
 
-@cached(ttl=300)
 async def get_url(url):
-    async with aiohttp.ClientSession() as client:
+    async with http_session() as client:
         r = await client.head(url, timeout=15, allow_redirects=False)
         if 300 <= r.status <= 399:
             return r.headers["location"]
     return url
 
 
+def _result_size(result: Tuple[Message, str]) -> int:
+    msg, url = result
+    # 图片以base64字符串保存在段的数据中
+    return len(url) + sum(len(str(v)) for seg in msg for v in seg.data.values())
+
+
+class ResultCache:
+    """按总大小淘汰最久未使用项的缓存，同一key同时只获取一次，其余请求等待同一结果"""
+
+    def __init__(self, max_size: int) -> None:
+        """ResultCache构造函数
+
+        Args:
+            max_size (int): 缓存的总大小
+        """
+        self.__max_size = max_size
+        self.__entries: OrderedDict[Hashable, Tuple[float, int, Any]] = OrderedDict()
+        """{key: (过期时间, 大小, 结果)}，按最近使用排序
+        """
+        self.__size = 0
+        self.__fetching: Dict[Hashable, asyncio.Future] = {}
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+    async def get(
+        self,
+        key: Hashable,
+        factory: Callable[[], Awaitable[Any]],
+        ttl: Optional[float],
+        sizeof: Callable[[Any], int],
+    ) -> Any:
+        """获取缓存的结果，不存在或已过期时调用factory
+
+        Args:
+            key (Hashable): 缓存的标识
+            factory (Callable[[], Awaitable[Any]]): 获取结果
+            ttl (Optional[float]): 缓存时间，为None时只合并同时的请求，不缓存
+            sizeof (Callable[[Any], int]): 结果的大小
+
+        Returns:
+            Any: 结果
+        """
+        if (entry := self.__entries.get(key)) is not None:
+            if entry[0] > monotonic():
+                self.__entries.move_to_end(key)
+                return entry[2]
+            self.__pop(key)
+        if future := self.__fetching.get(key):
+            return await asyncio.shield(future)
+        future = self.__fetching[key] = asyncio.get_running_loop().create_future()
+        try:
+            value = await factory()
+        except BaseException as e:
+            # 获取的任务被取消时，等待者得到普通的异常而不是随之取消
+            future.set_exception(
+                e if isinstance(e, Exception) else RuntimeError("获取已被取消")
+            )
+            # 没有等待者时避免未取出异常的警告
+            future.exception()
+            raise
+        else:
+            future.set_result(value)
+            if ttl is not None:
+                self.__put(key, value, ttl, sizeof(value))
+            return value
+        finally:
+            del self.__fetching[key]
+
+    def clear_expired(self) -> None:
+        """移除过期的结果"""
+        now = monotonic()
+        for key in [k for k, entry in self.__entries.items() if entry[0] <= now]:
+            self.__pop(key)
+
+    def __put(self, key: Hashable, value: Any, ttl: float, size: int) -> None:
+        if size > self.__max_size:
+            return
+        self.__pop(key)
+        self.__entries[key] = (monotonic() + ttl, size, value)
+        self.__size += size
+        while self.__size > self.__max_size:
+            _, (_, evicted, _) = self.__entries.popitem(last=False)
+            self.__size -= evicted
+
+    def __pop(self, key: Hashable) -> None:
+        if (entry := self.__entries.pop(key, None)) is not None:
+            self.__size -= entry[1]
+
+
 class GroupCache:
-    def __init__(self) -> None:
-        self.__groups: DefaultDict[int, Set[str]] = defaultdict(set)
+    def __init__(self, ttl: float) -> None:
+        self.__ttl = ttl
+        self.__groups: DefaultDict[int, Dict[str, float]] = defaultdict(dict)
+        """{群号: {链接: 过期时间}}
+        """
 
-    def __delete(self, group_id: int, url: str) -> None:
-        if url in self.__groups[group_id]:
-            self.__groups[group_id].remove(url)
+    def __len__(self) -> int:
+        return len(self.__groups)
 
     def check(self, group_id: int, url: str) -> bool:
         """如果URL在里面，返回True
@@ -49,54 +212,79 @@ class GroupCache:
         Returns:
             bool: 如果URL在里面，返回True
         """
-        return url in self.__groups[group_id]
+        if (urls := self.__groups.get(group_id)) is None:
+            return False
+        expire = urls.get(url)
+        return expire is not None and expire > monotonic()
 
     def add(self, group_id: int, url: str) -> bool:
         """如果添加成功，返回True
 
         Args:
-            group_id (int): _description_
-            url (str): _description_
+            group_id (int): 群号
+            url (str): 链接
 
         Returns:
-            bool: _description_
+            bool: 如果添加成功，返回True
         """
-        if url not in self.__groups[group_id]:
-            self.__groups[group_id].add(url)
-            asyncio.get_running_loop().call_later(
-                DEFAULT_CACHE_TIME, self.__delete, group_id, url
-            )
-            return True
-        return False
+        if self.check(group_id=group_id, url=url):
+            return False
+        self.__groups[group_id][url] = monotonic() + self.__ttl
+        return True
+
+    def clear_expired(self) -> None:
+        """移除过期的链接"""
+        now = monotonic()
+        for group_id, urls in list(self.__groups.items()):
+            for url in [url for url, expire in urls.items() if expire <= now]:
+                del urls[url]
+            if not urls:
+                del self.__groups[group_id]
 
 
 class ParserManager:
     def __init__(self) -> None:
         self.__trie: StringTrie[str, Tuple[Callable, str]] = StringTrie()
         self.__default: List[Callable] = []
-        self.__url_cache = GroupCache()
-        self.__result_cache: Dict[str, Tuple[Message, str]] = {}
+        self.__hosts: Set[str] = {urlsplit(url).hostname for url in ALIAS_DOMAIN}
+        """有对应解析的域名
+        """
+        self.__url_cache = GroupCache(ttl=DEFAULT_CACHE_TIME)
+        # 多个群同时发送同一链接时只解析一次
+        self.__result_cache = ResultCache(max_size=MAX_RESULT_CACHE_SIZE)
+        self.__redirect_cache = ResultCache(max_size=MAX_REDIRECT_CACHE_SIZE)
+
+    def __schedule_sweep(self) -> None:
+        if _SWEEP_KEY not in timer_service:
+            timer_service.call_later(_SWEEP_KEY, SWEEP_INTERVAL, self.__sweep)
 
-    def __delete(self, url: str) -> None:
-        if url in self.__result_cache:
-            del self.__result_cache[url]
+    def __sweep(self) -> None:
+        caches = (self.__url_cache, self.__result_cache, self.__redirect_cache)
+        for cache in caches:
+            cache.clear_expired()
+        if any(caches):
+            self.__schedule_sweep()
+
+    @staticmethod
+    async def __run(func: Callable, url: str) -> Tuple[Message, str]:
+        ret, ret_url = await func(url)
+        return Message(ret), ret_url
 
     async def __parser(
         self, func: Callable, ttl: float, url: str, group_id: int
     ) -> Optional[Message]:
-        if cache := self.__result_cache.get(url):
-            ret, ret_url = cache
-        else:
-            try:
-                ret, ret_url = await func(url)
-            except Exception as e:
-                logger.warning(f"解析 url 时发生错误：{e}")
-                traceback.print_exc()
-                return None
-            ret = Message(ret)
-            if ttl is not None:
-                self.__result_cache[url] = (ret, ret_url)
-                asyncio.get_running_loop().call_later(ttl, self.__delete, url)
+        try:
+            ret, ret_url = await self.__result_cache.get(
+                key=(func, url),
+                factory=partial(self.__run, func, url),
+                ttl=ttl,
+                sizeof=_result_size,
+            )
+        except Exception as e:
+            logger.warning(f"解析 url 时发生错误：{e}")
+            traceback.print_exc()
+            return None
+        self.__schedule_sweep()
         # 检测解析后的最终url
         if self.__url_cache.add(group_id=group_id, url=ret_url):
             # 添加输入的url
@@ -112,6 +300,7 @@ class ParserManager:
                 self.__default.append(partial(self.__parser, func=func, ttl=ttl))
             else:
                 for starts_url in startswith:
+                    self.__hosts.add(urlsplit(starts_url).hostname)
                     self.__trie[starts_url] = (
                         partial(self.__parser, func=func, ttl=ttl),
                         task_name,
@@ -119,6 +308,22 @@ class ParserManager:
 
         return add_parser
 
+    def has_parser(self, url: str) -> bool:
+        """链接的域名是否有对应的解析，不检查群是否开启与冷却
+
+        Args:
+            url (str): 链接
+
+        Returns:
+            bool: 有对应的解析时返回True
+        """
+        if self.__default:
+            return True
+        try:
+            return urlsplit(url.replace("\\/", "/")).hostname in self.__hosts
+        except ValueError:
+            return False
+
     async def get_parser(
         self, urls: List[str], group_id: int
     ) -> Set[Callable[[str], Any]]:
@@ -126,10 +331,14 @@ class ParserManager:
         for url in urls:
             url = url.replace("\\/", "/")
             if url.startswith(ALIAS_DOMAIN):
-                url = await get_url(url)
-            url = url.rstrip("&")
-            if url.startswith("http:"):
-                url = url.replace("http:", "https:", 1)
+                url = await self.__redirect_cache.get(
+                    key=url,
+                    factory=partial(get_url, url),
+                    ttl=REDIRECT_CACHE_TIME,
+                    sizeof=len,
+                )
+                self.__schedule_sweep()
+            url = canonical_url(url)
             # cd没过，跳过
             if self.__url_cache.check(group_id=group_id, url=url):
                 continue
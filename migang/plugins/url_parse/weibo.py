@@ -3,9 +3,10 @@ import asyncio
 from typing import Tuple
 
 from nonebot.log import logger
-from nonebot_plugin_htmlrender.browser import get_new_page
 from nonebot.adapters.onebot.v11 import Message, MessageSegment
 
+from migang.utils.render import get_new_page
+
 from .utils import parser_manager
 
 pattern_weibo_com = re.compile(r"https://weibo.com/[0-9]+/([a-zA-Z0-9]+)")
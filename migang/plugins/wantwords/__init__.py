@@ -1,12 +1,13 @@
 import asyncio
 from typing import Annotated
 
-import aiohttp
 from nonebot import on_command
 from nonebot.params import CommandArg
 from nonebot.plugin import PluginMetadata
 from nonebot.adapters.onebot.v11 import Message
 
+from migang.utils.http import http_session
+
 __plugin_meta__ = PluginMetadata(
     name="反向找词",
     description="通过描述反向找词",
@@ -46,7 +47,7 @@ async def _(args: Annotated[Message, CommandArg()]):
     mode = mode_to_params[args[0].lower()]
     description = args[1].strip()
     try:
-        async with aiohttp.ClientSession() as client:
+        async with http_session() as client:
             r = await client.get(
                 api_url.format(target_language=mode[0]),
                 params={"q": description, "m": mode[1], "f": 1},
@@ -2,7 +2,7 @@ import platform
 from pathlib import Path
 from datetime import datetime
 
-from nonebot_plugin_htmlrender import template_to_pic
+from migang.utils.render import template_to_pic
 
 from .config import plugin_config
 from .weather_data import Weather
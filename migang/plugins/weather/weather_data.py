@@ -1,7 +1,9 @@
 import asyncio
 
+from httpx import URL, Response
 from nonebot.log import logger
-from httpx import URL, Response, AsyncClient
+
+from migang.utils.http import http_client
 
 from .utils import get_jwt_token
 from .config import plugin_config
@@ -86,7 +88,7 @@ class Weather:
         if not headers:
             raise ConfigError("请确保已经配置 apikey 或 jwt")
 
-        async with AsyncClient() as client:
+        async with http_client() as client:
             res = await client.get(url, params=params, headers=headers)
         return res
 
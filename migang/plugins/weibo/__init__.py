@@ -9,11 +9,11 @@ from nonebot.permission import SUPERUSER
 from nonebot import get_bot, on_fullmatch
 from nonebot.plugin import PluginMetadata
 from nonebot_plugin_apscheduler import scheduler
-from nonebot_plugin_htmlrender import get_new_page
 from tenacity import RetryError, retry, wait_random, stop_after_attempt
 from nonebot.adapters.onebot.v11 import GROUP, MessageSegment, GroupMessageEvent
 
 from migang.utils.image import pic_to_bytes
+from migang.utils.render import get_new_page
 from migang.utils.file import async_load_data, async_save_data
 from migang.core import (
     TaskItem,
@@ -25,7 +25,9 @@ from migang.core import (
     post_init_manager,
 )
 
+from ._poller import WeiboPoller
 from ._utils import get_image_cqcode
+from ._received import received_weibos
 from .weibo_spider import (
     UserWeiboSpider,
     KeywordWeiboSpider,
@@ -52,9 +54,9 @@ def _load_config():
                 if "format" not in user:
                     user["format"] = cur_format
                 if "keyword" in user:
-                    wb_spider = KeywordWeiboSpider(user)
+                    wb_spider = KeywordWeiboSpider(user, task_name)
                 elif "user_id" in user:
-                    wb_spider = UserWeiboSpider(user)
+                    wb_spider = UserWeiboSpider(user, task_name)
                 task_spider_list.append(wb_spider)
             __plugin_task__.append(
                 TaskItem(
@@ -219,6 +221,7 @@ async def _():
         logger.info("微博推送初始化完成")
     except Exception as e:
         logger.error(f"微博推送初始化异常: {e}")
+    poller.start()
 
 
 @weibo_list.handle()
@@ -332,41 +335,25 @@ async def process_wb(format_: int, wb: Dict):
     return await wb_to_text(wb)
 
 
-interval = 0
-for spiders in tasks_dict.values():
-    interval += 26 * len(spiders)
+async def send_weibos(task: str, weibos: List) -> None:
+    bot = get_bot()
+    if forward_mode:
+        weibos = [
+            MessageSegment.node_custom(bot.self_id, "微博威", weibo) for weibo in weibos
+        ]
+    await broadcast(task_name=task, msg=weibos, forward=forward_mode)
 
 
-@scheduler.scheduled_job("interval", seconds=interval, jitter=10)
-async def _():
-    for task, spiders in tasks_dict.items():
-        weibos = []
-        for spider in spiders:
-            latest_weibos = await spider.get_latest_weibos()
-            format_ = spider.get_format()
-            formatted_weibos = [(await process_wb(format_, wb)) for wb in latest_weibos]
-            if weibo_num := len(formatted_weibos):
-                logger.info(f"成功获取{spider.get_notice_name()}的新微博{weibo_num}条")
-            else:
-                logger.info(f"未检测到{spider.get_notice_name()}的新微博")
-            weibos += formatted_weibos
-        if weibos:
-            bot = get_bot()
-            if forward_mode:
-                weibos = [
-                    MessageSegment.node_custom(bot.self_id, "微博威", weibo)
-                    for weibo in weibos
-                ]
-            await broadcast(task_name=task, msg=weibos, forward=forward_mode)
+# 各账号并发轮询，间隔随发博频率调整，截图与推送不阻塞轮询
+poller = WeiboPoller(render=process_wb, send=send_weibos)
+for task, spiders in tasks_dict.items():
+    for spider in spiders:
+        poller.add(task, spider)
 
 
 @scheduler.scheduled_job("cron", second="0", minute="0", hour="5")
 async def clear_spider_buffer():
-    logger.info("Cleaning weibo spider buffer...")
-    tasks = []
-    for spiders in tasks_dict.values():
-        tasks += [spider.clear_buffer() for spider in spiders]
-    await gather(*tasks)
+    await received_weibos.compact()
 
 
 @scheduler.scheduled_job("cron", second="0", minute="0", hour="4")
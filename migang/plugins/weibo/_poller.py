@@ -0,0 +1,131 @@
+"""微博轮询：各账号按自己的间隔并发轮询，截图与推送在单独的队列中进行
+"""
+import random
+import asyncio
+from typing import Any, Dict, List, Tuple, Callable, Awaitable
+
+from nonebot.log import logger
+
+from migang.core.utils.timer import timer_service
+from migang.core.message.broadcast import RateLimiter
+
+# 同时轮询的账号数
+_MAX_CONCURRENCY = 4
+# 所有账号合计的请求速率（次/秒）与突发容量
+_RATE = 0.5
+_BURST = 3
+# 单个账号的轮询间隔（秒），有新微博时缩短，没有时逐渐拉长
+_MIN_INTERVAL = 60
+_MAX_INTERVAL = 15 * 60
+_INITIAL_INTERVAL = 3 * 60
+_SHRINK = 0.5
+_GROW = 1.2
+# 连续失败时间隔翻倍，最长为该值
+_MAX_BACKOFF = 60 * 60
+# 同时进行截图与推送的数量
+_RENDER_WORKERS = 2
+
+
+class _Account:
+    """一个被轮询的微博账号或关键词"""
+
+    __slots__ = ("key", "task_name", "spider", "interval", "failures")
+
+    def __init__(self, key: Tuple[str, int], task_name: str, spider: Any) -> None:
+        self.key = key
+        self.task_name = task_name
+        self.spider = spider
+        self.interval: float = _INITIAL_INTERVAL
+        self.failures = 0
+
+
+class WeiboPoller:
+    """按账号的发博频率调整轮询间隔，所有账号共用并发数与请求速率"""
+
+    def __init__(
+        self,
+        render: Callable[[int, Dict], Awaitable[Any]],
+        send: Callable[[str, List[Any]], Awaitable[None]],
+    ) -> None:
+        """WeiboPoller构造函数
+
+        Args:
+            render (Callable[[int, Dict], Awaitable[Any]]): 将微博转为消息，参数为格式与微博
+            send (Callable[[str, List[Any]], Awaitable[None]]): 推送消息，参数为任务名与消息
+        """
+        self.__render = render
+        self.__send = send
+        self.__accounts: List[_Account] = []
+        self.__semaphore = asyncio.Semaphore(_MAX_CONCURRENCY)
+        self.__limiter = RateLimiter(rate=_RATE, burst=_BURST)
+        self.__queue: asyncio.Queue[Tuple[_Account, List[Dict]]] = asyncio.Queue()
+        self.__workers: List[asyncio.Task] = []
+
+    def add(self, task_name: str, spider: Any) -> None:
+        """添加需要轮询的spider
+
+        Args:
+            task_name (str): spider所在的推送任务
+            spider (Any): UserWeiboSpider或KeywordWeiboSpider
+        """
+        self.__accounts.append(
+            _Account(("weibo_poll", len(self.__accounts)), task_name, spider)
+        )
+
+    def start(self) -> None:
+        """开始轮询，各账号的首次轮询分散在最短间隔内"""
+        if self.__workers:
+            return
+        self.__workers = [
+            asyncio.create_task(self.__render_worker()) for _ in range(_RENDER_WORKERS)
+        ]
+        timer_service.start()
+        for account in self.__accounts:
+            timer_service.call_later(
+                account.key, random.uniform(0, _MIN_INTERVAL), self.__poll, account
+            )
+
+    def __schedule(self, account: _Account, delay: float) -> None:
+        # 加一点随机，避免各账号的轮询逐渐对齐
+        timer_service.call_later(
+            account.key, delay * random.uniform(0.9, 1.1), self.__poll, account
+        )
+
+    async def __poll(self, account: _Account) -> None:
+        spider = account.spider
+        weibos = None
+        try:
+            async with self.__semaphore:
+                await self.__limiter.acquire()
+                weibos = await spider.get_latest_weibos()
+        finally:
+            if weibos is None:
+                account.failures += 1
+                delay = min(account.interval * 2**account.failures, _MAX_BACKOFF)
+                logger.warning(f"获取{spider.get_notice_name()}的微博失败，{delay:.0f}s后重试")
+            else:
+                account.failures = 0
+                if weibos:
+                    account.interval = max(_MIN_INTERVAL, account.interval * _SHRINK)
+                else:
+                    account.interval = min(_MAX_INTERVAL, account.interval * _GROW)
+                delay = account.interval
+            self.__schedule(account, delay)
+        if weibos:
+            logger.info(f"成功获取{spider.get_notice_name()}的新微博{len(weibos)}条")
+            self.__queue.put_nowait((account, weibos))
+        elif weibos is not None:
+            logger.debug(f"未检测到{spider.get_notice_name()}的新微博")
+
+    async def __render_worker(self) -> None:
+        """截图与推送，不阻塞轮询"""
+        while True:
+            account, weibos = await self.__queue.get()
+            try:
+                format_ = account.spider.get_format()
+                msgs = [await self.__render(format_, wb) for wb in weibos]
+                await self.__send(account.task_name, msgs)
+            except Exception as e:
+                logger.exception(f"推送{account.spider.get_notice_name()}的微博失败：{e}")
+            finally:
+                self.__queue.task_done()
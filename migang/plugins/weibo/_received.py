@@ -0,0 +1,165 @@
+"""已推送微博的记录，所有账号共用一个追加写入的日志文件
+"""
+import asyncio
+from time import time
+from pathlib import Path
+from typing import Any, Dict, List, Tuple, Iterable
+
+import anyio
+import ujson as json
+from nonebot.log import logger
+
+from migang.core import DATA_PATH
+from migang.core.utils.file_operation import async_atomic_write
+
+# 记录保留的时间（秒），需长于爬虫判定为新微博的时间（24小时）
+_RETENTION = 7 * 24 * 60 * 60
+
+
+def _dumps(lines: List[List[Any]]) -> str:
+    return "".join(
+        json.dumps(line, ensure_ascii=False, escape_forward_slashes=False) + "\n"
+        for line in lines
+    )
+
+
+class ReceivedWeibos:
+    """按(账号, bid)记录已推送的微博，插入顺序即时间顺序，过期的记录从头部移除
+
+    日志每行为[时间, 账号, bid]，bid为null的行表示账号已初始化
+    """
+
+    def __init__(self, file: Path, retention: float) -> None:
+        """ReceivedWeibos构造函数
+
+        Args:
+            file (Path): 日志文件
+            retention (float): 记录保留的时间
+        """
+        self.__file = file
+        self.__retention = retention
+        self.__records: Dict[Tuple[str, str], float] = {}
+        """{(账号, bid): 时间}
+        """
+        self.__scopes: Dict[str, float] = {}
+        """{已初始化的账号: 时间}
+        """
+        self.__pending: List[List[Any]] = []
+        """尚未写入日志的行
+        """
+        self.__lock = asyncio.Lock()
+        self.__loaded = False
+
+    def __contains__(self, key: Tuple[str, str]) -> bool:
+        return key in self.__records
+
+    def add(self, scope: str, bid: str) -> None:
+        """记录微博，调用flush后写入日志
+
+        Args:
+            scope (str): 账号
+            bid (str): 微博bid
+        """
+        if (scope, bid) in self.__records:
+            return
+        now = time()
+        self.__records[(scope, bid)] = now
+        self.__pending.append([now, scope, bid])
+
+    async def flush(self) -> None:
+        """将新增的记录追加到日志"""
+        if not self.__pending:
+            return
+        lines = _dumps(self.__pending)
+        self.__pending.clear()
+        async with self.__lock:
+            async with await anyio.open_file(self.__file, "a", encoding="utf-8") as f:
+                await f.write(lines)
+
+    async def register(self, scope: str, legacy: Iterable[str] = ()) -> bool:
+        """载入日志并登记账号
+
+        Args:
+            scope (str): 账号
+            legacy (Iterable[str], optional): 旧版本记录的bid，账号首次登记时导入. Defaults to ().
+
+        Returns:
+            bool: 账号此前已登记时为True
+        """
+        await self.load()
+        if scope in self.__scopes:
+            return True
+        now = self.__scopes[scope] = time()
+        self.__pending.append([now, scope, None])
+        for bid in legacy:
+            self.add(scope, bid)
+        await self.flush()
+        return False
+
+    async def load(self) -> None:
+        """从硬盘载入日志，只在首次调用时读取，过期的记录超过一半时重写"""
+        async with self.__lock:
+            if self.__loaded:
+                return
+            self.__loaded = True
+            self.__file.parent.mkdir(parents=True, exist_ok=True)
+            if not self.__file.exists():
+                return
+            total = 0
+            async with await anyio.open_file(self.__file, "r", encoding="utf-8") as f:
+                async for line in f:
+                    try:
+                        checked, scope, bid = json.loads(line)
+                    except ValueError:
+                        # 写到一半时进程退出留下的行
+                        continue
+                    total += 1
+                    if bid is None:
+                        self.__scopes[scope] = checked
+                    else:
+                        self.__records.setdefault((scope, bid), checked)
+        if self.__expire() * 2 > total:
+            await self.compact()
+
+    async def compact(self) -> None:
+        """移除过期的记录并重写日志"""
+        await self.load()
+        self.__expire()
+        async with self.__lock:
+            self.__pending.clear()
+            await async_atomic_write(
+                self.__file,
+                _dumps(
+                    [[checked, scope, None] for scope, checked in self.__scopes.items()]
+                    + [
+                        [checked, scope, bid]
+                        for (scope, bid), checked in self.__records.items()
+                    ]
+                ),
+            )
+        logger.info(f"微博推送记录已整理，共 {len(self.__records)} 条")
+
+    def __expire(self) -> int:
+        """移除过期的记录
+
+        Returns:
+            int: 移除的数量
+        """
+        deadline = time() - self.__retention
+        expired = 0
+        # 记录按时间顺序插入，过期的记录都在头部
+        for checked in self.__records.values():
+            if checked >= deadline:
+                break
+            expired += 1
+        if expired:
+            for key in list(self.__records)[:expired]:
+                del self.__records[key]
+        return expired
+
+
+received_weibos = ReceivedWeibos(
+    file=DATA_PATH / "weibo" / "received_weibos.log", retention=_RETENTION
+)
+"""已推送微博的记录
+"""
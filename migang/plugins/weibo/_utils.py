@@ -2,11 +2,12 @@ import re
 import asyncio
 from typing import Optional
 
-import aiohttp
 from yarl import URL
 from nonebot.log import logger
 from nonebot.adapters.onebot.v11 import MessageSegment
 
+from migang.utils.http import http_session
+
 # ref: https://github.com/DIYgod/RSSHub/blob/5c7aff76a3a90d6ac5d5e7e139bc182c9c147cb6/lib/v2/weibo/utils.js#L425
 sinaimgwx_pattern = re.compile(r"(?<=\/\/)wx(?=[1-4]\.sinaimg\.cn\/)", re.I)
 
@@ -18,7 +19,7 @@ def sinaimgtvax(url) -> str:
 # https://github.com/Quan666/ELF_RSS/blob/5e3fde857b4bed0297a0bcd4c9a59c2f5ea724c6/src/plugins/ELF_RSS2/parsing/handle_images.py#L160
 async def download_image(url: str) -> Optional[bytes]:
     for _ in range(5):
-        async with aiohttp.ClientSession(raise_for_status=True) as session:
+        async with http_session(raise_for_status=True) as session:
             referer = f"{URL(url).scheme}://{URL(url).host}/"
             headers = {"referer": referer}
             try:
@@ -14,10 +14,11 @@ from lxml import etree
 from nonebot.log import logger
 from fake_useragent import UserAgent
 
+from migang.utils.http import http_session
 from migang.core import DATA_PATH, get_config
-from migang.utils.file import async_save_data
 
 from ._utils import sinaimgtvax
+from ._received import received_weibos
 from .exception import ParseError, NotFoundError
 
 api_url = "https://m.weibo.cn/api/container/getIndex"
@@ -82,6 +83,7 @@ class BaseWeiboSpider:
         filter_words: bool,
         format_: int,
         unique_id: str,
+        task_name: str,
         referer: Optional[str] = None,
         user_id: Optional[int] = None,
     ):
@@ -101,9 +103,10 @@ class BaseWeiboSpider:
         self.__init = False
         self.__user_id = user_id
 
+        # 旧版本按账号保存的记录，首次载入时导入
         self.__record_file_path = weibo_record_path / f"{unique_id}.json"
-
-        self.__received_weibo_ids: List[str] = []
+        # 同一账号在不同推送组中分别记录
+        self.__record_scope = f"{task_name}/{unique_id}"
 
     @abstractmethod
     def get_notice_name(self) -> str:
@@ -117,7 +120,7 @@ class BaseWeiboSpider:
         """
         获取网页中json数据
         """
-        async with aiohttp.ClientSession(json_serialize=json.dumps) as client:
+        async with http_session(json_serialize=json.dumps) as client:
             for i in range(5):
                 try:
                     r = await client.get(
@@ -300,14 +303,16 @@ class BaseWeiboSpider:
             if not _cookie_warning_printed:
                 logger.warning("微博插件未配置cookie，将尝试使用临时cookie（可能很快失效）。建议在配置中添加有效的cookie。")
                 _cookie_warning_printed = True
-            async with aiohttp.ClientSession() as client:
+            async with http_session() as client:
                 await self._refresh_global_cookie(client)
 
-        self.__received_weibo_ids = await async_load_data(self.__record_file_path)
-        if not self.__record_file_path.exists():
+        if self.__record_file_path.exists():
+            await received_weibos.register(
+                self.__record_scope, await async_load_data(self.__record_file_path)
+            )
+        elif not await received_weibos.register(self.__record_scope):
+            # 首次订阅时只记录已有的微博，不推送
             await self.get_latest_weibos()
-            if not self.__received_weibo_ids:
-                await self.save()
         self.__init = False
 
     def get_format(self):
@@ -316,18 +321,6 @@ class BaseWeiboSpider:
         """
         return self.__format
 
-    async def save(self):
-        await async_save_data(self.__received_weibo_ids, self.__record_file_path)
-
-    async def clear_buffer(self):
-        """
-        如果清理缓存前一分钟，该微博账号瞬间发送了 20 条微博
-        然后清理缓存仅仅保留后 10 条的微博id，因此可能会重复推送前 10 条微博
-        当然这种情况通常不会发生
-        """
-        self.__received_weibo_ids = self.__received_weibo_ids[-20:]
-        await self.save()
-
     def get_pics(self, weibo_info):
         """获取微博原始图片url"""
         if weibo_info.get("pics"):
@@ -480,12 +473,11 @@ class BaseWeiboSpider:
     async def get_long_weibo(self, id_):
         """获取长微博"""
         url = f"https://m.weibo.cn/detail/{id_}"
-        import aiohttp
 
         for i in range(5):
             try:
                 await asyncio.sleep(random.uniform(1.0, 2.5))
-                async with aiohttp.ClientSession() as client:
+                async with http_session() as client:
                     resp = await client.get(
                         url, headers=self.__headers, timeout=20, ssl=False
                     )
@@ -553,11 +545,14 @@ class BaseWeiboSpider:
             logger.exception(e)
             self.__recent = False
 
-    async def get_latest_weibos(self):
+    async def get_latest_weibos(self) -> Optional[List[Dict]]:
+        """获取新微博，请求失败时返回None"""
         try:
             latest_weibos = []
             js = await self.get_weibo_json()
-            if js and js["ok"]:
+            if js is None:
+                return None
+            if js["ok"]:
                 weibos = js["data"]["cards"]
                 for w in weibos:
                     if (
@@ -566,7 +561,8 @@ class BaseWeiboSpider:
                             self.__user_id is None
                             or w["mblog"]["user"]["id"] == self.__user_id
                         )
-                        and w["mblog"]["bid"] not in self.__received_weibo_ids
+                        and (self.__record_scope, w["mblog"]["bid"])
+                        not in received_weibos
                     ):
                         wb = await self.get_one_weibo(w)
                         if wb:
@@ -576,9 +572,9 @@ class BaseWeiboSpider:
                                 if word in wb["text"] or (
                                     "retweet" in wb and word in wb["retweet"]
                                 ):
-                                    self.__received_weibo_ids.append(wb["bid"])
+                                    received_weibos.add(self.__record_scope, wb["bid"])
                                     break
-                            if wb["bid"] in self.__received_weibo_ids:
+                            if (self.__record_scope, wb["bid"]) in received_weibos:
                                 continue
                             if (not self.__filter_retweet) or ("retweet" not in wb):
                                 wb["pics"] = list(map(sinaimgtvax, wb["pics"]))
@@ -586,18 +582,17 @@ class BaseWeiboSpider:
                                     map(sinaimgtvax, wb["video_poster_url"])
                                 )
                                 latest_weibos.append(wb)
-                                self.__received_weibo_ids.append(wb["bid"])
+                                received_weibos.add(self.__record_scope, wb["bid"])
                                 # self.print_weibo(wb)
-            if latest_weibos:
-                await self.save()
+            await received_weibos.flush()
             return latest_weibos
         except Exception as e:
             logger.exception(e)
-            return []
+            return None
 
 
 class UserWeiboSpider(BaseWeiboSpider):
-    def __init__(self, config: Dict[str, Any]):
+    def __init__(self, config: Dict[str, Any], task_name: str):
         """Weibo类初始化"""
         self.validate_config(config)
         self.__user_name = config["user_id"]
@@ -613,6 +608,7 @@ class UserWeiboSpider(BaseWeiboSpider):
             filter_words=config["filter_words"],
             format_=config["format"],
             unique_id=f"user_{self.__user_id}",
+            task_name=task_name,
             referer=f"https://m.weibo.cn/u/{config['user_id']}",
             user_id=int(config["user_id"]),
         )
@@ -663,7 +659,7 @@ class UserWeiboSpider(BaseWeiboSpider):
 
 
 class KeywordWeiboSpider(BaseWeiboSpider):
-    def __init__(self, config: Dict[str, Any]):
+    def __init__(self, config: Dict[str, Any], task_name: str):
         self.validate_config(config)
         self.__keyword = config["keyword"]
         self.__notice_name = f"包含关键词：{self.__keyword}"
@@ -676,6 +672,7 @@ class KeywordWeiboSpider(BaseWeiboSpider):
             filter_words=config["filter_words"],
             format_=config["format"],
             unique_id=f"keyword_{self.__keyword}",
+            task_name=task_name,
             referer=f"https://m.weibo.cn/p/searchall?{urlencode({'containerid':f'100103type=1&q={self.__keyword}'})}",
         )
 
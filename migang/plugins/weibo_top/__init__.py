@@ -12,7 +12,7 @@ from migang.utils.text import is_number
 from .data_source import get_wbtop, gen_wbtop_pic
 
 require("nonebot_plugin_htmlrender")
-from nonebot_plugin_htmlrender import get_new_page
+from migang.utils.render import get_new_page
 
 __plugin_meta__ = PluginMetadata(
     name="微博热搜",
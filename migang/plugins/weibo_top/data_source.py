@@ -10,6 +10,7 @@ from pil_utils import BuildImage
 from nonebot.adapters.onebot.v11 import MessageSegment
 
 from migang.core import FONT_PATH
+from migang.utils.http import http_session
 from migang.core.utils.image import getsize
 
 banner_path = Path(__file__).parent / "image" / "webtop.png"
@@ -22,7 +23,7 @@ async def get_wbtop(url: str) -> Tuple[Union[dict, str], int]:
     for i in range(3):
         try:
             data = []
-            async with aiohttp.ClientSession() as client:
+            async with http_session() as client:
                 get_response = await client.get(url, timeout=20)
                 if get_response.status == 200:
                     try:
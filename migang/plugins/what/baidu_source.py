@@ -1,15 +1,15 @@
 from typing import Tuple
 
 import ujson
-import aiohttp
 
 from migang.core import get_config
+from migang.utils.http import http_session
 
 api_url = "https://api.a20safe.com/api.php"
 
 
 async def get_baidu(keyword: str) -> Tuple[str, str, str]:
-    async with aiohttp.ClientSession(json_serialize=ujson.dumps) as client:
+    async with http_session(json_serialize=ujson.dumps) as client:
         r = await client.get(
             api_url,
             params={
@@ -3,9 +3,10 @@ from pathlib import Path
 from typing import Tuple, Union
 
 from thefuzz import fuzz
-from nonebot_plugin_htmlrender import template_to_pic
 from nonebot.adapters.onebot.v11 import Message, MessageSegment
 
+from migang.utils.render import template_to_pic
+
 from .jiki_source import get_jiki
 from .baidu_source import get_baidu
 from .moegirl_source import get_moegirl
@@ -1,9 +1,10 @@
 import re
 from typing import List, Tuple
 
-import aiohttp
 from nonebot.log import logger
 
+from migang.utils.http import http_session
+
 GARLAND = "https://ffxiv.cyanclay.xyz"
 
 CAFEMAKER = "https://cafemaker.wakingsands.com"
@@ -44,7 +45,7 @@ async def gt_core(key: str, lang: str):
     global GT_CORE_DATA_CN, GT_CORE_DATA_GLOBAL
     if lang == "chs":
         if GT_CORE_DATA_CN is None:
-            async with aiohttp.ClientSession() as client:
+            async with http_session() as client:
                 GT_CORE_DATA_CN = await client.get(
                     craft_garland_url("core", "data", "chs"), timeout=3
                 )
@@ -52,7 +53,7 @@ async def gt_core(key: str, lang: str):
         GT_CORE_DATA = GT_CORE_DATA_CN
     else:
         if GT_CORE_DATA_GLOBAL is None:
-            async with aiohttp.ClientSession() as client:
+            async with http_session() as client:
                 GT_CORE_DATA_GLOBAL = await client.get(
                     craft_garland_url("core", "data", "en"), timeout=3
                 )
@@ -69,7 +70,7 @@ async def parse_item_garland(item_id, name_lang):
         name_lang = "chs"
     img_urls = []
 
-    async with aiohttp.ClientSession() as client:
+    async with http_session() as client:
         j = await client.get(craft_garland_url("item", item_id, name_lang), timeout=3)
         j = await j.json(content_type=None)
 
@@ -389,7 +390,7 @@ async def get_xivapi_item(item_name, name_lang=""):
     url = api_base + "/search?indexes=Item&string=" + item_name
     if name_lang:
         url = url + "&language=" + name_lang
-    async with aiohttp.ClientSession() as client:
+    async with http_session() as client:
         r = await client.get(url, timeout=3)
         j = await r.json(content_type=None)
     return j, url
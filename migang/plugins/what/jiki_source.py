@@ -1,8 +1,9 @@
 from typing import Tuple
 
-import httpx
 from thefuzz import fuzz
 
+from migang.utils.http import http_client
+
 url = "https://api.jikipedia.com/go/search_entities"
 header = {
     "user-agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/102.0.0.0 Safari/537.36",
@@ -15,7 +16,7 @@ header = {
 
 
 async def get_jiki(keyword: str) -> Tuple[str, str, str]:
-    async with httpx.AsyncClient() as client:
+    async with http_client() as client:
         resp = await client.post(
             url=url,
             headers=header,
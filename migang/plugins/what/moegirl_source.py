@@ -1,11 +1,12 @@
 from typing import Tuple
 
-import aiohttp
 from lxml import etree
 
+from migang.utils.http import http_session
+
 
 async def get_moegirl(keyword: str) -> Tuple[str, str, str]:
-    async with aiohttp.ClientSession() as client:
+    async with http_session() as client:
         r = await client.get(
             "https://zh.moegirl.org.cn/api.php",
             params={"action": "opensearch", "search": keyword},
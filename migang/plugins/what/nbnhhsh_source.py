@@ -1,15 +1,16 @@
 from typing import Tuple
 
 import ujson
-import aiohttp
 from thefuzz import fuzz
 
+from migang.utils.http import http_session
+
 
 async def get_nbnhhsh(keyword: str) -> Tuple[str, str, str]:
     url = "https://lab.magiconch.com/api/nbnhhsh/guess"
     headers = {"referer": "https://lab.magiconch.com/nbnhhsh/"}
     data = {"text": keyword}
-    async with aiohttp.ClientSession(json_serialize=ujson.dumps) as client:
+    async with http_session(json_serialize=ujson.dumps) as client:
         resp = await client.post(url=url, headers=headers, json=data, timeout=5)
         res = await resp.json()
     title = ""
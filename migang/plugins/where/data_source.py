@@ -1,6 +1,6 @@
-import aiohttp
 from nonebot.log import logger
 
+from migang.utils.http import http_session
 from migang.core import get_config, post_init_manager
 
 BAIDU_AK = ""
@@ -21,7 +21,7 @@ async def get_location(query: str, tag: str, region: str) -> str:
         "output": "json",
         "ak": BAIDU_AK,
     }
-    async with aiohttp.ClientSession() as session:
+    async with http_session() as session:
         r = await session.get(BASE_API, params=params)
         rjson = await r.json(content_type=None)
         data = rjson.get("results")
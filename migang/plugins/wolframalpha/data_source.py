@@ -1,14 +1,15 @@
-import aiohttp
 from nonebot.log import logger
 from nonebot.adapters.onebot.v11 import MessageSegment
 
+from migang.utils.http import http_session
+
 
 async def get_wolframalpha_simple(input_: str, appid: str):
     params = {"input": input_, "appid": appid}
     url = "https://api.wolframalpha.com/v2/simple"
 
     try:
-        async with aiohttp.ClientSession() as client:
+        async with http_session() as client:
             resp = await client.get(url, params=params, timeout=10)
             if resp.status == 501:
                 return "wolframalpha无法理解你的问题..."
@@ -2,7 +2,6 @@ import random
 from time import time
 from pathlib import Path
 
-import aiohttp
 from nonebot import get_bot
 from nonebot.log import logger
 from nonebot.plugin import PluginMetadata
@@ -10,6 +9,7 @@ from nonebot_plugin_apscheduler import scheduler
 from nonebot.adapters.onebot.v11 import MessageSegment
 
 from migang.core import TaskItem, broadcast
+from migang.utils.http import http_session
 
 __plugin_hidden__ = True
 __plugin_meta__ = PluginMetadata(
@@ -52,7 +52,7 @@ async def get_moring_message() -> str:
     for i in range(3):
         try:
             # 获得不同的问候语
-            async with aiohttp.ClientSession() as client:
+            async with http_session() as client:
                 r = await client.get(
                     f"https://timor.tech/api/holiday/tts?t={int(time())}",
                     timeout=7,
@@ -1,3 +1,4 @@
 from .playwright import screenshot  # noqa
 from .download import async_download_files  # noqa
 from .bilibili_wbi import get_signed_params  # noqa
+from .client import http_client, http_session  # noqa
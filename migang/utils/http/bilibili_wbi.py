@@ -7,7 +7,7 @@ from hashlib import md5
 from functools import reduce
 from typing import Any, Dict
 
-import aiohttp
+from .client import http_session
 
 mixinKeyEncTab = [
     46,
@@ -101,7 +101,7 @@ def encWbi(params: dict, img_key: str, sub_key: str):
 
 async def getWbiKeys() -> tuple[str, str]:
     "获取最新的 img_key 和 sub_key"
-    async with aiohttp.ClientSession() as client:
+    async with http_session() as client:
         resp = await client.get("https://api.bilibili.com/x/web-interface/nav")
         resp.raise_for_status()
         json_content = await resp.json()
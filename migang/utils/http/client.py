@@ -0,0 +1,153 @@
+"""共享的HTTP连接池，各插件复用同一组连接，省去每次请求的DNS解析与TCP/TLS握手
+"""
+from ssl import SSLContext
+from contextlib import asynccontextmanager
+from typing import Dict, Optional, AsyncIterator
+
+import httpx
+import aiohttp
+from nonebot import get_driver
+from httpx._config import create_ssl_context
+from httpx._utils import get_environment_proxies
+
+# 连接池大小
+_LIMIT = 100
+_LIMIT_PER_HOST = 10
+_KEEPALIVE_TIMEOUT = 30
+_DNS_CACHE_TTL = 300
+# httpx在建立连接失败时的重试次数
+_RETRIES = 2
+# 决定httpx连接方式的参数，指定后无法共用连接池
+_TRANSPORT_KWARGS = ("verify", "cert", "http1", "http2", "limits", "proxy", "transport")
+
+_connector: Optional[aiohttp.TCPConnector] = None
+_transport: Optional["_SharedTransport"] = None
+_proxy_mounts: Optional[Dict[str, Optional["_SharedTransport"]]] = None
+"""按环境变量中的代理创建的transport，指定transport后httpx不再读取环境变量
+"""
+_ssl_context: Optional[SSLContext] = None
+
+
+def _get_ssl_context() -> SSLContext:
+    global _ssl_context
+    if _ssl_context is None:
+        # 与init/ssl_fix保持一致
+        _ssl_context = create_ssl_context()
+        _ssl_context.set_ciphers("DEFAULT")
+    return _ssl_context
+
+
+class _SharedTransport(httpx.AsyncBaseTransport):
+    """各AsyncClient共用的transport，客户端关闭时不关闭连接池"""
+
+    def __init__(self, proxy: Optional[str] = None) -> None:
+        self.__transport = httpx.AsyncHTTPTransport(
+            verify=_get_ssl_context(),
+            proxy=proxy,
+            retries=_RETRIES,
+            limits=httpx.Limits(
+                max_connections=_LIMIT,
+                max_keepalive_connections=_LIMIT // 2,
+                keepalive_expiry=_KEEPALIVE_TIMEOUT,
+            ),
+        )
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        return await self.__transport.handle_async_request(request)
+
+    async def aclose(self) -> None:
+        pass
+
+    async def close(self) -> None:
+        await self.__transport.aclose()
+
+
+def get_connector() -> aiohttp.TCPConnector:
+    """获取共享的aiohttp连接池，自带DNS缓存与单host连接数限制"""
+    global _connector
+    if _connector is None or _connector.closed:
+        _connector = aiohttp.TCPConnector(
+            limit=_LIMIT,
+            limit_per_host=_LIMIT_PER_HOST,
+            keepalive_timeout=_KEEPALIVE_TIMEOUT,
+            ttl_dns_cache=_DNS_CACHE_TTL,
+        )
+    return _connector
+
+
+def get_transport() -> httpx.AsyncBaseTransport:
+    """获取共享的httpx连接池"""
+    global _transport
+    if _transport is None:
+        _transport = _SharedTransport()
+    return _transport
+
+
+def _get_proxy_mounts() -> Dict[str, Optional[httpx.AsyncBaseTransport]]:
+    """HTTP(S)_PROXY、ALL_PROXY与NO_PROXY对应的mounts，值为None的地址不走代理"""
+    global _proxy_mounts
+    if _proxy_mounts is None:
+        _proxy_mounts = {
+            pattern: None if proxy is None else _SharedTransport(proxy=proxy)
+            for pattern, proxy in get_environment_proxies().items()
+        }
+    return _proxy_mounts
+
+
+@asynccontextmanager
+async def http_session(**kwargs) -> AsyncIterator[aiohttp.ClientSession]:
+    """用法与aiohttp.ClientSession相同，连接来自共享连接池
+
+    cookie等会话状态只在with块内有效，退出时不会关闭连接；
+    与http_client不同，连接失败时不会重试
+
+    Args:
+        **kwargs: aiohttp.ClientSession的参数，不可指定connector
+    """
+    async with aiohttp.ClientSession(
+        connector=get_connector(), connector_owner=False, **kwargs
+    ) as session:
+        yield session
+
+
+@asynccontextmanager
+async def http_client(**kwargs) -> AsyncIterator[httpx.AsyncClient]:
+    """用法与httpx.AsyncClient相同，连接来自共享连接池，建立连接失败时会重试
+
+    cookie等会话状态只在with块内有效，退出时不会关闭连接；
+    指定verify、cert、http1、http2、limits、proxy或transport时使用单独的连接，随客户端关闭
+
+    Args:
+        **kwargs: httpx.AsyncClient的参数
+    """
+    if any(kwargs.get(key) is not None for key in _TRANSPORT_KWARGS):
+        kwargs.setdefault("verify", _get_ssl_context())
+        async with httpx.AsyncClient(**kwargs) as client:
+            yield client
+        return
+    if kwargs.get("trust_env", True):
+        kwargs["mounts"] = {**_get_proxy_mounts(), **(kwargs.get("mounts") or {})}
+    async with httpx.AsyncClient(transport=get_transport(), **kwargs) as client:
+        yield client
+
+
+@get_driver().on_startup
+async def _():
+    get_connector()
+    get_transport()
+
+
+@get_driver().on_shutdown
+async def _():
+    global _connector, _transport, _proxy_mounts
+    if _connector is not None:
+        await _connector.close()
+        _connector = None
+    if _transport is not None:
+        await _transport.close()
+        _transport = None
+    if _proxy_mounts is not None:
+        for transport in _proxy_mounts.values():
+            if transport is not None:
+                await transport.close()
+        _proxy_mounts = None
@@ -8,6 +8,8 @@ from nonebot.log import logger
 from fake_useragent import UserAgent
 from tenacity import retry, wait_random, stop_after_attempt
 
+from .client import http_session
+
 
 async def async_download_files(
     urls: Union[Iterable[str], str],
@@ -84,7 +86,7 @@ async def async_download_files(
         logger.info(f"{url} 已下载至 {file}")
 
     count = 0
-    async with aiohttp.ClientSession() as client:
+    async with http_session() as client:
         for i, e in enumerate(
             await asyncio.gather(
                 *[
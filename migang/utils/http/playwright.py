@@ -2,7 +2,8 @@ from pathlib import Path
 from typing import Dict, List, Union, Literal, Optional
 
 from nonebot.log import logger
-from nonebot_plugin_htmlrender import get_new_page
+
+from migang.utils.render import get_new_page
 
 
 # zhenxun_bot
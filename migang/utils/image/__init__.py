@@ -3,6 +3,7 @@ from io import BytesIO
 
 from PIL import Image
 
+from migang.core.utils.avatar import avatar_store  # noqa
 from migang.core.utils.image import get_user_avatar  # noqa
 
 
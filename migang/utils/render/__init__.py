@@ -0,0 +1,2 @@
+from .pool import Priority, render_pool, get_new_page  # noqa
+from .html import md_to_pic, html_to_pic, text_to_pic, template_to_pic  # noqa
@@ -0,0 +1,261 @@
+"""与nonebot_plugin_htmlrender用法相同的渲染函数，页面来自页面池
+"""
+from os import getcwd
+from typing import Any, Dict, Tuple, Union, Literal, Callable, Optional
+
+import jinja2
+import markdown
+from nonebot import require
+from nonebot.log import logger
+
+from .pool import Priority, render_pool
+
+require("nonebot_plugin_htmlrender")
+# data_source不属于公开接口，模板文件名也随版本变化，依赖已限定为0.4.x
+from nonebot_plugin_htmlrender.data_source import (
+    TEMPLATES_PATH,
+    env,
+    read_tpl,
+    read_file,
+)
+
+_template_envs: Dict[
+    Tuple[str, Tuple[Tuple[str, Callable], ...]], jinja2.Environment
+] = {}
+"""{(模板路径, 过滤器): Environment}，模板只在第一次使用时读取与编译
+"""
+
+
+def _get_template_env(
+    template_path: str, filters: Optional[Dict[str, Callable]]
+) -> jinja2.Environment:
+    key = (template_path, tuple(sorted((filters or {}).items())))
+    if (template_env := _template_envs.get(key)) is None:
+        template_env = _template_envs[key] = jinja2.Environment(
+            loader=jinja2.FileSystemLoader(template_path),
+            enable_async=True,
+        )
+        if filters:
+            template_env.filters.update(filters)
+    return template_env
+
+
+async def html_to_pic(
+    html: str,
+    wait: int = 0,
+    template_path: str = f"file://{getcwd()}",
+    type: Literal["jpeg", "png"] = "png",
+    quality: Union[int, None] = None,
+    device_scale_factor: float = 2,
+    screenshot_timeout: Optional[float] = 30_000,
+    priority: Optional[Priority] = None,
+    **kwargs: Any,
+) -> bytes:
+    """html转图片，同一template_path与页面参数的渲染复用同一页面
+
+    Args:
+        html (str): html文本
+        wait (int, optional): 等待时间. Defaults to 0.
+        template_path (str, optional): 模板路径 如 "file:///path/to/template/"
+        type (Literal["jpeg", "png"]): 图片类型, 默认 png
+        quality (int, optional): 图片质量 0-100 当为`png`时无效
+        device_scale_factor (float, optional): 缩放比例. Defaults to 2.
+        screenshot_timeout (float, optional): 截图超时时间，默认30000ms
+        priority (Optional[Priority], optional): 渲染优先级. Defaults to None.
+        **kwargs: 传入 page 的参数
+
+    Returns:
+        bytes: 图片, 可直接发送
+    """
+    if "file:" not in template_path:
+        raise Exception("template_path 应该为 file:///path/to/template")
+    viewport = kwargs.pop("viewport", None)
+    async with render_pool.page(
+        key=template_path,
+        viewport=viewport,
+        priority=priority,
+        device_scale_factor=device_scale_factor,
+        **kwargs,
+    ) as page:
+        # 复用的页面已位于template_path下
+        if page.url == "about:blank":
+            page.on("console", lambda msg: logger.debug(f"浏览器控制台: {msg.text}"))
+            await page.goto(template_path)
+        await page.set_content(html, wait_until="networkidle")
+        if wait:
+            await page.wait_for_timeout(wait)
+        return await page.screenshot(
+            full_page=True,
+            type=type,
+            quality=quality,
+            timeout=screenshot_timeout,
+        )
+
+
+async def template_to_pic(
+    template_path: str,
+    template_name: str,
+    templates: Dict[Any, Any],
+    filters: Optional[Dict[str, Any]] = None,
+    pages: Optional[Dict[Any, Any]] = None,
+    wait: int = 0,
+    type: Literal["jpeg", "png"] = "png",
+    quality: Union[int, None] = None,
+    device_scale_factor: float = 2,
+    screenshot_timeout: Optional[float] = 30_000,
+    priority: Optional[Priority] = None,
+) -> bytes:
+    """使用jinja2模板引擎通过html生成图片
+
+    Args:
+        template_path (str): 模板路径
+        template_name (str): 模板名
+        templates (Dict[Any, Any]): 模板内参数 如: {"name": "abc"}
+        filters (Optional[Dict[str, Any]]): 自定义过滤器
+        pages (Optional[Dict[Any, Any]]): 网页参数. Defaults to
+            {"base_url": f"file://{getcwd()}", "viewport": {"width": 500, "height": 10}}
+        wait (int, optional): 网页载入等待时间. Defaults to 0.
+        type (Literal["jpeg", "png"]): 图片类型, 默认 png
+        quality (int, optional): 图片质量 0-100 当为`png`时无效
+        device_scale_factor (float, optional): 缩放比例. Defaults to 2.
+        screenshot_timeout (float, optional): 截图超时时间，默认30000ms
+        priority (Optional[Priority], optional): 渲染优先级. Defaults to None.
+
+    Returns:
+        bytes: 图片 可直接发送
+    """
+    if pages is None:
+        pages = {
+            "viewport": {"width": 500, "height": 10},
+            "base_url": f"file://{getcwd()}",
+        }
+    template = _get_template_env(str(template_path), filters).get_template(
+        template_name
+    )
+    return await html_to_pic(
+        template_path=f"file://{template_path}",
+        html=await template.render_async(**templates),
+        wait=wait,
+        type=type,
+        quality=quality,
+        device_scale_factor=device_scale_factor,
+        screenshot_timeout=screenshot_timeout,
+        priority=priority,
+        **pages,
+    )
+
+
+async def md_to_pic(
+    md: str = "",
+    md_path: str = "",
+    css_path: str = "",
+    width: int = 500,
+    type: Literal["jpeg", "png"] = "png",
+    quality: Union[int, None] = None,
+    device_scale_factor: float = 2,
+    screenshot_timeout: Optional[float] = 30_000,
+    priority: Optional[Priority] = None,
+) -> bytes:
+    """markdown 转 图片
+
+    Args:
+        md (str, optional): markdown 格式文本
+        md_path (str, optional): markdown 文件路径
+        css_path (str,  optional): css文件路径. Defaults to None.
+        width (int, optional): 图片宽度，默认为 500
+        type (Literal["jpeg", "png"]): 图片类型, 默认 png
+        quality (int, optional): 图片质量 0-100 当为`png`时无效
+        device_scale_factor (float, optional): 缩放比例. Defaults to 2.
+        screenshot_timeout (float, optional): 截图超时时间，默认30000ms
+        priority (Optional[Priority], optional): 渲染优先级. Defaults to None.
+
+    Returns:
+        bytes: 图片, 可直接发送
+    """
+    template = env.get_template("markdown.html")
+    if not md:
+        if md_path:
+            md = await read_file(md_path)
+        else:
+            raise Exception("必须输入 md 或 md_path")
+    md = markdown.markdown(
+        md,
+        extensions=[
+            "pymdownx.tasklist",
+            "tables",
+            "fenced_code",
+            "codehilite",
+            "mdx_math",
+            "pymdownx.tilde",
+        ],
+        extension_configs={"mdx_math": {"enable_dollar_delimiter": True}},
+    )
+    extra = ""
+    if "math/tex" in md:
+        katex_css = await read_tpl("katex/katex.min.b64_fonts.css")
+        katex_js = await read_tpl("katex/katex.min.js")
+        mhchem_js = await read_tpl("katex/mhchem.min.js")
+        mathtex_js = await read_tpl("katex/mathtex-script-type.min.js")
+        extra = (
+            f'<style type="text/css">{katex_css}</style>'
+            f"<script defer>{katex_js}</script>"
+            f"<script defer>{mhchem_js}</script>"
+            f"<script defer>{mathtex_js}</script>"
+        )
+    if css_path:
+        css = await read_file(css_path)
+    else:
+        css = await read_tpl("github-markdown-light.css") + await read_tpl(
+            "pygments-default.css",
+        )
+    return await html_to_pic(
+        template_path=f"file://{css_path if css_path else TEMPLATES_PATH}",
+        html=await template.render_async(md=md, css=css, extra=extra),
+        viewport={"width": width, "height": 10},
+        type=type,
+        quality=quality,
+        device_scale_factor=device_scale_factor,
+        screenshot_timeout=screenshot_timeout,
+        priority=priority,
+    )
+
+
+async def text_to_pic(
+    text: str,
+    css_path: str = "",
+    width: int = 500,
+    type: Literal["jpeg", "png"] = "png",
+    quality: Union[int, None] = None,
+    device_scale_factor: float = 2,
+    screenshot_timeout: Optional[float] = 30_000,
+    priority: Optional[Priority] = None,
+) -> bytes:
+    """多行文本转图片
+
+    Args:
+        text (str): 纯文本, 可多行
+        css_path (str, optional): css文件
+        width (int, optional): 图片宽度，默认为 500
+        type (Literal["jpeg", "png"]): 图片类型, 默认 png
+        quality (int, optional): 图片质量 0-100 当为`png`时无效
+        device_scale_factor (float, optional): 缩放比例. Defaults to 2.
+        screenshot_timeout (float, optional): 截图超时时间，默认30000ms
+        priority (Optional[Priority], optional): 渲染优先级. Defaults to None.
+
+    Returns:
+        bytes: 图片, 可直接发送
+    """
+    template = env.get_template("text.html")
+    return await html_to_pic(
+        template_path=f"file://{css_path if css_path else TEMPLATES_PATH}",
+        html=await template.render_async(
+            text=text,
+            css=await read_file(css_path) if css_path else await read_tpl("text.css"),
+        ),
+        viewport={"width": width, "height": 10},
+        type=type,
+        quality=quality,
+        device_scale_factor=device_scale_factor,
+        screenshot_timeout=screenshot_timeout,
+        priority=priority,
+    )
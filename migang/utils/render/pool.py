@@ -0,0 +1,287 @@
+"""Playwright页面池，限制同时存在的页面数，HTML渲染复用已打开的页面
+"""
+import heapq
+import asyncio
+import itertools
+from time import monotonic
+from enum import IntEnum, unique
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Tuple, Hashable, Optional, AsyncIterator
+
+from nonebot.log import logger
+from playwright.async_api import Page
+from nonebot import require, get_driver
+from nonebot.matcher import current_matcher
+
+from migang.core.utils.latency import latency_recorder
+
+require("nonebot_plugin_htmlrender")
+from nonebot_plugin_htmlrender import get_browser
+
+# 同时存在的页面数（含空闲页面），每个页面对应一个浏览器上下文
+_MAX_PAGES: int = max(getattr(get_driver().config, "render_max_pages", 4), 1)
+# 排队的默认超时时间
+_QUEUE_TIMEOUT = 60
+# 页面渲染次数达到上限后关闭，避免长期复用导致内存增长
+_MAX_USES = 100
+# 空闲超过该时间的页面被关闭
+_IDLE_TIMEOUT = 300
+
+
+@unique
+class Priority(IntEnum):
+    """渲染的优先级，数值越小越优先"""
+
+    interactive = 0
+    """响应用户指令的渲染
+    """
+    background = 1
+    """定时任务、广播等的渲染，至少为interactive保留一个页面
+    """
+
+
+class _PooledPage:
+    __slots__ = ("page", "key", "viewport", "uses", "last_used")
+
+    def __init__(self, page: Page, key: Hashable, viewport: Optional[Dict]) -> None:
+        self.page = page
+        self.key = key
+        self.viewport = viewport
+        self.uses = 0
+        self.last_used = monotonic()
+
+
+class RenderPool:
+    """限制同时渲染的数量并按优先级排队，渲染完成的页面按key保留以便复用"""
+
+    def __init__(self, max_pages: int) -> None:
+        """RenderPool构造函数
+
+        Args:
+            max_pages (int): 同时存在的页面数
+        """
+        self.__max_pages = max_pages
+        self.__background_limit = max(max_pages - 1, 1)
+        self.__active = 0
+        self.__active_background = 0
+        self.__waiters: List[Tuple[int, int, asyncio.Future]] = []
+        """(优先级, 序号, future)的堆，同优先级先到先得
+        """
+        self.__seq = itertools.count()
+        self.__idle: OrderedDict[int, _PooledPage] = OrderedDict()
+        """空闲页面，按最后使用时间排序
+        """
+        self.__idle_seq = itertools.count()
+        self.__stats: Dict[str, int] = {
+            "renders": 0,
+            "reused": 0,
+            "created": 0,
+            "timeouts": 0,
+            "errors": 0,
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        """获取页面池的状态
+
+        Returns:
+            Dict[str, Any]: 包含排队数、渲染中与空闲页面数以及累计计数
+        """
+        queued = [0, 0]
+        for priority, _, future in self.__waiters:
+            if not future.done():
+                queued[priority] += 1
+        return {
+            "max_pages": self.__max_pages,
+            "active": self.__active,
+            "idle": len(self.__idle),
+            "queued_interactive": queued[Priority.interactive],
+            "queued_background": queued[Priority.background],
+            **self.__stats,
+        }
+
+    def __can_run(self, priority: Priority) -> bool:
+        if self.__active >= self.__max_pages:
+            return False
+        return (
+            priority is Priority.interactive
+            or self.__active_background < self.__background_limit
+        )
+
+    def __take(self, priority: Priority) -> None:
+        self.__active += 1
+        if priority is Priority.background:
+            self.__active_background += 1
+
+    def __release(self, priority: Priority) -> None:
+        self.__active -= 1
+        if priority is Priority.background:
+            self.__active_background -= 1
+        self.__wake()
+
+    def __wake(self) -> None:
+        while self.__waiters:
+            priority, _, future = self.__waiters[0]
+            if future.done():
+                heapq.heappop(self.__waiters)
+                continue
+            # 堆顶为最高优先级，堆顶无法运行时其余也无需检查
+            if not self.__can_run(Priority(priority)):
+                break
+            heapq.heappop(self.__waiters)
+            self.__take(Priority(priority))
+            future.set_result(None)
+
+    async def __acquire(self, priority: Priority, timeout: float) -> None:
+        if self.__can_run(priority) and (
+            not self.__waiters or self.__waiters[0][0] > priority
+        ):
+            self.__take(priority)
+            return
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self.__waiters, (priority, next(self.__seq), future))
+        try:
+            await asyncio.wait_for(future, timeout)
+        except BaseException as e:
+            if future.done() and not future.cancelled():
+                # 已分配但未能使用
+                self.__release(priority)
+            if isinstance(e, asyncio.TimeoutError):
+                self.__stats["timeouts"] += 1
+            raise
+
+    async def __checkout(
+        self, key: Hashable, viewport: Optional[Dict], options: Dict[str, Any]
+    ) -> _PooledPage:
+        now = monotonic()
+        for idle_id, item in list(self.__idle.items()):
+            if item.page.is_closed() or now - item.last_used > _IDLE_TIMEOUT:
+                del self.__idle[idle_id]
+                await self.__close(item)
+        if key is not None:
+            for idle_id, item in self.__idle.items():
+                if item.key == key:
+                    del self.__idle[idle_id]
+                    if viewport and viewport != item.viewport:
+                        await item.page.set_viewport_size(viewport)
+                        item.viewport = viewport
+                    self.__stats["reused"] += 1
+                    return item
+        # 为新页面腾出位置
+        while self.__idle and self.__active + len(self.__idle) > self.__max_pages:
+            await self.__close(self.__idle.popitem(last=False)[1])
+        if viewport:
+            options = {**options, "viewport": viewport}
+        page = await (await get_browser()).new_page(**options)
+        self.__stats["created"] += 1
+        return _PooledPage(page=page, key=key, viewport=viewport)
+
+    async def __checkin(self, item: _PooledPage, ok: bool) -> None:
+        item.uses += 1
+        item.last_used = monotonic()
+        if (
+            not ok
+            or item.key is None
+            or item.uses >= _MAX_USES
+            or item.page.is_closed()
+        ):
+            await self.__close(item)
+            return
+        self.__idle[next(self.__idle_seq)] = item
+
+    async def __close(self, item: _PooledPage) -> None:
+        try:
+            await item.page.close()
+        except Exception as e:
+            logger.debug(f"关闭渲染页面失败：{e}")
+
+    @asynccontextmanager
+    async def page(
+        self,
+        key: Optional[Hashable] = None,
+        viewport: Optional[Dict[str, int]] = None,
+        priority: Optional[Priority] = None,
+        timeout: Optional[float] = None,
+        **options: Any,
+    ) -> AsyncIterator[Page]:
+        """排队获取页面
+
+        Args:
+            key (Optional[Hashable], optional): 页面的复用key，相同key的渲染复用同一页面，为None时使用后关闭. Defaults to None.
+            viewport (Optional[Dict[str, int]], optional): 视口大小. Defaults to None.
+            priority (Optional[Priority], optional): 优先级，为None时在事件处理中为interactive，反之为background. Defaults to None.
+            timeout (Optional[float], optional): 排队超时时间，超时抛出asyncio.TimeoutError. Defaults to None.
+            **options: browser.new_page的参数
+
+        Yields:
+            Page: 页面
+        """
+        if priority is None:
+            priority = (
+                Priority.interactive
+                if current_matcher.get(None)
+                else Priority.background
+            )
+        if key is not None:
+            key = (key, tuple(sorted((k, repr(v)) for k, v in options.items())))
+        matcher = current_matcher.get(None)
+        plugin_name = matcher.plugin_name if matcher else None
+        start = monotonic()
+        await self.__acquire(priority, timeout or _QUEUE_TIMEOUT)
+        latency_recorder.record("render_wait", plugin_name, monotonic() - start)
+        try:
+            start = monotonic()
+            item = await self.__checkout(key, viewport, options)
+            ok = False
+            try:
+                yield item.page
+                ok = True
+            finally:
+                self.__stats["renders"] += 1
+                if not ok:
+                    self.__stats["errors"] += 1
+                await self.__checkin(item, ok)
+                latency_recorder.record("render", plugin_name, monotonic() - start)
+        finally:
+            self.__release(priority)
+
+    async def close(self) -> None:
+        """关闭全部空闲页面"""
+        while self.__idle:
+            await self.__close(self.__idle.popitem(last=False)[1])
+
+
+render_pool = RenderPool(max_pages=_MAX_PAGES)
+"""全局的渲染页面池
+"""
+
+
+@asynccontextmanager
+async def get_new_page(
+    device_scale_factor: float = 2,
+    priority: Optional[Priority] = None,
+    **kwargs: Any,
+) -> AsyncIterator[Page]:
+    """与nonebot_plugin_htmlrender.get_new_page用法相同，页面在使用后关闭，但同时打开的页面数受页面池限制
+
+    Args:
+        device_scale_factor (float, optional): 缩放比例. Defaults to 2.
+        priority (Optional[Priority], optional): 优先级. Defaults to None.
+        **kwargs: browser.new_page的参数
+
+    Yields:
+        Page: 页面
+    """
+    viewport = kwargs.pop("viewport", None)
+    async with render_pool.page(
+        viewport=viewport,
+        priority=priority,
+        device_scale_factor=device_scale_factor,
+        **kwargs,
+    ) as page:
+        yield page
+
+
+@get_driver().on_shutdown
+async def _():
+    await render_pool.close()
@@ -4,14 +4,15 @@
 # ref: https://github.com/observerss/textfilter
 
 import re
-from typing import Union
-from collections import defaultdict
+from array import array
+from collections import deque, defaultdict
+from typing import Dict, List, Tuple, Union, NamedTuple
 
 from nonebot.adapters.onebot.v11 import Message
 
 from migang.core import TEXT_PATH
 
-__all__ = ["NaiveFilter", "BSFilter", "DFAFilter"]
+__all__ = ["NaiveFilter", "BSFilter", "DFAFilter", "ACFilter", "Match"]
 __author__ = "observer"
 __date__ = "2012.01.05"
 
@@ -167,8 +168,168 @@ class DFAFilter:
         return "".join(ret)
 
 
-gfw = DFAFilter()
+# 全角字符转半角，一一对应，不改变文本长度
+_HALF_WIDTH = {i: i - 0xFEE0 for i in range(0xFF01, 0xFF5F)}
+_HALF_WIDTH[0x3000] = 0x20
+
+
+def _normalize(text: str, fold: bool) -> str:
+    """全角转半角并转为小写，保证结果与原文本逐字符对应"""
+    text = text.translate(_HALF_WIDTH)
+    if not fold:
+        return text
+    folded = text.lower()
+    if len(folded) == len(text):
+        return folded
+    # 个别字符小写后长度变化（如"İ"），保持原样以免偏移错位
+    return "".join(lower if len(lower := char.lower()) == 1 else char for char in text)
+
+
+class Match(NamedTuple):
+    """匹配到的关键词，text[start:end] == word"""
+
+    start: int
+    end: int
+    word: str
+
+
+class ACFilter:
+
+    """Filter Messages from keywords
+
+    Use Aho-Corasick automaton to scan the message once regardless of the number of keywords
+
+    >>> f = ACFilter()
+    >>> f.add("sexy")
+    >>> f.filter("hello SEXY baby")
+    hello **** baby
+    """
+
+    def __init__(self, fold: bool = True):
+        """ACFilter构造函数
+
+        Args:
+            fold (bool, optional): 忽略大小写与全角半角的区别. Defaults to True.
+        """
+        self.__fold = fold
+        self.__words: Dict[str, bool] = {}
+        """{关键词: 是否为白名单}
+        """
+        self.__automaton = None
+
+    def add(self, keyword: str, whitelist: bool = False):
+        """添加关键词，下次匹配前重新构建自动机
+
+        Args:
+            keyword (str): 关键词
+            whitelist (bool, optional): 白名单中的词内部不作为关键词匹配. Defaults to False.
+        """
+        keyword = _normalize(keyword.strip(), self.__fold)
+        if not keyword:
+            return
+        self.__words[keyword] = self.__words.get(keyword, False) or whitelist
+        self.__automaton = None
+
+    def parse(self, path, whitelist: bool = False):
+        with open(path, "r", encoding="utf8") as f:
+            for keyword in f:
+                self.add(keyword, whitelist=whitelist)
+
+    def compile(self):
+        """构建自动机，转移表为按状态编号存放的列表，失败指针存放于数组"""
+        goto: List[Dict[str, int]] = [{}]
+        own: List[List[Tuple[int, bool]]] = [[]]
+        for word, white in self.__words.items():
+            state = 0
+            for char in word:
+                nxt = goto[state].get(char)
+                if nxt is None:
+                    nxt = goto[state][char] = len(goto)
+                    goto.append({})
+                    own.append([])
+                state = nxt
+            own[state].append((len(word), white))
+        fail = array("l", [0]) * len(goto)
+        # 每个状态的输出包含其失败链上全部状态的输出，匹配时无需沿失败链查找
+        out: List[Tuple[Tuple[int, bool], ...]] = [()] * len(goto)
+        queue = deque()
+        for state in goto[0].values():
+            out[state] = tuple(own[state])
+            queue.append(state)
+        while queue:
+            state = queue.popleft()
+            for char, nxt in goto[state].items():
+                f = fail[state]
+                while f and char not in goto[f]:
+                    f = fail[f]
+                f = goto[f].get(char, 0)
+                fail[nxt] = f
+                out[nxt] = tuple(own[nxt]) + out[f]
+                queue.append(nxt)
+        self.__automaton = (goto, fail, out)
+
+    def scan(self, message: str) -> List[Match]:
+        """查找message中的全部关键词，包括相互重叠的，位于白名单词内部的不计入
+
+        Args:
+            message (str): 文本
+
+        Returns:
+            List[Match]: 按结束位置排序的匹配
+        """
+        if self.__automaton is None:
+            self.compile()
+        goto, fail, out = self.__automaton
+        matches: List[Tuple[int, int]] = []
+        white: List[Tuple[int, int]] = []
+        state = 0
+        for end, char in enumerate(_normalize(message, self.__fold), 1):
+            nxt = goto[state].get(char)
+            while nxt is None and state:
+                state = fail[state]
+                nxt = goto[state].get(char)
+            if nxt is None:
+                state = 0
+                continue
+            state = nxt
+            if outputs := out[state]:
+                for length, is_white in outputs:
+                    (white if is_white else matches).append((end - length, end))
+        if white:
+            matches = [
+                (start, end)
+                for start, end in matches
+                if not any(ws <= start and end <= we for ws, we in white)
+            ]
+        return [Match(start, end, message[start:end]) for start, end in matches]
+
+    def replace(self, message: str, repl: str = "*") -> Tuple[str, List[Match]]:
+        """将关键词的每个字符替换为repl
+
+        Args:
+            message (str): 文本
+            repl (str, optional): 替换的字符. Defaults to "*".
+
+        Returns:
+            Tuple[str, List[Match]]: 替换后的文本与匹配到的关键词
+        """
+        matches = self.scan(message)
+        if not matches:
+            return message, matches
+        chars = list(message)
+        for start, end, _ in matches:
+            chars[start:end] = [repl] * (end - start)
+        return "".join(chars), matches
+
+    def filter(self, message: str, repl: str = "*") -> str:
+        return self.replace(message, repl)[0]
+
+
+gfw = ACFilter()
 gfw.parse(TEXT_PATH / "sensitive_words.txt")
+if (TEXT_PATH / "sensitive_words_whitelist.txt").exists():
+    gfw.parse(TEXT_PATH / "sensitive_words_whitelist.txt", whitelist=True)
+gfw.compile()
 
 
 def filt_message(message: Union[Message, str]):
@@ -0,0 +1,59 @@
+"""比较migang.utils.text.filter中各过滤器的耗时
+
+用法：python scripts/benchmark_text_filter.py [消息长度] [重复次数]
+"""
+import sys
+import random
+import timeit
+from pathlib import Path
+
+import nonebot
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+nonebot.init()
+
+from migang.core import TEXT_PATH  # noqa: E402
+from migang.utils.text.filter import ACFilter, BSFilter, DFAFilter  # noqa: E402
+
+
+def generate_message(words, length: int) -> str:
+    """生成夹杂关键词的随机文本"""
+    pieces = []
+    size = 0
+    while size < length:
+        if random.random() < 0.05:
+            piece = random.choice(words)
+        else:
+            piece = "".join(
+                chr(random.randint(0x4E00, 0x9FA5)) for _ in range(random.randint(1, 8))
+            )
+        pieces.append(piece)
+        size += len(piece)
+    return "".join(pieces)[:length]
+
+
+def benchmark(length: int = 200, number: int = 200):
+    path = TEXT_PATH / "sensitive_words.txt"
+    with open(path, "r", encoding="utf8") as f:
+        words = [word.strip() for word in f if word.strip()]
+    random.seed(0)
+    messages = [generate_message(words, length) for _ in range(20)]
+    print(f"关键词数：{len(words)}，消息长度：{length}，重复次数：{number}")
+    for cls in (BSFilter, DFAFilter, ACFilter):
+        build = timeit.default_timer()
+        f = cls()
+        f.parse(path)
+        if isinstance(f, ACFilter):
+            f.compile()
+        build = timeit.default_timer() - build
+        cost = timeit.timeit(
+            lambda: [f.filter(message) for message in messages], number=number
+        )
+        print(
+            f"{cls.__name__:<10} 构建 {build * 1000:8.1f}ms"
+            f"  每条消息 {cost / number / len(messages) * 1e6:8.1f}us"
+        )
+
+
+if __name__ == "__main__":
+    benchmark(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,17 @@
+"""migang.core导入时需要已初始化的nonebot
+"""
+import os
+import tempfile
+from pathlib import Path
+
+import nonebot
+from nonebot.adapters.onebot.v11 import Adapter
+
+
+def pytest_configure(config) -> None:
+    # 数据与配置目录创建在工作目录下，不写入仓库，资源文件仍使用仓库中的
+    cwd = Path(tempfile.mkdtemp(prefix="migang-test-"))
+    (cwd / "resources").symlink_to(Path(config.rootpath) / "resources")
+    os.chdir(cwd)
+    nonebot.init()
+    nonebot.get_driver().register_adapter(Adapter)
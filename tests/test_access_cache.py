@@ -0,0 +1,89 @@
+from migang.core.permission import BAD, GOOD, NORMAL
+from migang.core.manager.group_manager import GroupManager
+from migang.core.manager.access_cache import AccessCache, AccessDecision
+
+
+class _PluginManager:
+    """只提供GroupManager检查插件时用到的接口"""
+
+    def __init__(self) -> None:
+        self.access_cache = AccessCache()
+        self.group_status = True
+        self.calls = 0
+
+    def check_group_status(self, plugin_name, group_id, group_permission) -> bool:
+        self.calls += 1
+        return self.group_status and group_permission >= NORMAL
+
+    def check_user_status(self, plugin_name, user_permission) -> bool:
+        return user_permission >= NORMAL
+
+
+def test_group_results_are_keyed_by_plugin_and_permission():
+    cache = AccessCache()
+    cache.set_group("a", 1, NORMAL, AccessDecision.allowed)
+    cache.set_group("a", 1, BAD, AccessDecision.user_denied)
+    assert cache.get_group("a", 1, NORMAL) is AccessDecision.allowed
+    assert cache.get_group("a", 1, BAD) is AccessDecision.user_denied
+    assert cache.get_group("a", 1, GOOD) is None
+    assert cache.get_group("b", 1, NORMAL) is None
+    assert cache.get_group("a", 2, NORMAL) is None
+
+
+def test_invalidate_group_drops_only_that_group():
+    cache = AccessCache()
+    cache.set_group("a", 1, NORMAL, AccessDecision.allowed)
+    cache.set_group("a", 2, NORMAL, AccessDecision.allowed)
+    cache.set_private("a", NORMAL, True)
+    cache.invalidate_group(1)
+    assert cache.get_group("a", 1, NORMAL) is None
+    assert cache.get_group("a", 2, NORMAL) is AccessDecision.allowed
+    assert cache.get_private("a", NORMAL) is True
+    # 不存在的群不报错
+    cache.invalidate_group(3)
+
+
+def test_clear_drops_group_and_private_results():
+    cache = AccessCache()
+    cache.set_group("a", 1, NORMAL, AccessDecision.allowed)
+    cache.set_private("a", NORMAL, False)
+    cache.clear()
+    assert cache.get_group("a", 1, NORMAL) is None
+    assert cache.get_private("a", NORMAL) is None
+
+
+def test_group_manager_reuses_cached_decision():
+    plugin_manager = _PluginManager()
+    group_manager = GroupManager(plugin_manager, task_manager=None)
+    for _ in range(3):
+        assert group_manager.check_plugin_access("a", 1, NORMAL) is (
+            AccessDecision.allowed
+        )
+    assert plugin_manager.calls == 1
+    assert group_manager.check_plugin_access("a", 1, BAD) is (
+        AccessDecision.user_denied
+    )
+
+
+def test_group_manager_invalidates_on_group_state_change():
+    plugin_manager = _PluginManager()
+    group_manager = GroupManager(plugin_manager, task_manager=None)
+    assert group_manager.check_plugin_access("a", 1, NORMAL) is AccessDecision.allowed
+    assert group_manager.check_plugin_access("a", 2, NORMAL) is AccessDecision.allowed
+
+    assert group_manager.disable_bot(1)
+    assert group_manager.check_plugin_access("a", 1, NORMAL) is (
+        AccessDecision.group_denied
+    )
+    # 其他群的结果不受影响
+    calls = plugin_manager.calls
+    assert group_manager.check_plugin_access("a", 2, NORMAL) is AccessDecision.allowed
+    assert plugin_manager.calls == calls
+
+    assert group_manager.enable_bot(1)
+    assert group_manager.check_plugin_access("a", 1, NORMAL) is AccessDecision.allowed
+
+    group_manager.set_group_permission(1, BAD)
+    assert group_manager.check_plugin_access("a", 1, NORMAL) is (
+        AccessDecision.group_denied
+    )
@@ -0,0 +1,115 @@
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+from migang.core.manager.data_class import CDMode, CheckType, LimitType
+from migang.core.manager.cd_manager import CDItem, CDManager, ExpiringDict
+
+CDChecker = CDManager.PluginCD.CDChecker
+
+
+def _call(checker: CDChecker, event, now: float):
+    """与PluginCD.check相同，通过时更新状态"""
+    ret = checker.check(event, now)
+    if ret is True:
+        checker.update(event, now)
+    return ret
+
+
+def test_expiring_dict_get_respects_ttl():
+    data = ExpiringDict(ttl=10)
+    data.set(1, "a", now=0)
+    assert data.get(1, now=10) == "a"
+    assert data.get(1, now=10.5) is None
+    assert data.get(2, now=0) is None
+
+
+def test_expiring_dict_drops_expired_items_on_set():
+    data = ExpiringDict(ttl=10)
+    data.set(1, "a", now=0)
+    data.set(2, "b", now=5)
+    data.set(3, "c", now=12)
+    assert len(data) == 2
+    # 重新写入的项移动到末尾，不会被先清理
+    data.set(2, "b", now=14)
+    data.set(4, "d", now=23)
+    assert len(data) == 2
+    assert data.get(2, now=23) == "b"
+    assert data.get(3, now=23) is None
+
+
+def test_cooldown():
+    checker = CDChecker(CDItem(10))
+    event = SimpleNamespace(user_id=1)
+    assert _call(checker, event, 0) is True
+    assert _call(checker, event, 4) == pytest.approx(6)
+    assert _call(checker, SimpleNamespace(user_id=2), 4) is True
+    assert _call(checker, event, 10.5) is True
+
+
+def test_sliding_window():
+    checker = CDChecker(CDItem(10, count=3, mode=CDMode.sliding_window))
+    event = SimpleNamespace(user_id=1)
+    for now in (0, 1, 2):
+        assert _call(checker, event, now) is True
+    # 窗口内已有3次调用，需等到第一次调用滑出窗口
+    assert _call(checker, event, 5) == pytest.approx(5)
+    assert _call(checker, event, 10.5) is True
+    # 窗口内为1、2、10.5三次调用
+    assert _call(checker, event, 10.8) == pytest.approx(0.2)
+    assert _call(checker, event, 11.5) is True
+
+
+def test_token_bucket():
+    checker = CDChecker(CDItem(10, count=2, mode=CDMode.token_bucket))
+    event = SimpleNamespace(user_id=1)
+    assert _call(checker, event, 0) is True
+    assert _call(checker, event, 0) is True
+    # 每5秒补充一个令牌
+    assert _call(checker, event, 1) == pytest.approx(4)
+    assert _call(checker, event, 5) is True
+    assert _call(checker, event, 5) == pytest.approx(5)
+    # 超过cd未调用时令牌已补满
+    assert _call(checker, event, 20) is True
+    assert _call(checker, event, 20) is True
+    assert _call(checker, event, 20) != True
+
+
+def test_check_type_and_limit_type():
+    private = CDChecker(CDItem(10, check_type=CheckType.private))
+    group_event = SimpleNamespace(user_id=1, group_id=100)
+    private_event = SimpleNamespace(user_id=1)
+    assert _call(private, group_event, 0) is True
+    assert _call(private, group_event, 1) is True
+    assert _call(private, private_event, 20) is True
+    assert _call(private, private_event, 21) != True
+
+    group = CDChecker(CDItem(10, limit_type=LimitType.group))
+    assert _call(group, group_event, 0) is True
+    assert _call(group, SimpleNamespace(user_id=2, group_id=100), 1) != True
+    assert _call(group, SimpleNamespace(user_id=2, group_id=200), 1) is True
+    assert _call(group, private_event, 1) is True
+
+
+def test_plugin_cd_updates_only_when_all_checkers_pass(monkeypatch):
+    clock = [0.0]
+    monkeypatch.setattr(sys.modules[CDManager.__module__], "time", lambda: clock[0])
+    manager = CDManager()
+    manager.add(
+        "a",
+        [
+            CDItem(10, hint="[_剩余时间_]"),
+            CDItem(100, count=2, mode=CDMode.sliding_window, hint="window"),
+        ],
+    )
+    event = SimpleNamespace(user_id=1)
+    assert manager.check("a", event) is True
+    clock[0] = 4
+    assert manager.check("a", event) == "6.00"
+    # 被冷却拒绝的调用不计入窗口
+    clock[0] = 11
+    assert manager.check("a", event) is True
+    clock[0] = 22
+    assert manager.check("a", event) == "window"
+    assert manager.check("b", event) is True
@@ -0,0 +1,78 @@
+import asyncio
+from types import SimpleNamespace
+
+from migang.core.manager.data_class import CountPeriod
+from migang.core.manager.count_manager import Counter, CountItem, CountManager
+
+_DAY = CountPeriod.day._value_
+_HOUR = CountPeriod.hour._value_
+
+
+def _current() -> list:
+    return [100] * len(CountPeriod)
+
+
+def test_counts_per_key_and_period():
+    counter = Counter(_current())
+    counter.incr(1, _DAY)
+    counter.incr(1, _DAY)
+    counter.incr(1, _HOUR)
+    counter.incr(2, _DAY)
+    assert counter.get(1, _DAY) == 2
+    assert counter.get(1, _HOUR) == 1
+    assert counter.get(2, _DAY) == 1
+    assert counter.get(2, _HOUR) == 0
+    assert counter.get(3, _DAY) == 0
+    assert len(counter) == 2
+
+
+def test_epoch_change_resets_only_that_period():
+    current = _current()
+    counter = Counter(current)
+    counter.incr(1, _DAY)
+    counter.incr(1, _HOUR)
+    current[_DAY] += 1
+    assert counter.get(1, _DAY) == 0
+    assert counter.get(1, _HOUR) == 1
+    # 过期的计数在下次增加时从1开始
+    counter.incr(1, _DAY)
+    assert counter.get(1, _DAY) == 1
+
+
+def test_new_key_starts_in_current_epoch():
+    current = _current()
+    counter = Counter(current)
+    current[_DAY] += 1
+    counter.incr(1, _DAY)
+    assert counter.get(1, _DAY) == 1
+
+
+def test_legacy_counts_belong_to_current_epoch():
+    current = _current()
+    counter = Counter(current)
+    counter.load_legacy({"1": [3, 5, 0, 0, 0]})
+    assert counter.get(1, _HOUR) == 3
+    assert counter.get(1, _DAY) == 5
+    current[_DAY] += 1
+    assert counter.get(1, _DAY) == 0
+
+
+def test_reset_and_snapshot_round_trip(tmp_path):
+    async def main():
+        event = SimpleNamespace(user_id=1)
+        manager = CountManager(tmp_path)
+        await manager.add("a", CountItem(2, hint="limit"))
+        assert manager.check("a", event) is True
+        assert manager.check("a", event) is True
+        assert manager.check("a", event) == "limit"
+        # 没有计数配置的插件总是可用
+        assert manager.check("b", event) is True
+        await manager.save()
+
+        manager = CountManager(tmp_path)
+        await manager.add("a", CountItem(2, hint="limit"))
+        assert manager.check("a", event) == "limit"
+        manager.reset(CountPeriod.day)
+        assert manager.check("a", event) is True
+
+    asyncio.run(main())
@@ -0,0 +1,136 @@
+import asyncio
+
+import pytest
+
+from migang.core.utils.render_cache import RenderCache
+
+
+class _Renderer:
+    def __init__(self, data: bytes = b"image") -> None:
+        self.data = data
+        self.calls = 0
+        self.started = asyncio.Event()
+        self.release = asyncio.Event()
+        self.release.set()
+
+    async def __call__(self) -> bytes:
+        self.calls += 1
+        self.started.set()
+        await self.release.wait()
+        return self.data
+
+
+def test_key_depends_on_content():
+    assert RenderCache.key("help", 1, {"a": 1}) == RenderCache.key("help", 1, {"a": 1})
+    assert RenderCache.key("help", 1) != RenderCache.key("help", 2)
+
+
+def test_renders_once_per_key():
+    async def main():
+        cache = RenderCache(max_size=1024)
+        render = _Renderer()
+        assert await cache.get("a", render) == b"image"
+        assert await cache.get("a", render) == b"image"
+        assert render.calls == 1
+
+    asyncio.run(main())
+
+
+def test_concurrent_requests_share_one_render():
+    async def main():
+        cache = RenderCache(max_size=1024)
+        render = _Renderer()
+        render.release.clear()
+        tasks = [asyncio.create_task(cache.get("a", render)) for _ in range(3)]
+        await render.started.wait()
+        render.release.set()
+        assert await asyncio.gather(*tasks) == [b"image"] * 3
+        assert render.calls == 1
+
+    asyncio.run(main())
+
+
+def test_waiters_are_released_when_render_is_cancelled():
+    async def main():
+        cache = RenderCache(max_size=1024)
+        render = _Renderer()
+        render.release.clear()
+        leader = asyncio.create_task(cache.get("a", render))
+        await render.started.wait()
+        waiter = asyncio.create_task(cache.get("a", render))
+        await asyncio.sleep(0)
+        leader.cancel()
+        with pytest.raises(RuntimeError):
+            await asyncio.wait_for(waiter, 1)
+        assert leader.cancelled()
+        # 之后的请求重新渲染
+        render.release.set()
+        assert await cache.get("a", render) == b"image"
+        assert render.calls == 2
+
+    asyncio.run(main())
+
+
+def test_invalidate_by_tag():
+    async def main():
+        cache = RenderCache(max_size=1024)
+        render = _Renderer()
+        await cache.get("a", render, tag=1)
+        await cache.get("b", render, tag=2)
+        cache.invalidate(1)
+        await cache.get("a", render, tag=1)
+        await cache.get("b", render, tag=2)
+        assert render.calls == 3
+        cache.invalidate()
+        await cache.get("b", render, tag=2)
+        assert render.calls == 4
+
+    asyncio.run(main())
+
+
+def test_render_started_before_invalidate_is_not_cached():
+    async def main():
+        cache = RenderCache(max_size=1024)
+        render = _Renderer(b"old")
+        render.release.clear()
+        task = asyncio.create_task(cache.get("a", render, tag=1))
+        await render.started.wait()
+        cache.invalidate(1)
+        render.release.set()
+        # 正在渲染的请求仍得到结果，但结果不写入缓存
+        assert await task == b"old"
+        render.data = b"new"
+        assert await cache.get("a", render, tag=1) == b"new"
+
+    asyncio.run(main())
+
+
+def test_evicts_least_recently_used():
+    async def main():
+        cache = RenderCache(max_size=10)
+        render = _Renderer(b"12345")
+        await cache.get("a", render)
+        await cache.get("b", render)
+        await cache.get("a", render)
+        await cache.get("c", render)
+        assert render.calls == 3
+        await cache.get("a", render)
+        assert render.calls == 3
+        await cache.get("b", render)
+        assert render.calls == 4
+
+    asyncio.run(main())
+
+
+def test_disk_cache_is_used_after_memory_eviction(tmp_path):
+    async def main():
+        cache = RenderCache(max_size=5, disk_path=tmp_path, disk_max_size=1024)
+        render = _Renderer(b"12345")
+        await cache.get("a", render)
+        await cache.get("b", render)
+        assert await cache.get("a", render) == b"12345"
+        assert render.calls == 2
+        cache.invalidate()
+        assert list(tmp_path.iterdir()) == []
+
+    asyncio.run(main())
@@ -0,0 +1,58 @@
+from migang.utils.text.filter import Match, ACFilter
+
+
+def _filter(*words: str, whitelist=(), fold: bool = True) -> ACFilter:
+    f = ACFilter(fold=fold)
+    for word in words:
+        f.add(word)
+    for word in whitelist:
+        f.add(word, whitelist=True)
+    return f
+
+
+def test_finds_overlapping_and_nested_keywords():
+    f = _filter("he", "she", "his", "hers")
+    assert f.scan("ushers") == [
+        Match(1, 4, "she"),
+        Match(2, 4, "he"),
+        Match(2, 6, "hers"),
+    ]
+    assert f.filter("ushers") == "u*****"
+
+
+def test_failure_links_across_partial_matches():
+    f = _filter("abcd", "bce")
+    assert f.scan("abce") == [Match(1, 4, "bce")]
+    assert f.scan("xabcdx") == [Match(1, 5, "abcd")]
+
+
+def test_fold_ignores_case_and_full_width():
+    f = _filter("abc")
+    assert f.scan("xABCx") == [Match(1, 4, "ABC")]
+    assert f.scan("ａｂｃ") == [Match(0, 3, "ａｂｃ")]
+    # 匹配的位置对应原文本
+    assert f.filter("ＡＢＣ!") == "***!"
+    assert _filter("abc", fold=False).scan("ABC") == []
+
+
+def test_whitelist_spans_hide_inner_matches():
+    f = _filter("ab", "bc", whitelist=["abc"])
+    assert f.scan("abc") == []
+    # 白名单之外的匹配不受影响
+    assert f.scan("ab abc bc") == [Match(0, 2, "ab"), Match(7, 9, "bc")]
+
+
+def test_keyword_added_after_compile_is_matched():
+    f = _filter("foo")
+    assert f.filter("foo bar") == "*** bar"
+    f.add("bar")
+    assert f.filter("foo bar") == "*** ***"
+
+
+def test_replace_returns_matches_and_keeps_unmatched_text():
+    f = _filter("坏词")
+    text, matches = f.replace("这是坏词。", repl="#")
+    assert text == "这是##。"
+    assert matches == [Match(2, 4, "坏词")]
+    assert f.replace("正常", repl="#") == ("正常", [])
+    assert _filter().scan("anything") == []
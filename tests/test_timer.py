@@ -0,0 +1,127 @@
+import asyncio
+from time import monotonic
+from datetime import datetime, timedelta
+
+from migang.core.utils import timer
+from migang.core.utils.timer import TimerService
+
+
+def _run(coro_func):
+    async def main():
+        service = TimerService()
+        try:
+            await coro_func(service)
+        finally:
+            await service.close()
+
+    asyncio.run(main())
+
+
+def test_callbacks_run_in_due_order():
+    async def main(service: TimerService):
+        calls = []
+        service.call_later("b", 0.04, calls.append, "b")
+        service.call_later("a", 0.02, calls.append, "a")
+        service.call_at_datetime(
+            "c", datetime.now() + timedelta(seconds=0.06), calls.append, "c"
+        )
+        assert len(service) == 3
+        await asyncio.sleep(0.1)
+        assert calls == ["a", "b", "c"]
+        assert len(service) == 0
+
+    _run(main)
+
+
+def test_earlier_timer_wakes_the_service():
+    async def main(service: TimerService):
+        calls = []
+        service.call_later("late", 10, calls.append, "late")
+        await asyncio.sleep(0.01)
+        service.call_later("early", 0.01, calls.append, "early")
+        await asyncio.sleep(0.05)
+        assert calls == ["early"]
+        assert "late" in service
+
+    _run(main)
+
+
+def test_reschedule_replaces_previous_timer():
+    async def main(service: TimerService):
+        calls = []
+        service.call_later("a", 0.01, calls.append, 1)
+        service.call_later("a", 0.05, calls.append, 2)
+        assert len(service) == 1
+        assert service.when("a") > monotonic() + 0.02
+        await asyncio.sleep(0.03)
+        assert calls == []
+        await asyncio.sleep(0.05)
+        assert calls == [2]
+        assert service.when("a") is None
+
+    _run(main)
+
+
+def test_cancel():
+    async def main(service: TimerService):
+        calls = []
+        service.call_later("a", 0.01, calls.append, 1)
+        assert service.cancel("a")
+        assert not service.cancel("a")
+        assert "a" not in service
+        await asyncio.sleep(0.03)
+        assert calls == []
+
+    _run(main)
+
+
+def test_cancelled_entries_are_compacted(monkeypatch):
+    monkeypatch.setattr(timer, "_COMPACT_THRESHOLD", 4)
+
+    async def main(service: TimerService):
+        calls = []
+        for i in range(10):
+            service.call_later(i, 10 + i, calls.append, i)
+        service.call_later("due", 0.01, calls.append, "due")
+        for i in range(6):
+            assert service.cancel(i)
+        # 已取消的项超过阈值且超过一半时重建堆
+        assert len(service._TimerService__heap) == 5
+        assert len(service) == 5
+        await asyncio.sleep(0.03)
+        assert calls == ["due"]
+        assert sorted(service._TimerService__entries) == [6, 7, 8, 9]
+
+    _run(main)
+
+
+def test_async_callback_and_failing_callback():
+    async def main(service: TimerService):
+        calls = []
+
+        async def callback(value):
+            await asyncio.sleep(0)
+            calls.append(value)
+
+        def fail():
+            raise ValueError("boom")
+
+        service.call_later("fail", 0.01, fail)
+        service.call_later("async", 0.02, callback, 1)
+        await asyncio.sleep(0.05)
+        # 回调出错不影响之后的定时
+        assert calls == [1]
+
+    _run(main)
+
+
+def test_timer_restarts_after_close():
+    async def main(service: TimerService):
+        calls = []
+        service.start()
+        await service.close()
+        service.call_later("a", 0.01, calls.append, 1)
+        await asyncio.sleep(0.03)
+        assert calls == [1]
+
+    _run(main)